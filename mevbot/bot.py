@@ -1,13 +1,27 @@
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
+from collections import deque
 import asyncio
 import logging
-from web3 import Web3
+import yaml
+import aiohttp
+from web3 import AsyncWeb3, AsyncHTTPProvider, WebsocketProviderV2
 from eth_account import Account
 from .core.strategy import MEVStrategy
 from .core.mempool import MempoolMonitor
 from .core.flashloan import FlashLoanManager
+from .core.flash_loan import FlashLoanManager as StrategyFlashLoanManager
 from .core.flashbots import FlashbotsManager
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 logger = logging.getLogger(__name__)
 
 class MEVBot:
@@ -26,27 +40,55 @@ class MEVBot:
             self.config
         )
         
+        # Flash loan executor handed to strategies that borrow themselves
+        self.strategy_flash_loan = StrategyFlashLoanManager(self.w3, self.config)
+        
         # State tracking
         self.is_running = False
         self.current_block = 0
-        self.pending_bundles = []
+        self.pending_bundles = deque()  # Ordered by target_block
+        
+        # Hashes of transactions already analyzed and rejected this block
+        self._rejected_txs = set()
+        
+        # Called with each new block number, e.g. FlashLoanManager.on_new_block
+        self._block_listeners: List[Callable[[int], None]] = []
+        
+        # Keeps its block-scoped caches, nonce resync and receipt waits on the head
+        self.add_block_listener(self.strategy_flash_loan.on_new_block)
+        
+        # Websocket subscription state
+        self._heads_subscription = None
+        self._pending_subscription = None
+        self._reconnect_delay = self.config.get('ws_reconnect_delay', 1.0)
+        
+        # Pooled HTTP session for RPC calls, opened in start()
+        self._http_session: Optional[aiohttp.ClientSession] = None
     
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from file"""
-        import yaml
         with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=YamlLoader)
     
-    def _initialize_web3(self) -> Web3:
-        """Initialize Web3 with appropriate middleware"""
-        w3 = Web3(Web3.HTTPProvider(self.config['rpc_url']))
-        
-        # Add necessary middleware
-        w3.middleware_onion.add(
-            self._build_flashbots_middleware()
-        )
+    async def reload_config(self, config_path: str):
+        """Reload configuration without blocking the event loop"""
+        self.config = await asyncio.to_thread(self._load_config, config_path)
+    
+    def _initialize_web3(self) -> AsyncWeb3:
+        """
+        Initialize AsyncWeb3 for chain reads
         
-        return w3
+        The Flashbots relay middleware is synchronous, FlashbotsManager wires it
+        onto its own Web3 instead of this one
+        """
+        return AsyncWeb3(AsyncHTTPProvider(
+            self.config['rpc_url'],
+            request_kwargs={'timeout': self.config.get('rpc_timeout', 5)}
+        ))
+    
+    def add_block_listener(self, listener: Callable[[int], None]):
+        """Register a callback fed every new block number from newHeads"""
+        self._block_listeners.append(listener)
     
     async def start(self):
         """Start the MEV bot"""
@@ -54,6 +96,15 @@ class MEVBot:
         self.is_running = True
         
         try:
+            # Share one keep-alive connection pool across all RPC calls
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.config.get('rpc_pool_size', 100),
+                    ttl_dns_cache=600
+                )
+            )
+            await self.w3.provider.cache_async_session(self._http_session)
+            
             # Start all components
             await self.mempool.start_monitoring()
             await self.flashloan.start_monitoring()
@@ -63,80 +114,186 @@ class MEVBot:
             
         except Exception as e:
             logger.error(f"Error in MEV bot: {e}")
-            self.is_running = False
+            await self.stop()
             raise
     
     async def stop(self):
         """Stop the MEV bot"""
         logger.info("Stopping MEV bot...")
         self.is_running = False
+        
+        await self.flashbots.aclose()
+        
+        if self._http_session:
+            await self._http_session.close()
+            self._http_session = None
     
     async def _main_loop(self):
-        """Main bot loop"""
+        """Main bot loop, reconnecting with backoff whenever the websocket drops"""
+        max_delay = self.config.get('ws_reconnect_max_delay', 30.0)
         while self.is_running:
             try:
-                # Update current block
-                new_block = self.w3.eth.block_number
-                if new_block > self.current_block:
-                    await self._handle_new_block(new_block)
-                    self.current_block = new_block
-                
-                # Process pending transactions
-                await self._process_pending_transactions()
+                await self._run_subscriptions()
+            except Exception as e:
+                logger.error(f"Websocket subscription error: {e}")
+            
+            if not self.is_running:
+                break
+            
+            logger.warning(f"Websocket closed, reconnecting in {self._reconnect_delay:.1f}s")
+            await asyncio.sleep(self._reconnect_delay)
+            self._reconnect_delay = min(self._reconnect_delay * 2, max_delay)
+    
+    async def _run_subscriptions(self):
+        """Subscribe over a fresh websocket and dispatch until it closes"""
+        async with AsyncWeb3.persistent_websocket(
+            WebsocketProviderV2(self.config['ws_url'])
+        ) as ws_w3:
+            # Blocks and pending transactions are pushed to us, no polling
+            self._heads_subscription = await ws_w3.eth.subscribe('newHeads')
+            self._pending_subscription = await ws_w3.eth.subscribe(
+                'newPendingTransactions', True  # Full transaction bodies
+            )
+            
+            # Subscribed, so the next drop starts backing off from scratch
+            self._reconnect_delay = self.config.get('ws_reconnect_delay', 1.0)
+            
+            async with asyncio.TaskGroup() as tg:
+                pending_task = tg.create_task(self._pending_loop())
+                await self._dispatch_subscriptions(ws_w3)
+                pending_task.cancel()
+    
+    async def _dispatch_subscriptions(self, ws_w3: AsyncWeb3):
+        """Route subscription messages to their handlers"""
+        async for message in ws_w3.ws.process_subscriptions():
+            if not self.is_running:
+                break
+            
+            try:
+                subscription = message['subscription']
                 
-                # Small delay to prevent excessive CPU usage
-                await asyncio.sleep(0.1)
+                if subscription == self._heads_subscription:
+                    head = message['result']
+                    if head['number'] > self.current_block:
+                        await self._handle_new_block(head)
+                        self.current_block = head['number']
                 
+                elif subscription == self._pending_subscription:
+                    # Push the transaction straight onto the mempool queue
+                    self.mempool.add_pending_transaction(message['result'])
+                    
             except Exception as e:
-                logger.error(f"Error in main loop: {e}")
-                await asyncio.sleep(1)
+                logger.error(f"Error dispatching subscription message: {e}")
     
-    async def _handle_new_block(self, block_number: int):
-        """Handle new block events"""
+    async def _pending_loop(self):
+        """Process pending transactions as the mempool pushes them"""
+        queue = self.mempool.tx_queue
+        async for tx in self.mempool.stream():
+            # Batch whatever else arrived while we were busy
+            batch = [tx]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            await self._process_pending_transactions(batch)
+    
+    async def _handle_new_block(self, head: Dict):
+        """Handle new block events from a newHeads header"""
+        block_number = head['number']
         try:
+            # Invalidate block-scoped caches and wake receipt waiters first
+            for listener in self._block_listeners:
+                try:
+                    listener(block_number)
+                except Exception as e:
+                    logger.error(f"Error in block listener: {e}")
+            
             # Clean up old pending bundles
             self._cleanup_old_bundles(block_number)
             
+            # Re-evaluate previously rejected transactions against new state
+            self._rejected_txs.clear()
+            
+            # Keep the bundle pricer's base fee current without an RPC
+            self.flashbots.on_new_head(head)
+            
             # Update market state
             await self._update_market_state()
             
             # Log block metrics
-            self._log_block_metrics(block_number)
+            self._log_block_metrics(head)
             
         except Exception as e:
             logger.error(f"Error handling new block {block_number}: {e}")
     
-    async def _process_pending_transactions(self):
+    async def _process_pending_transactions(self, transactions: List):
         """Process pending transactions for MEV opportunities"""
         try:
-            # Get relevant pending transactions
-            pending_txs = self.mempool.get_relevant_transactions()
+            # Skip transactions already rejected this block
+            pending_txs = [
+                tx for tx in transactions
+                if tx.hash not in self._rejected_txs
+            ]
+            if not pending_txs:
+                return
             
-            for tx in pending_txs:
-                # Analyze for MEV opportunity
-                opportunity = await self.strategy.analyze_opportunity(tx)
-                
+            # Analyze all transactions concurrently
+            async with asyncio.TaskGroup() as tg:
+                analyses = [
+                    tg.create_task(
+                        self._run_with_timeout(self.strategy.analyze_opportunity(tx))
+                    )
+                    for tx in pending_txs
+                ]
+            
+            opportunities = []
+            for tx, task in zip(pending_txs, analyses):
+                opportunity = task.result()
                 if opportunity and opportunity.profit > self.config['min_profit']:
-                    # Get flash loan if needed
-                    if opportunity.requires_flash_loan:
-                        loan_params = await self.flashloan.optimize_flash_loan(
-                            opportunity.token,
-                            opportunity.min_amount,
-                            opportunity.max_amount,
-                            opportunity.route
-                        )
-                        
-                        if not loan_params:
-                            continue
-                    
-                    # Create and submit bundle
-                    bundle = await self._create_bundle(opportunity, loan_params)
-                    if bundle:
-                        await self._submit_bundle(bundle)
+                    opportunities.append(opportunity)
+                else:
+                    self._rejected_txs.add(tx.hash)
+            
+            # Optimize loans and submit bundles concurrently
+            async with asyncio.TaskGroup() as tg:
+                for opportunity in opportunities:
+                    tg.create_task(
+                        self._run_with_timeout(self._execute_opportunity(opportunity))
+                    )
             
         except Exception as e:
             logger.error(f"Error processing pending transactions: {e}")
     
+    async def _run_with_timeout(self, coro):
+        """Await a task under the per-task timeout, returning None on failure"""
+        try:
+            async with asyncio.timeout(self.config.get('task_timeout', 2.0)):
+                return await coro
+        except TimeoutError:
+            logger.warning("Task timed out")
+            return None
+        except Exception as e:
+            logger.error(f"Error in task: {e}")
+            return None
+    
+    async def _execute_opportunity(self, opportunity):
+        """Get a flash loan if needed, then create and submit the bundle"""
+        loan_params = None
+        if opportunity.requires_flash_loan:
+            loan_params = await self.flashloan.optimize_flash_loan(
+                opportunity.token,
+                opportunity.min_amount,
+                opportunity.max_amount,
+                opportunity.route
+            )
+            
+            if not loan_params:
+                return
+        
+        # Create and submit bundle
+        bundle = await self._create_bundle(opportunity, loan_params)
+        if bundle:
+            await self._submit_bundle(bundle)
+    
     async def _create_bundle(self, opportunity: Dict, loan_params: Optional[Dict]) -> Optional[Dict]:
         """Create a transaction bundle for the opportunity"""
         try:
@@ -191,23 +348,33 @@ class MEVBot:
     
     def _cleanup_old_bundles(self, current_block: int):
         """Clean up old pending bundles"""
-        self.pending_bundles = [
-            b for b in self.pending_bundles
-            if b['target_block'] >= current_block - 2
-        ]
+        # Bundles are appended in target_block order, so expired ones are at the head
+        while (self.pending_bundles and
+               self.pending_bundles[0]['target_block'] < current_block - 2):
+            self.pending_bundles.popleft()
     
     async def _update_market_state(self):
         """Update market state and parameters"""
         # Implement market state updates
         pass
     
-    def _log_block_metrics(self, block_number: int):
+    def _log_block_metrics(self, head: Dict):
         """Log metrics for the block"""
+        # The header carries everything we need, no extra RPCs
         metrics = {
-            'block_number': block_number,
+            'block_number': head['number'],
             'pending_bundles': len(self.pending_bundles),
-            'gas_price': self.w3.eth.gas_price,
-            'timestamp': self.w3.eth.get_block(block_number)['timestamp']
+            'base_fee': head['baseFeePerGas'],
+            'timestamp': head['timestamp']
         }
         
         logger.info(f"Block metrics: {metrics}")
+
+
+def run(config_path: str):
+    """Run the MEV bot, on uvloop when it is installed"""
+    loop_factory = uvloop.new_event_loop if uvloop else None
+    
+    bot = MEVBot(config_path)
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(bot.start())
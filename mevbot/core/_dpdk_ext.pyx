@@ -0,0 +1,44 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Burst RX/TX bindings for the DPDK packet path
+
+rte_eth_rx_burst and rte_eth_tx_burst are static inline in rte_ethdev.h, so
+they are not exported from librte and cannot be reached through ctypes.
+These wrappers call them directly and release the GIL once per burst.
+"""
+from libc.stdint cimport uint16_t, uint64_t
+
+cdef extern from "rte_mbuf.h":
+    struct rte_mbuf:
+        pass
+
+cdef extern from "rte_ethdev.h":
+    uint16_t rte_eth_rx_burst(uint16_t port_id, uint16_t queue_id,
+                              rte_mbuf **rx_pkts, const uint16_t nb_pkts) nogil
+    uint16_t rte_eth_tx_burst(uint16_t port_id, uint16_t queue_id,
+                              rte_mbuf **tx_pkts, uint16_t nb_pkts) nogil
+
+
+def rx_burst(uint16_t port_id, uint16_t queue_id, uint64_t[::1] out_ptrs, uint16_t count):
+    """Receive up to count packets into out_ptrs as mbuf addresses, returning how many arrived"""
+    cdef uint16_t received = 0
+    if count > out_ptrs.shape[0]:
+        raise ValueError("count exceeds out_ptrs length")
+    if count == 0:
+        return 0
+
+    with nogil:
+        received = rte_eth_rx_burst(port_id, queue_id, <rte_mbuf **> &out_ptrs[0], count)
+    return received
+
+
+def tx_burst(uint16_t port_id, uint16_t queue_id, uint64_t[::1] pkt_ptrs, uint16_t count):
+    """Send count mbufs from pkt_ptrs, returning how many the NIC accepted"""
+    cdef uint16_t sent = 0
+    if count > pkt_ptrs.shape[0]:
+        raise ValueError("count exceeds pkt_ptrs length")
+    if count == 0:
+        return 0
+
+    with nogil:
+        sent = rte_eth_tx_burst(port_id, queue_id, <rte_mbuf **> &pkt_ptrs[0], count)
+    return sent
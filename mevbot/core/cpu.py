@@ -1,9 +1,11 @@
 """CPU optimization and pinning"""
 import os
+import time
+import threading
 import psutil
 import logging
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
 import ctypes
 import ctypes.util
 
@@ -16,24 +18,32 @@ class CPUConfig:
     mempool_cores: List[int]  # Cores for memory pool management
     worker_cores: List[int]   # Cores for worker threads
     main_core: int           # Core for main thread
+    all_cores: Tuple[int, ...] = field(init=False, repr=False)
+    role_to_cores: Dict[str, List[int]] = field(init=False, repr=False)
     
     def __post_init__(self):
         """Validate CPU configuration"""
-        all_cores = (
+        self.all_cores = tuple(
             self.network_cores +
             self.mempool_cores +
             self.worker_cores +
             [self.main_core]
         )
+        self.role_to_cores = {
+            'network': self.network_cores,
+            'mempool': self.mempool_cores,
+            'worker': self.worker_cores,
+            'main': [self.main_core]
+        }
         
         # Check for duplicates
-        if len(all_cores) != len(set(all_cores)):
+        if len(self.all_cores) != len(set(self.all_cores)):
             raise ValueError("Duplicate core assignments detected")
             
         # Check core availability
         max_cores = psutil.cpu_count()
-        if max(all_cores) >= max_cores:
-            raise ValueError(f"Core {max(all_cores)} exceeds available cores (0-{max_cores-1})")
+        if max(self.all_cores) >= max_cores:
+            raise ValueError(f"Core {max(self.all_cores)} exceeds available cores (0-{max_cores-1})")
 
 class CPUManager:
     """Manages CPU optimization and pinning"""
@@ -47,19 +57,17 @@ class CPUManager:
             main_core=config.get('main_core', 4)
         )
         self.initialized = False
+        
+        # Recent per-core utilization sample, reused within the TTL
+        self.cpu_sample_ttl = config.get('cpu_sample_ttl', 0.2)
+        self._cpu_sample: Optional[List[float]] = None
+        self._cpu_sample_time = 0.0
+        
         self._load_libraries()
         
     def _load_libraries(self):
         """Load required libraries"""
         try:
-            # Load pthread library for thread management
-            pthread_path = ctypes.util.find_library('pthread')
-            if pthread_path:
-                self.pthread = ctypes.CDLL(pthread_path)
-            else:
-                logger.warning("pthread library not found")
-                self.pthread = None
-                
             # Load numa library if available
             numa_path = ctypes.util.find_library('numa')
             if numa_path:
@@ -70,7 +78,6 @@ class CPUManager:
                 
         except Exception as e:
             logger.error(f"Failed to load libraries: {e}")
-            self.pthread = None
             self.numa = None
             
     def initialize(self) -> bool:
@@ -86,8 +93,8 @@ class CPUManager:
             if self.numa:
                 self._configure_numa()
                 
-            # Pin main thread
-            self.pin_thread_to_core(os.getpid(), self.config.main_core)
+            # Pin main thread (0 refers to the calling thread)
+            self.pin_thread_to_core(0, self.config.main_core)
             
             self.initialized = True
             logger.info("CPU optimization initialized successfully")
@@ -100,14 +107,7 @@ class CPUManager:
     def _set_cpu_governor(self):
         """Set CPU governor to performance mode"""
         try:
-            all_cores = (
-                self.config.network_cores +
-                self.config.mempool_cores +
-                self.config.worker_cores +
-                [self.config.main_core]
-            )
-            
-            for core in all_cores:
+            for core in self.config.all_cores:
                 governor_path = f"/sys/devices/system/cpu/cpu{core}/cpufreq/scaling_governor"
                 if os.path.exists(governor_path):
                     with open(governor_path, 'w') as f:
@@ -134,74 +134,61 @@ class CPUManager:
             logger.warning(f"Failed to configure NUMA: {e}")
             
     def pin_thread_to_core(self, thread_id: int, core_id: int) -> bool:
-        """Pin a thread to a specific CPU core"""
+        """Pin a thread to a specific CPU core
+        
+        thread_id is a native thread ID as returned by get_thread_id(),
+        or 0 for the calling thread.
+        """
         try:
-            if not self.pthread:
-                logger.warning("pthread library not available")
-                return False
-                
-            # Create CPU set
-            cpu_set = ctypes.c_uint64(1 << core_id)
-            
-            # Set CPU affinity
-            result = self.pthread.pthread_setaffinity_np(
-                thread_id,
-                ctypes.sizeof(cpu_set),
-                ctypes.byref(cpu_set)
-            )
-            
-            if result != 0:
-                logger.error(f"Failed to pin thread {thread_id} to core {core_id}")
-                return False
+            if hasattr(os, 'sched_setaffinity'):
+                os.sched_setaffinity(thread_id, {core_id})
+            else:
+                psutil.Process(thread_id or os.getpid()).cpu_affinity([core_id])
                 
             logger.info(f"Successfully pinned thread {thread_id} to core {core_id}")
             return True
             
         except Exception as e:
-            logger.error(f"Error pinning thread to core: {e}")
+            logger.error(f"Failed to pin thread {thread_id} to core {core_id}: {e}")
             return False
             
+    @staticmethod
+    def get_thread_id() -> int:
+        """Get the native thread ID of the calling thread for pinning"""
+        return threading.get_native_id()
+            
     def get_optimal_core(self, thread_type: str) -> Optional[int]:
         """Get optimal core for a new thread based on type"""
         try:
-            if thread_type == 'network':
-                cores = self.config.network_cores
-            elif thread_type == 'mempool':
-                cores = self.config.mempool_cores
-            elif thread_type == 'worker':
-                cores = self.config.worker_cores
-            else:
+            cores = self.config.role_to_cores.get(thread_type)
+            if cores is None:
                 logger.error(f"Unknown thread type: {thread_type}")
                 return None
                 
-            # Get core utilization
-            core_usage = {
-                core: psutil.cpu_percent(percpu=True)[core]
-                for core in cores
-            }
-            
             # Return core with lowest utilization
-            return min(core_usage.items(), key=lambda x: x[1])[0]
+            cpu_percent = self._sample_cpu_percent()
+            return min(cores, key=lambda core: cpu_percent[core])
             
         except Exception as e:
             logger.error(f"Error getting optimal core: {e}")
             return None
             
+    def _sample_cpu_percent(self) -> List[float]:
+        """Sample per-core utilization, reusing samples younger than the TTL"""
+        now = time.monotonic()
+        if self._cpu_sample is None or now - self._cpu_sample_time > self.cpu_sample_ttl:
+            self._cpu_sample = psutil.cpu_percent(percpu=True, interval=None)
+            self._cpu_sample_time = now
+        return self._cpu_sample
+            
     def get_core_stats(self) -> Dict:
         """Get statistics for managed cores"""
         try:
-            cpu_percent = psutil.cpu_percent(percpu=True)
+            cpu_percent = self._sample_cpu_percent()
             cpu_freq = psutil.cpu_freq(percpu=True)
             
             stats = {}
-            all_cores = (
-                ('network', self.config.network_cores),
-                ('mempool', self.config.mempool_cores),
-                ('worker', self.config.worker_cores),
-                ('main', [self.config.main_core])
-            )
-            
-            for core_type, cores in all_cores:
+            for core_type, cores in self.config.role_to_cores.items():
                 stats[core_type] = {
                     core: {
                         'utilization': cpu_percent[core],
@@ -1,11 +1,15 @@
 """Flash loan integration for MEV strategies"""
-from typing import Dict, List, Optional, Union, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union, Tuple
 from web3 import Web3
+from web3._utils.abi import get_abi_output_types
+from web3.exceptions import TransactionNotFound
 from eth_typing import Address
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector
 import asyncio
 import logging
+import time
 from dataclasses import dataclass
-import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +19,61 @@ DYDX = "dydx"
 BALANCER = "balancer"
 UNISWAP_V3 = "uniswap_v3"
 
+# Multicall3 is deployed at the same address on all major chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [{
+    "name": "tryBlockAndAggregate",
+    "type": "function",
+    "stateMutability": "payable",
+    "inputs": [
+        {"name": "requireSuccess", "type": "bool"},
+        {
+            "name": "calls",
+            "type": "tuple[]",
+            "components": [
+                {"name": "target", "type": "address"},
+                {"name": "callData", "type": "bytes"}
+            ]
+        }
+    ],
+    "outputs": [
+        {"name": "blockNumber", "type": "uint256"},
+        {"name": "blockHash", "type": "bytes32"},
+        {
+            "name": "returnData",
+            "type": "tuple[]",
+            "components": [
+                {"name": "success", "type": "bool"},
+                {"name": "returnData", "type": "bytes"}
+            ]
+        }
+    ]
+}]
+
+# Flash loan fees in basis points
+FEE_BPS = {
+    AAVE_V3: 9,     # 0.09%
+    DYDX: 0,        # No fee
+    BALANCER: 1,    # 0.01%
+    UNISWAP_V3: 5   # 0.05%
+}
+
+# Precomputed Aave V3 flashLoan calldata layout
+AAVE_FLASH_LOAN_TYPES = [
+    'address', 'address[]', 'uint256[]', 'uint256[]', 'address', 'bytes', 'uint16'
+]
+AAVE_FLASH_LOAN_SELECTOR = function_signature_to_4byte_selector(
+    f"flashLoan({','.join(AAVE_FLASH_LOAN_TYPES)})"
+)
+
+# Liquidity view function and result index for each provider
+LIQUIDITY_CALLS = {
+    AAVE_V3: ('getReserveData', 0),
+    DYDX: ('getAccountWei', None),
+    BALANCER: ('getPoolTokenInfo', 1),
+    UNISWAP_V3: ('balanceOf', None)
+}
+
 @dataclass
 class FlashLoanParams:
     provider: str
@@ -36,6 +95,40 @@ class FlashLoanManager:
             BALANCER: self._init_balancer(),
             UNISWAP_V3: self._init_uniswap()
         }
+        self.multicall = self._init_multicall()
+        
+        # Provider-specific transaction builders
+        self._tx_builders: Dict[str, Callable[[Any, FlashLoanParams, Dict], Dict]] = {
+            AAVE_V3: self._build_aave_tx,
+            DYDX: self._build_dydx_tx,
+            BALANCER: self._build_balancer_tx,
+            UNISWAP_V3: self._build_uniswap_tx
+        }
+        
+        # Liquidity cache: (token, providers) -> (block number, expiry, liquidity by provider)
+        self._liquidity_cache: Dict[
+            Tuple[Address, Tuple[str, ...]],
+            Tuple[int, float, Dict[str, Optional[int]]]
+        ] = {}
+        self.liquidity_cache_ttl = config.get('liquidity_cache_ttl', 1.0)
+        
+        # Block-scoped RPC cache, cleared by on_new_block, which MEVBot
+        # registers as a block listener on its newHeads dispatch
+        self.current_block: Optional[int] = None
+        self._block_cache: Dict[str, Any] = {}
+        
+        # Locally issued nonces, resynced from the pending count once per block
+        self._nonce_lock = asyncio.Lock()
+        self._next_nonce: Optional[int] = None
+        self._nonce_block: Optional[int] = None
+        self._nonces_leased: Set[int] = set()  # Issued but not yet sent
+        
+        # Set and replaced on every new block to wake receipt waiters
+        self._block_event = asyncio.Event()
+        self.receipt_timeout = config.get('receipt_timeout', 120)
+        self.receipt_poll_interval = config.get('receipt_poll_interval', 0.1)
+        # Longest wait for a block before re-polling anyway, in case the feed stalls
+        self.receipt_block_timeout = config.get('receipt_block_timeout', 15.0)
         
         # Performance tracking
         self.total_loans = 0
@@ -86,6 +179,41 @@ class FlashLoanManager:
             logger.error(f"Error initializing Uniswap: {e}")
             return None
             
+    def _init_multicall(self):
+        """Initialize Multicall3 contract for batched reads"""
+        try:
+            return self.w3.eth.contract(
+                address=self.config.get('multicall_address', MULTICALL3_ADDRESS),
+                abi=MULTICALL3_ABI
+            )
+        except Exception as e:
+            logger.error(f"Error initializing Multicall3: {e}")
+            return None
+            
+    def on_new_block(self, block_number: int):
+        """Invalidate block-scoped caches when a new block arrives"""
+        if block_number != self.current_block:
+            self.current_block = block_number
+            self._block_cache.clear()
+            
+            # Liquidity read at an earlier block is stale
+            self._liquidity_cache = {
+                key: entry for key, entry in self._liquidity_cache.items()
+                if entry[0] >= block_number
+            }
+            
+            self._block_event.set()
+            self._block_event = asyncio.Event()
+            
+    async def _block_cached(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Fetch a value at most once per block"""
+        if self.current_block is None:
+            return await fetch()
+            
+        if key not in self._block_cache:
+            self._block_cache[key] = await fetch()
+        return self._block_cache[key]
+        
     async def get_optimal_provider(
         self,
         token: Address,
@@ -93,18 +221,17 @@ class FlashLoanManager:
     ) -> Optional[str]:
         """Find the best flash loan provider based on fees and liquidity"""
         try:
+            active = [p for p, contract in self.providers.items() if contract]
+            
+            # All liquidity reads share one multicall
+            liquidities = await self._get_liquidities(token, active)
+            
             best_provider = None
             lowest_fee = float('inf')
             
-            # Check each provider
-            for provider in self.providers:
-                if not self.providers[provider]:
-                    continue
-                    
-                # Get provider fee and liquidity
-                fee = await self._get_provider_fee(provider, token, amount)
-                liquidity = await self._get_provider_liquidity(provider, token)
-                
+            for provider in active:
+                fee = self._get_provider_fee(provider, token, amount)
+                liquidity = liquidities.get(provider)
                 if fee is None or liquidity is None:
                     continue
                     
@@ -123,27 +250,98 @@ class FlashLoanManager:
             logger.error(f"Error finding optimal provider: {e}")
             return None
             
-    async def _get_provider_fee(
+    async def _get_liquidities(
+        self,
+        token: Address,
+        providers: List[str]
+    ) -> Dict[str, Optional[int]]:
+        """Get liquidity for several providers in a single round trip"""
+        key = (token, tuple(providers))
+        cached = self._liquidity_cache.get(key)
+        if cached and cached[1] > time.monotonic() and (
+                self.current_block is None or cached[0] >= self.current_block):
+            return cached[2]
+            
+        try:
+            block_number, liquidities = await self._multicall_liquidities(token, providers)
+            
+        except Exception as e:
+            # Fall back to one call per provider
+            logger.warning(f"Multicall liquidity read failed, falling back: {e}")
+            results = await asyncio.gather(
+                *(self._get_provider_liquidity(p, token) for p in providers),
+                return_exceptions=True
+            )
+            return {
+                p: None if isinstance(r, BaseException) else r
+                for p, r in zip(providers, results)
+            }
+            
+        now = time.monotonic()
+        self._liquidity_cache = {
+            k: entry for k, entry in self._liquidity_cache.items()
+            if entry[1] > now
+        }
+        self._liquidity_cache[key] = (
+            block_number,
+            now + self.liquidity_cache_ttl,
+            liquidities
+        )
+        return liquidities
+        
+    async def _multicall_liquidities(
+        self,
+        token: Address,
+        providers: List[str]
+    ) -> Tuple[int, Dict[str, Optional[int]]]:
+        """Read provider liquidity through Multicall3 tryBlockAndAggregate"""
+        if not self.multicall:
+            raise RuntimeError("Multicall3 not available")
+            
+        calls = [
+            (
+                self.providers[p].address,
+                self.providers[p].encodeABI(fn_name=LIQUIDITY_CALLS[p][0], args=[token])
+            )
+            for p in providers
+        ]
+        
+        block_number, _, results = await self.multicall.functions.tryBlockAndAggregate(
+            False, calls
+        ).call()
+        
+        liquidities = {}
+        for provider, (success, data) in zip(providers, results):
+            try:
+                liquidities[provider] = (
+                    self._decode_liquidity(provider, data) if success else None
+                )
+            except Exception as e:
+                logger.error(f"Error decoding {provider} liquidity: {e}")
+                liquidities[provider] = None
+                
+        return block_number, liquidities
+        
+    def _decode_liquidity(self, provider: str, data: bytes) -> int:
+        """Decode a liquidity call result the same way contract.call() would"""
+        fn_name, index = LIQUIDITY_CALLS[provider]
+        fn_abi = self.providers[provider].get_function_by_name(fn_name).abi
+        decoded = self.w3.codec.decode(get_abi_output_types(fn_abi), data)
+        
+        result = decoded[0] if len(decoded) == 1 else decoded
+        return result if index is None else result[index]
+            
+    def _get_provider_fee(
         self,
         provider: str,
         token: Address,
         amount: int
     ) -> Optional[float]:
         """Get flash loan fee for a provider"""
-        try:
-            if provider == AAVE_V3:
-                return amount * 0.0009  # 0.09% fee
-            elif provider == DYDX:
-                return 0  # No fee
-            elif provider == BALANCER:
-                return amount * 0.0001  # 0.01% fee
-            elif provider == UNISWAP_V3:
-                return amount * 0.0005  # 0.05% fee
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error getting provider fee: {e}")
+        fee_bps = FEE_BPS.get(provider)
+        if fee_bps is None:
             return None
+        return amount * fee_bps / 10_000
             
     async def _get_provider_liquidity(
         self,
@@ -156,16 +354,9 @@ class FlashLoanManager:
             if not contract:
                 return None
                 
-            if provider == AAVE_V3:
-                return await contract.functions.getReserveData(token).call()[0]
-            elif provider == DYDX:
-                return await contract.functions.getAccountWei(token).call()
-            elif provider == BALANCER:
-                return await contract.functions.getPoolTokenInfo(token).call()[1]
-            elif provider == UNISWAP_V3:
-                return await contract.functions.balanceOf(token).call()
-                
-            return None
+            fn_name, index = LIQUIDITY_CALLS[provider]
+            result = await getattr(contract.functions, fn_name)(token).call()
+            return result if index is None else result[index]
             
         except Exception as e:
             logger.error(f"Error getting provider liquidity: {e}")
@@ -216,13 +407,19 @@ class FlashLoanManager:
                 return False, None
                 
             # Send transaction
-            tx_hash = await self.w3.eth.send_transaction(tx)
-            receipt = await self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            try:
+                tx_hash = await self.w3.eth.send_transaction(tx)
+            except Exception:
+                self._release_nonce(tx['nonce'], sent=False)
+                raise
+            self._release_nonce(tx['nonce'], sent=True)
+            
+            receipt = await self._wait_for_receipt(tx_hash)
             
             success = receipt['status'] == 1
             if success:
                 self.successful_loans += 1
-                self.total_fees_paid += await self._get_provider_fee(
+                self.total_fees_paid += self._get_provider_fee(
                     params.provider,
                     params.token_address,
                     params.amount
@@ -235,6 +432,25 @@ class FlashLoanManager:
             logger.error(f"Error executing flash loan: {e}")
             return False, None
             
+    async def _wait_for_receipt(self, tx_hash) -> Dict:
+        """Wait for a receipt, polling once per block when blocks are being fed"""
+        async with asyncio.timeout(self.receipt_timeout):
+            while True:
+                # Grab the event before polling so a block landing mid-call wakes us
+                block_event = self._block_event
+                try:
+                    return await self.w3.eth.get_transaction_receipt(tx_hash)
+                except TransactionNotFound:
+                    pass
+                    
+                if self.current_block is None:
+                    await asyncio.sleep(self.receipt_poll_interval)
+                else:
+                    try:
+                        await asyncio.wait_for(block_event.wait(), self.receipt_block_timeout)
+                    except TimeoutError:
+                        logger.warning("No new block fed, polling receipt anyway")
+            
     async def _build_flash_loan_tx(
         self,
         params: FlashLoanParams
@@ -245,58 +461,75 @@ class FlashLoanManager:
             if not contract:
                 return None
                 
-            # Get current nonce
-            nonce = await self.w3.eth.get_transaction_count(
-                self.config['address']
-            )
+            max_fee = await self._get_max_fee()
+            priority_fee = await self._get_priority_fee()
+            
+            # Lease the nonce last so fee lookups cannot strand it
+            nonce = await self._get_nonce()
             
             # Build base transaction
             tx = {
                 'from': self.config['address'],
                 'nonce': nonce,
                 'gas': 500000,  # Estimate
-                'maxFeePerGas': await self._get_max_fee(),
-                'maxPriorityFeePerGas': await self._get_priority_fee()
+                'maxFeePerGas': max_fee,
+                'maxPriorityFeePerGas': priority_fee
             }
             
             # Add provider-specific parameters
-            if params.provider == AAVE_V3:
-                tx.update({
-                    'to': contract.address,
-                    'data': contract.encodeABI(
-                        fn_name='flashLoan',
-                        args=[
-                            self.config['address'],
-                            [params.token_address],
-                            [params.amount],
-                            [0],  # Interest rate mode
-                            self.config['address'],
-                            params.callback_data,
-                            0  # referralCode
-                        ]
-                    )
-                })
-            elif params.provider == DYDX:
-                # Implement dYdX specific parameters
-                pass
-            elif params.provider == BALANCER:
-                # Implement Balancer specific parameters
-                pass
-            elif params.provider == UNISWAP_V3:
-                # Implement Uniswap specific parameters
-                pass
-                
-            return tx
+            try:
+                return self._tx_builders[params.provider](contract, params, tx)
+            except Exception:
+                self._release_nonce(nonce, sent=False)
+                raise
             
         except Exception as e:
             logger.error(f"Error building flash loan transaction: {e}")
             return None
             
+    def _build_aave_tx(self, contract, params: FlashLoanParams, tx: Dict) -> Dict:
+        """Add Aave V3 flashLoan call to the base transaction"""
+        calldata = AAVE_FLASH_LOAN_SELECTOR + encode(
+            AAVE_FLASH_LOAN_TYPES,
+            [
+                self.config['address'],
+                [params.token_address],
+                [params.amount],
+                [0],  # Interest rate mode
+                self.config['address'],
+                params.callback_data,
+                0  # referralCode
+            ]
+        )
+        tx.update({
+            'to': contract.address,
+            'data': '0x' + calldata.hex()
+        })
+        return tx
+        
+    def _build_dydx_tx(self, contract, params: FlashLoanParams, tx: Dict) -> Dict:
+        """Add dYdX flash loan call to the base transaction"""
+        # Implement dYdX specific parameters
+        return tx
+        
+    def _build_balancer_tx(self, contract, params: FlashLoanParams, tx: Dict) -> Dict:
+        """Add Balancer flash loan call to the base transaction"""
+        # Implement Balancer specific parameters
+        return tx
+        
+    def _build_uniswap_tx(self, contract, params: FlashLoanParams, tx: Dict) -> Dict:
+        """Add Uniswap V3 flash call to the base transaction"""
+        # Implement Uniswap specific parameters
+        return tx
+            
     async def _get_max_fee(self) -> int:
         """Get current max fee per gas"""
         try:
-            base_fee = (await self.w3.eth.get_block('latest'))['baseFeePerGas']
-            return base_fee * 2
+            block = await self._block_cached(
+                'latest_block',
+                lambda: self.w3.eth.get_block('latest')
+            )
+            return block['baseFeePerGas'] * 2
             
         except Exception as e:
             logger.error(f"Error getting max fee: {e}")
@@ -305,8 +538,37 @@ class FlashLoanManager:
     async def _get_priority_fee(self) -> int:
         """Get current priority fee"""
         try:
-            return await self.w3.eth.max_priority_fee
+            return await self._block_cached(
+                'priority_fee',
+                lambda: self.w3.eth.max_priority_fee
+            )
             
         except Exception as e:
             logger.error(f"Error getting priority fee: {e}")
             return 2_000_000_000  # 2 GWEI default
+            
+    async def _get_nonce(self) -> int:
+        """Lease the next nonce, incrementing locally within the current block"""
+        # Serialized so concurrent builds never read the same count
+        async with self._nonce_lock:
+            if (self._next_nonce is None or self.current_block is None
+                    or self._nonce_block != self.current_block):
+                nonce = await self.w3.eth.get_transaction_count(
+                    self.config['address'], 'pending'
+                )
+                # Never reissue a nonce held by a build that has not been sent
+                if self._nonces_leased:
+                    nonce = max(nonce, max(self._nonces_leased) + 1)
+                self._next_nonce = nonce
+                self._nonce_block = self.current_block
+                
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            self._nonces_leased.add(nonce)
+            return nonce
+            
+    def _release_nonce(self, nonce: int, sent: bool):
+        """End a nonce lease, handing an unsent nonce back if nothing was issued after it"""
+        self._nonces_leased.discard(nonce)
+        if not sent and self._next_nonce == nonce + 1:
+            self._next_nonce = nonce
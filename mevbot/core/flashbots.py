@@ -1,16 +1,38 @@
 """Flashbots integration and bundle optimization"""
-from typing import List, Dict, Optional, Union, TypedDict, Any
+from typing import List, Dict, Optional, Tuple, Union, TypedDict, Any
 from web3 import Web3
 from eth_account.account import Account
 from eth_account.signers.local import LocalAccount
 import flashbots
-from flashbots import flashbot
+from flashbots.flashbots import Flashbots
+from flashbots.middleware import construct_flashbots_middleware
+from flashbots.provider import FlashbotProvider
 from flashbots.types import SignTx
+from web3._utils.module import attach_modules
+import requests
+from requests.adapters import HTTPAdapter
 import numpy as np
 import asyncio
 import logging
-from dataclasses import dataclass
+import os
 import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback when numba is not installed: run as plain Python"""
+        def decorator(func):
+            return func
+        return decorator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +44,7 @@ class SimulationResult(TypedDict):
     state_changes: List[Dict[str, Any]]
     value_transfers: List[Dict[str, Any]]
 
-@dataclass
+@dataclass(slots=True)
 class BundleMetrics:
     profit: float
     gas_cost: float
@@ -30,6 +52,143 @@ class BundleMetrics:
     builder_reputation: float
     historical_success: float
 
+@dataclass(slots=True)
+class BundleArrays:
+    """Bundle transaction fields as columns; raw dicts are kept for submission"""
+    values: np.ndarray
+    gases: np.ndarray
+    max_fees: np.ndarray
+    prio_fees: np.ndarray
+    raw: List[Dict]
+
+    @classmethod
+    def from_transactions(cls, transactions: List[Dict]) -> 'BundleArrays':
+        """Parse a bundle into float64 columns (wei amounts overflow int64)"""
+        count = len(transactions)
+        
+        def column(getter):
+            return np.fromiter(
+                (getter(tx) for tx in transactions),
+                dtype=np.float64,
+                count=count
+            )
+        
+        return cls(
+            values=column(lambda tx: tx.get('value', 0)),
+            gases=column(lambda tx: tx.get('gas', 21000)),
+            max_fees=column(lambda tx: tx.get('maxFeePerGas', tx.get('gasPrice', 0))),
+            prio_fees=column(lambda tx: tx.get('maxPriorityFeePerGas', 0)),
+            raw=list(transactions)
+        )
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+class BuilderStats(dict):
+    """Builder stats by name that flags every write so derived arrays are rebuilt"""
+    __slots__ = ('dirty',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dirty = True
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.dirty = True
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.dirty = True
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.dirty = True
+
+    def setdefault(self, key, default=None):
+        self.dirty = True
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self.dirty = True
+        return super().pop(*args)
+
+    def popitem(self):
+        self.dirty = True
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self.dirty = True
+
+@njit(cache=True, fastmath=True)
+def _score_bundle(values: np.ndarray, gases: np.ndarray, prices: np.ndarray) -> float:
+    """Value transferred minus gas cost, per unit of gas"""
+    total_value = 0.0
+    total_gas = 0.0
+    for i in range(values.shape[0]):
+        total_value += values[i] - gases[i] * prices[i]
+        total_gas += gases[i]
+    return total_value / total_gas if total_gas > 0 else 0.0
+
+@njit(cache=True, fastmath=True)
+def _heuristic_bid(base_fee: float, congestion: float, bundle_value: float) -> float:
+    """Bid more during congestion and for valuable bundles"""
+    return base_fee * (1 + congestion) * (1 + bundle_value / 1e18)
+
+# Signing account of a worker process, loaded once by _init_signing_worker
+_worker_account: Optional[LocalAccount] = None
+
+def _init_signing_worker(private_key: str) -> None:
+    """Load the signing key once when a worker process starts"""
+    global _worker_account
+    _worker_account = Account.from_key(private_key)
+
+def _sign_transactions(transactions: List[Dict]) -> List[bytes]:
+    """Sign transactions with the worker's key and return raw bytes; runs in a worker process"""
+    return [
+        _worker_account.sign_transaction(tx).rawTransaction
+        for tx in transactions
+    ]
+
+def _evaluate_candidate(candidate: List[Dict],
+                        state: Dict[str, float]) -> Tuple[List[Dict], BundleMetrics]:
+    """Score a bundle candidate against a state snapshot; runs in a worker process"""
+    bundle = BundleArrays.from_transactions(candidate)
+    gas_cost = float(np.dot(bundle.gases, bundle.max_fees))
+    
+    return candidate, BundleMetrics(
+        profit=float(bundle.values.sum()) - gas_cost,
+        gas_cost=gas_cost,
+        success_probability=state['historical_success'],
+        builder_reputation=state['builder_reputation'],
+        historical_success=state['historical_success']
+    )
+
+def _json_default(obj: Any) -> Any:
+    """Encode the web3 types orjson does not handle natively"""
+    if isinstance(obj, (bytes, bytearray)):
+        return Web3.to_hex(obj)
+    if hasattr(obj, 'items'):
+        # AttributeDict and other read-only mappings
+        return dict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class OrjsonFlashbotProvider(FlashbotProvider):
+    """Flashbots relay provider that encodes request bodies with orjson"""
+    
+    def encode_rpc_request(self, method, params: Any) -> bytes:
+        rpc_dict = {
+            'jsonrpc': '2.0',
+            'method': method,
+            'params': params or [],
+            'id': next(self.request_counter)
+        }
+        try:
+            return orjson.dumps(rpc_dict, default=_json_default)
+        except orjson.JSONEncodeError:
+            # orjson is limited to 64-bit integers, let web3 encode the rest
+            return super().encode_rpc_request(method, params)
+
 class FlashbotsManager:
     def __init__(self, 
                  w3: Web3,
@@ -38,112 +197,241 @@ class FlashbotsManager:
         self.w3 = w3
         self.config = config
         self.account: LocalAccount = Account.from_key(private_key)
+        self._private_key = private_key
+        
+        # Keep-alive connection pool shared by every relay request
+        self._relay_session = self._init_relay_session()
         
         # Initialize Flashbots provider
-        if not config.get('test_mode'):
-            self.flashbot = flashbot(
-                self.w3,
-                self.account,
-                config['flashbots_relay_url']
-            )
+        self.flashbot = self._init_flashbot()
         
         # ML model for bid optimization (placeholder)
         self.bid_model = self._initialize_bid_model()
         
         # Builder reputation tracking
-        self.builder_stats: Dict[str, Dict] = {}
+        self._builder_stats = BuilderStats()
+        
+        # Builder weights and success rates as parallel arrays, rebuilt from
+        # builder_stats only after it changes
+        self._builder_weights = np.zeros(0, dtype=np.float64)
+        self._builder_scores = np.zeros(0, dtype=np.float64)
+        self._builder_weight_total = 0.0
         
         # Bundle success tracking
-        self.bundle_history: List[Dict] = []
+        # Ring of recent submissions, one contiguous column per field
+        self.history_size = config.get('bundle_history_size', 1000)
+        self._hist_target_block = np.zeros(self.history_size, dtype=np.int64)
+        self._hist_success = np.zeros(self.history_size, dtype=np.bool_)
+        self._hist_head = 0
+        self._hist_len = 0
+        
+        # Successes and totals per 100-block bucket of the history ring
+        self._bucket_success: Dict[int, int] = defaultdict(int)
+        self._bucket_total: Dict[int, int] = defaultdict(int)
+        
+        # (block number, base fee) and gas usage ratio pushed from newHeads
+        self._base_fee_cache: Optional[Tuple[int, int]] = None
+        self._congestion_cache: Optional[float] = None
+        
+        # Seconds a pushed head is trusted before falling back to RPC
+        self._head_time = 0.0
+        self.head_cache_ttl = config.get('head_cache_ttl', 15.0)
+        
+        # LRU of (target block, bundle key) -> (optimized bundle, simulation)
+        self._simulation_cache: OrderedDict = OrderedDict()
+        self.simulation_cache_size = config.get('simulation_cache_size', 128)
+        
+        # Reused (1, n_features) row for bid model input
+        self._feat_buffer = np.empty((1, 6), dtype=np.float64)
         
         # Performance optimization
         self.enable_parallel_simulation = True
         self.max_parallel_sims = 4
         
+        # Worker pools for signing and candidate scoring, started on first use
+        self._signing_executor: Optional[ProcessPoolExecutor] = None
+        self._sim_pool: Optional[ProcessPoolExecutor] = None
+        
+    def __new__(cls, w3: Web3, private_key: str, config: Dict):
+        # Test mode is fixed per instance, so pick the specialized class up front
+        if cls is FlashbotsManager and config.get('test_mode'):
+            cls = FlashbotsManagerTest
+        return super().__new__(cls)
+        
+    def _init_relay_session(self) -> requests.Session:
+        """Initialize pooled HTTP session for relay requests"""
+        pool_size = self.config.get('relay_pool_size', 32)
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        return session
+        
+    async def aclose(self):
+        """Release the relay connection pool and worker processes"""
+        self._relay_session.close()
+        await asyncio.gather(*(
+            asyncio.to_thread(pool.shutdown)
+            for pool in (self._signing_executor, self._sim_pool)
+            if pool is not None
+        ))
+    
+    @property
+    def signing_executor(self) -> ProcessPoolExecutor:
+        """Signing is CPU-bound, keep it off the event loop"""
+        if self._signing_executor is None:
+            # Each worker loads the key once instead of receiving it per call
+            self._signing_executor = ProcessPoolExecutor(
+                max_workers=self.config.get('signing_workers', 2),
+                initializer=_init_signing_worker,
+                initargs=(self._private_key,)
+            )
+        return self._signing_executor
+    
+    @property
+    def sim_pool(self) -> ProcessPoolExecutor:
+        """Candidate scoring is pure CPU work, spread it across cores"""
+        if self._sim_pool is None:
+            self._sim_pool = ProcessPoolExecutor(
+                max_workers=self.config.get('simulation_workers', os.cpu_count())
+            )
+        return self._sim_pool
+        
+    def _init_flashbot(self):
+        """
+        Initialize Flashbots relay provider
+        
+        The flashbots middleware and module are synchronous, so they get their
+        own Web3 rather than joining the AsyncWeb3 used for chain reads
+        """
+        relay_w3 = Web3(Web3.HTTPProvider(
+            self.config['rpc_url'],
+            request_kwargs={'timeout': self.config.get('rpc_timeout', 5)}
+        ))
+        
+        # Same wiring as flashbot(), with the pooled session and, when
+        # available, the orjson request encoder
+        provider_class = FlashbotProvider if orjson is None else OrjsonFlashbotProvider
+        provider = provider_class(
+            self.account,
+            self.config['flashbots_relay_url'],
+            session=self._relay_session
+        )
+        relay_w3.middleware_onion.add(construct_flashbots_middleware(provider))
+        attach_modules(relay_w3, {'flashbots': (Flashbots,)})
+        return relay_w3.flashbots
+        
     def _initialize_bid_model(self):
         """Initialize ML model for bid optimization"""
         return None
 
-    def _calculate_profit_per_gas(self, bundle: List[Dict]) -> float:
+    def _calculate_profit_per_gas(self, bundle: Union[List[Dict], BundleArrays]) -> float:
         """Calculate expected profit per gas unit"""
+        if not isinstance(bundle, BundleArrays):
+            bundle = BundleArrays.from_transactions(bundle)
+        return self._profit_per_gas(bundle)
+
+    def _profit_per_gas(self, bundle: BundleArrays) -> float:
+        """Calculate expected profit per gas unit from bundle columns"""
         try:
-            # In test mode, use a simple calculation
-            if self.config.get('test_mode'):
-                total_value = sum(tx.get('value', 0) for tx in bundle)
-                total_gas = sum(tx.get('gas', 21000) for tx in bundle)
-                return (total_value * 0.001) / total_gas if total_gas > 0 else 0
-                
-            # Calculate total value transferred
-            total_value = 0
-            total_gas = 0
-            
-            for tx in bundle:
-                # Add transaction value
-                total_value += tx.get('value', 0)
-                
-                # Add gas cost
-                gas = tx.get('gas', 21000)
-                gas_price = tx.get('maxFeePerGas', tx.get('gasPrice', 0))
-                total_gas += gas
-                
-                # Subtract gas cost from profit
-                total_value -= gas * gas_price
-            
-            # Calculate profit per gas
-            return total_value / total_gas if total_gas > 0 else 0
+            return float(_score_bundle(bundle.values, bundle.gases, bundle.max_fees))
             
         except Exception as e:
             logger.error(f"Error calculating profit per gas: {e}")
             return 0
 
-    async def _optimize_bundle(self, transactions: List[Dict]) -> Optional[List[Dict]]:
+    def _rank_transactions(self, bundle: BundleArrays) -> List[Dict]:
+        """Order transactions by descending profit per gas"""
+        gases = bundle.gases
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(
+                gases > 0,
+                (bundle.values - gases * bundle.max_fees) / gases,
+                0.0
+            )
+        
+        # Stable so equally scored transactions keep their submitted order
+        order = np.argsort(-scores, kind='stable')
+        return [bundle.raw[i] for i in order]
+
+    def on_new_head(self, head: Dict):
+        """Cache the base fee from a newHeads header"""
+        self._base_fee_cache = (head['number'], head['baseFeePerGas'])
+        self._congestion_cache = head['gasUsed'] / head['gasLimit']
+        self._head_time = time.monotonic()
+        
+        # Bundles can no longer land in blocks at or before this head
+        for key in [k for k in self._simulation_cache if k[0] <= head['number']]:
+            del self._simulation_cache[key]
+
+    def _head_is_fresh(self) -> bool:
+        """Whether the last pushed head is recent enough to stand in for RPC"""
+        return time.monotonic() - self._head_time < self.head_cache_ttl
+
+    async def _get_base_fee(self) -> int:
+        """Get the latest base fee, from the head cache when it is fed"""
+        if self._base_fee_cache is not None and self._head_is_fresh():
+            return self._base_fee_cache[1]
+            
+        block = await self.w3.eth.get_block('latest')
+        return block['baseFeePerGas']
+
+    async def _get_network_congestion(self) -> float:
+        """Get gas used by the latest block as a fraction of its limit"""
+        if self._congestion_cache is not None and self._head_is_fresh():
+            return self._congestion_cache
+            
+        block = await self.w3.eth.get_block('latest')
+        return block['gasUsed'] / block['gasLimit']
+
+    async def _optimize_bundle(self,
+                               transactions: Union[List[Dict], BundleArrays]) -> Optional[List[Dict]]:
         """Optimize transaction bundle for maximum profit"""
         try:
             if not transactions:
                 return None
                 
+            # Extract columns once for both the bundle check and the ranking
+            if not isinstance(transactions, BundleArrays):
+                transactions = BundleArrays.from_transactions(transactions)
+            
             # Calculate profit per gas for the bundle
-            profit_per_gas = self._calculate_profit_per_gas(transactions)
+            profit_per_gas = self._profit_per_gas(transactions)
             
             if profit_per_gas <= 0:
                 logger.warning("Bundle not profitable")
                 return None
                 
-            # In test mode, return a simple optimized bundle
-            if self.config.get('test_mode'):
-                return transactions
-                
-            # Sort transactions by profit per gas
-            sorted_txs = sorted(
-                transactions,
-                key=lambda tx: self._calculate_profit_per_gas([tx]),
-                reverse=True
-            )
-            
-            # Optimize gas prices
-            optimized_txs = []
-            base_fee = await self.w3.eth.get_block('latest').base_fee_per_gas
-            
-            for tx in sorted_txs:
-                # Calculate optimal gas price
-                optimal_gas = max(
-                    int(base_fee * 1.2),  # 20% above base fee
-                    tx.get('maxFeePerGas', tx.get('gasPrice', 0))
-                )
-                
-                # Update transaction
-                optimized_tx = dict(tx)
-                optimized_tx['maxFeePerGas'] = optimal_gas
-                optimized_tx['maxPriorityFeePerGas'] = int(optimal_gas * 0.1)
-                
-                optimized_txs.append(optimized_tx)
-            
-            return optimized_txs
+            return await self._reprice_bundle(transactions)
             
         except Exception as e:
             logger.error(f"Bundle optimization failed: {e}")
             return None
 
+    async def _reprice_bundle(self, bundle: BundleArrays) -> List[Dict]:
+        """Order a profitable bundle and raise its gas prices over base fee"""
+        # Sort transactions by profit per gas
+        sorted_txs = self._rank_transactions(bundle)
+        
+        # Optimize gas prices
+        optimized_txs = []
+        base_fee = await self._get_base_fee()
+        
+        for tx in sorted_txs:
+            # Calculate optimal gas price
+            optimal_gas = max(
+                int(base_fee * 1.2),  # 20% above base fee
+                tx.get('maxFeePerGas', tx.get('gasPrice', 0))
+            )
+            
+            # Update transaction
+            optimized_tx = dict(tx)
+            optimized_tx['maxFeePerGas'] = optimal_gas
+            optimized_tx['maxPriorityFeePerGas'] = int(optimal_gas * 0.1)
+            
+            optimized_txs.append(optimized_tx)
+        
+        return optimized_txs
+
     async def submit_bundle(self, 
                           transactions: List[Dict],
                           target_block: int) -> Optional[str]:
@@ -151,24 +439,21 @@ class FlashbotsManager:
         Submit bundle to Flashbots with optimized bidding
         """
         try:
-            # Optimize bundle
-            optimized_bundle = await self._optimize_bundle(transactions)
+            # Optimize and simulate bundle while gathering bid features
+            (optimized_bundle, simulation), features = await asyncio.gather(
+                self._optimize_and_simulate(transactions, target_block),
+                self._gather_bid_features(transactions, target_block)
+            )
             if not optimized_bundle:
                 logger.warning("Bundle optimization failed")
                 return None
             
-            # Simulate bundle
-            simulation = await self._simulate_bundle(optimized_bundle, target_block)
             if not simulation or not simulation.success:
                 logger.warning("Bundle simulation failed")
                 return None
             
             # Calculate optimal bid
-            optimal_bid = self._calculate_optimal_bid(
-                simulation,
-                optimized_bundle,
-                target_block
-            )
+            optimal_bid = self._calculate_optimal_bid(simulation, features)
             
             # Prepare bundle with bid
             signed_bundle = await self._prepare_bundle(
@@ -177,8 +462,9 @@ class FlashbotsManager:
                 target_block
             )
             
-            # Submit to Flashbots
-            result = await self.flashbot.send_bundle(
+            # Submit to Flashbots, the relay client blocks so run it off the loop
+            result = await asyncio.to_thread(
+                self.flashbot.send_bundle,
                 signed_bundle,
                 target_block_number=target_block
             )
@@ -192,8 +478,72 @@ class FlashbotsManager:
             logger.error(f"Error submitting bundle: {e}")
             return None
     
+    async def _optimize_and_simulate(self,
+                                     transactions: List[Dict],
+                                     target_block: int) -> Tuple[Optional[List[Dict]], Optional[SimulationResult]]:
+        """
+        Optimize and simulate a bundle, reusing results for the same target block
+        """
+        key = (target_block, self._bundle_key(transactions))
+        cached = self._simulation_cache.get(key)
+        if cached is not None:
+            self._simulation_cache.move_to_end(key)
+            return cached
+        
+        # Parse transaction fields once
+        optimized_bundle = await self._optimize_bundle(
+            BundleArrays.from_transactions(transactions)
+        )
+        simulation = None
+        if optimized_bundle:
+            simulation = await self._simulate_bundle(optimized_bundle, target_block)
+        
+        # Failed optimizations and simulations may be transient, so retry them
+        if simulation is not None:
+            self._simulation_cache[key] = (optimized_bundle, simulation)
+            if len(self._simulation_cache) > self.simulation_cache_size:
+                self._simulation_cache.popitem(last=False)
+        
+        return optimized_bundle, simulation
+    
+    def _bundle_key(self, transactions: List[Dict]) -> Tuple:
+        """
+        Identify a bundle by its transaction hashes, or contents when unsigned
+        """
+        return tuple(
+            tx['hash'] if 'hash' in tx else repr(sorted(tx.items()))
+            for tx in transactions
+        )
+    
+    async def _prepare_bundle(self,
+                            bundle: List[Dict],
+                            optimal_bid: int,
+                            target_block: int) -> List[Dict]:
+        """
+        Apply bid to bundle transactions and sign them in a worker process
+        """
+        transactions = []
+        for tx in bundle:
+            tx = dict(tx)
+            tx['maxPriorityFeePerGas'] = optimal_bid
+            tx['maxFeePerGas'] = max(tx.get('maxFeePerGas', 0), optimal_bid)
+            transactions.append(tx)
+        
+        signed = await self._sign_transactions(transactions)
+        return [{'signed_transaction': raw_tx} for raw_tx in signed]
+    
+    async def _sign_transactions(self, transactions: List[Dict]) -> List[bytes]:
+        """Sign transactions in the signing worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.signing_executor,
+            _sign_transactions,
+            transactions
+        )
+    
     async def _parallel_bundle_optimization(self, 
-                                         transactions: List[Dict]) -> Optional[List[Dict]]:
+                                         transactions: List[Dict],
+                                         target_block: int) -> Optional[List[Dict]]:
         """
         Optimize bundle composition using parallel simulations
         """
@@ -203,50 +553,98 @@ class FlashbotsManager:
         # Generate bundle candidates
         candidates = self._generate_bundle_candidates(transactions)
         
-        # Simulate candidates in parallel
-        async with asyncio.Semaphore(self.max_parallel_sims) as sem:
-            tasks = []
-            for candidate in candidates:
-                task = asyncio.create_task(
-                    self._evaluate_bundle_candidate(candidate, sem)
-                )
-                tasks.append(task)
-            
-            results = await asyncio.gather(*tasks)
-            
-            # Select best bundle
-            for bundle, metrics in results:
-                if metrics and (not best_metrics or 
-                              metrics.profit > best_metrics.profit):
-                    best_bundle = bundle
-                    best_metrics = metrics
+        # Workers can't reach self.w3, so snapshot the state they score against
+        state = await self._gather_bid_features(transactions, target_block)
+        
+        # Simulate candidates in parallel, at most max_parallel_sims at a time
+        sem = asyncio.Semaphore(self.max_parallel_sims)
+        
+        async def evaluate(candidate):
+            async with sem:
+                return await self._evaluate_bundle_candidate(candidate, state)
+        
+        results = await asyncio.gather(
+            *(evaluate(candidate) for candidate in candidates),
+            return_exceptions=True
+        )
+        
+        # Select best bundle
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Bundle candidate evaluation failed: {result}")
+                continue
+                
+            bundle, metrics = result
+            if metrics and (not best_metrics or 
+                          metrics.profit > best_metrics.profit):
+                best_bundle = bundle
+                best_metrics = metrics
         
         return best_bundle
     
+    def _generate_bundle_candidates(self, transactions: List[Dict]) -> List[List[Dict]]:
+        """
+        Build candidates from the most profitable transactions first
+        """
+        ranked = self._rank_transactions(BundleArrays.from_transactions(transactions))
+        return [ranked[:size] for size in range(1, len(ranked) + 1)]
+    
+    async def _evaluate_bundle_candidate(self,
+                                         candidate: List[Dict],
+                                         state: Dict[str, float]) -> Tuple[List[Dict], BundleMetrics]:
+        """
+        Score a bundle candidate in the simulation worker pool
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.sim_pool,
+            _evaluate_candidate,
+            candidate,
+            state
+        )
+    
+    async def _gather_bid_features(self,
+                                 bundle: List[Dict],
+                                 target_block: int) -> Dict[str, float]:
+        """
+        Gather bid features that do not depend on the simulation
+        """
+        base_fee, congestion = await asyncio.gather(
+            self._get_base_fee(),
+            self._get_network_congestion()
+        )
+        
+        return {
+            'base_fee': base_fee,
+            'congestion': congestion,
+            'bundle_value': self._calculate_bundle_value(bundle),
+            'historical_success': self._get_historical_success_rate(target_block),
+            'builder_reputation': self._get_builder_reputation_score()
+        }
+    
     def _calculate_optimal_bid(self,
                              simulation: SimulationResult,
-                             bundle: List[Dict],
-                             target_block: int) -> int:
+                             bid_features: Dict[str, float]) -> int:
         """
         Calculate optimal bid price using ML model
         """
         try:
-            # Features for bid calculation
-            features = np.array([
-                simulation.total_gas_used,
-                self._get_current_base_fee(),
-                self._get_network_congestion(),
-                self._calculate_bundle_value(bundle),
-                self._get_historical_success_rate(target_block),
-                self._get_builder_reputation_score()
-            ])
+            # Features for bid calculation, filled in place (no await
+            # between filling and reading, so concurrent bids can't interleave)
+            features = self._feat_buffer
+            features[0, 0] = simulation.total_gas_used
+            features[0, 1] = bid_features['base_fee']
+            features[0, 2] = bid_features['congestion']
+            features[0, 3] = bid_features['bundle_value']
+            features[0, 4] = bid_features['historical_success']
+            features[0, 5] = bid_features['builder_reputation']
             
             if self.bid_model:
                 # Use ML model for prediction
-                optimal_bid = self.bid_model.predict(features.reshape(1, -1))[0]
+                optimal_bid = self.bid_model.predict(features)[0]
             else:
                 # Fallback to heuristic calculation
-                optimal_bid = self._calculate_heuristic_bid(features)
+                optimal_bid = self._calculate_heuristic_bid(features[0])
             
             return int(optimal_bid)
             
@@ -254,15 +652,31 @@ class FlashbotsManager:
             logger.error(f"Error calculating optimal bid: {e}")
             return self._get_default_bid()
     
+    def _get_default_bid(self) -> int:
+        """
+        Bid used when the optimal bid cannot be calculated
+        """
+        return self.config.get('default_bid', 2000000000)  # 2 GWEI
+    
+    def _calculate_bundle_value(self, bundle: List[Dict]) -> float:
+        """
+        Total value transferred by the bundle
+        """
+        return float(sum(tx.get('value', 0) for tx in bundle))
+    
     async def _simulate_bundle(self,
-                             bundle: List[Dict],
+                             bundle: Union[List[Dict], BundleArrays],
                              target_block: int) -> Optional[SimulationResult]:
         """
         Simulate bundle execution
         """
         try:
+            if isinstance(bundle, BundleArrays):
+                bundle = bundle.raw
+                
             state_block_tag = target_block - 1
-            result = await self.flashbot.simulate(
+            result = await asyncio.to_thread(
+                self.flashbot.simulate,
                 bundle,
                 block_tag=state_block_tag
             )
@@ -280,59 +694,94 @@ class FlashbotsManager:
         """
         Track bundle submission for analysis
         """
-        submission_data = {
-            'timestamp': time.time(),
-            'target_block': target_block,
-            'bundle_hash': result.bundle_hash,
-            'simulation_success': result.simulation_success,
-            'simulation_error': result.simulation_error,
-            'bundle_size': len(bundle)
-        }
+        success = bool(result.simulation_success)
+        if not success:
+            logger.debug(
+                f"Bundle {result.bundle_hash} for block {target_block} "
+                f"failed simulation: {result.simulation_error}"
+            )
         
-        self.bundle_history.append(submission_data)
+        head = self._hist_head
         
-        # Cleanup old history
-        if len(self.bundle_history) > 1000:
-            self.bundle_history = self.bundle_history[-1000:]
+        # Drop the slot being overwritten from its bucket
+        if self._hist_len == self.history_size:
+            evicted_success = bool(self._hist_success[head])
+            key = int(self._hist_target_block[head]) // 100
+            self._bucket_success[key] -= evicted_success
+            self._bucket_total[key] -= 1
+            if not self._bucket_total[key]:
+                del self._bucket_success[key]
+                del self._bucket_total[key]
+        else:
+            self._hist_len += 1
+        
+        self._hist_target_block[head] = target_block
+        self._hist_success[head] = success
+        self._hist_head = (head + 1) % self.history_size
+        
+        key = target_block // 100
+        self._bucket_success[key] += success
+        self._bucket_total[key] += 1
+    
+    @property
+    def builder_stats(self) -> BuilderStats:
+        """
+        Stats by builder; replace an entry rather than mutating it in place
+        """
+        return self._builder_stats
+    
+    @builder_stats.setter
+    def builder_stats(self, stats: Dict[str, Dict]):
+        self._builder_stats = BuilderStats(stats)
+    
+    def update_builder_stats(self, builder: str, stats: Dict):
+        """
+        Record builder stats
+        """
+        self._builder_stats[builder] = stats
+    
+    def _refresh_builder_arrays(self):
+        """
+        Rebuild the reputation arrays from builder_stats
+        """
+        stats = self._builder_stats
+        count = len(stats)
+        self._builder_weights = np.fromiter(
+            (s.get('blocks_built', 0) for s in stats.values()), dtype=np.float64, count=count
+        )
+        self._builder_scores = np.fromiter(
+            (s.get('success_rate', 0.5) for s in stats.values()), dtype=np.float64, count=count
+        )
+        self._builder_weight_total = float(self._builder_weights.sum())
+        stats.dirty = False
     
     def _get_builder_reputation_score(self) -> float:
         """
         Calculate builder reputation score
         """
-        if not self.builder_stats:
-            return 0.5
+        if self._builder_stats.dirty:
+            self._refresh_builder_arrays()
         
-        # Calculate weighted average of builder success rates
-        total_weight = 0
-        weighted_score = 0
-        
-        for builder, stats in self.builder_stats.items():
-            weight = stats.get('blocks_built', 0)
-            score = stats.get('success_rate', 0.5)
-            
-            weighted_score += weight * score
-            total_weight += weight
+        if self._builder_weight_total <= 0:
+            return 0.5
         
-        return weighted_score / total_weight if total_weight > 0 else 0.5
+        # Weighted average of builder success rates
+        return float(
+            np.dot(self._builder_weights, self._builder_scores) / self._builder_weight_total
+        )
     
     def _get_historical_success_rate(self, target_block: int) -> float:
         """
         Get historical success rate for similar blocks
         """
-        if not self.bundle_history:
-            return 0.5
-        
-        # Calculate success rate for recent submissions
-        recent_submissions = [
-            b for b in self.bundle_history
-            if abs(b['target_block'] - target_block) < 100
-        ]
-        
-        if not recent_submissions:
+        # Submissions in this and the neighbouring 100-block buckets
+        bucket = target_block // 100
+        neighbours = (bucket - 1, bucket, bucket + 1)
+        total = sum(self._bucket_total.get(b, 0) for b in neighbours)
+        if not total:
             return 0.5
         
-        success_count = sum(1 for b in recent_submissions if b['simulation_success'])
-        return success_count / len(recent_submissions)
+        return sum(self._bucket_success.get(b, 0) for b in neighbours) / total
     
     def _calculate_heuristic_bid(self, features: np.ndarray) -> int:
         """
@@ -342,7 +791,34 @@ class FlashbotsManager:
         congestion = features[2]
         bundle_value = features[3]
         
-        # Basic heuristic: bid more during congestion and for valuable bundles
-        bid = base_fee * (1 + congestion) * (1 + bundle_value / 1e18)
-        
-        return int(bid)
+        return int(_heuristic_bid(base_fee, congestion, bundle_value))
+
+
+class FlashbotsManagerTest(FlashbotsManager):
+    """FlashbotsManager specialized for test mode, without relay access"""
+    
+    def _init_flashbot(self):
+        """No relay in test mode"""
+        return None
+    
+    async def _sign_transactions(self, transactions: List[Dict]) -> List[bytes]:
+        """Sign in-process, test mode starts no worker pools"""
+        return [
+            self.account.sign_transaction(tx).rawTransaction
+            for tx in transactions
+        ]
+    
+    async def _evaluate_bundle_candidate(self,
+                                         candidate: List[Dict],
+                                         state: Dict[str, float]) -> Tuple[List[Dict], BundleMetrics]:
+        """Score in-process, test mode starts no worker pools"""
+        return _evaluate_candidate(candidate, state)
+    
+    def _profit_per_gas(self, bundle: BundleArrays) -> float:
+        """Simple profit estimate for test mode"""
+        total_gas = bundle.gases.sum()
+        return float(bundle.values.sum() * 0.001 / total_gas) if total_gas > 0 else 0
+    
+    async def _reprice_bundle(self, bundle: BundleArrays) -> List[Dict]:
+        """Return the bundle unchanged in test mode"""
+        return bundle.raw
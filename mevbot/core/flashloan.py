@@ -1,15 +1,18 @@
 """Flash loan management and optimization"""
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from web3 import Web3
+from web3._utils.abi import get_abi_output_types
 from eth_typing import Address
 import asyncio
 import logging
 from dataclasses import dataclass
 import numpy as np
 
+from .flash_loan import MULTICALL3_ABI, MULTICALL3_ADDRESS
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class FlashLoanProvider:
     """Flash loan provider"""
     name: str
@@ -18,7 +21,7 @@ class FlashLoanProvider:
     current_liquidity: int
     fee_percentage: float = 0.003  # Default 0.3% fee
 
-@dataclass
+@dataclass(slots=True)
 class FlashLoanParams:
     token: Address
     amount: int
@@ -33,46 +36,92 @@ class FlashLoanManager:
         self.w3 = w3
         self.config = config
         
-        # Initialize providers with test values if in test mode
-        self.providers = {}
-        if config.get('test_mode'):
-            self.providers = {
-                'balancer': FlashLoanProvider(
-                    name='Balancer',
-                    address=Address('0x' + '1' * 40),
-                    max_loan_amount=int(1e20),  # 100 ETH
-                    current_liquidity=int(1e20),
-                    fee_percentage=0.0001
-                ),
-                'aave': FlashLoanProvider(
-                    name='Aave',
-                    address=Address('0x' + '2' * 40),
-                    max_loan_amount=int(1e20),
-                    current_liquidity=int(1e20),
-                    fee_percentage=0.0009
-                )
-            }
-        else:
-            self.providers = {
-                'aave': FlashLoanProvider(
-                    name='Aave',
-                    address=config['aave_lending_pool'],
-                    max_loan_amount=0,
-                    current_liquidity=0,
-                    fee_percentage=0.0009
-                ),
-                'balancer': FlashLoanProvider(
-                    name='Balancer',
-                    address=config['balancer_vault'],
-                    max_loan_amount=0,
-                    current_liquidity=0,
-                    fee_percentage=0.0001
-                )
-            }
+        # Initialize providers, which also builds the fee and liquidity arrays
+        self.providers = self._init_providers()
+        
+        # Provider contracts, bound once so the ABI isn't re-parsed every poll
+        self._contracts = self._init_contracts()
+        
+        # Per-provider status call and result handlers, keyed by provider name
+        self._status_handlers = {
+            'Balancer': (self._balancer_status_call, self._apply_balancer_status),
+            'Aave': (self._aave_status_call, self._apply_aave_status)
+        }
+        self._update_handlers = {
+            'Balancer': self._update_balancer_status,
+            'Aave': self._update_aave_status
+        }
+        
+        # Multicall3 batches provider status reads into one RPC
+        self.multicall = self._init_multicall()
         
         # Initialize monitoring
         self.monitoring_task = None
     
+    def __new__(cls, w3: Web3, config: Dict):
+        # Test mode is fixed per instance, so pick the specialized class up front
+        if cls is FlashLoanManager and config.get('test_mode'):
+            cls = FlashLoanManagerTest
+        return super().__new__(cls)
+    
+    @property
+    def providers(self) -> Dict[str, FlashLoanProvider]:
+        """
+        Providers by name; assign a new mapping rather than adding entries in
+        place so the fee and liquidity arrays are rebuilt
+        """
+        return self._providers
+    
+    @providers.setter
+    def providers(self, providers: Dict[str, FlashLoanProvider]):
+        self._providers = providers
+        self._refresh_provider_arrays()
+    
+    def _init_providers(self) -> Dict[str, FlashLoanProvider]:
+        """Initialize providers, liquidity is filled in by monitoring"""
+        return {
+            'aave': FlashLoanProvider(
+                name='Aave',
+                address=self.config['aave_lending_pool'],
+                max_loan_amount=0,
+                current_liquidity=0,
+                fee_percentage=0.0009
+            ),
+            'balancer': FlashLoanProvider(
+                name='Balancer',
+                address=self.config['balancer_vault'],
+                max_loan_amount=0,
+                current_liquidity=0,
+                fee_percentage=0.0001
+            )
+        }
+    
+    def _init_contracts(self) -> Dict[str, Any]:
+        """Initialize provider contracts, keyed by lowercase provider name"""
+        abi_keys = {'aave': 'aave_pool_abi', 'balancer': 'balancer_vault_abi'}
+        contracts = {}
+        for name, provider in self.providers.items():
+            abi = self.config.get(abi_keys.get(name, ''))
+            if abi is None:
+                logger.error(f"Error initializing {provider.name} contract: no ABI configured")
+                continue
+            try:
+                contracts[name] = self.w3.eth.contract(address=provider.address, abi=abi)
+            except Exception as e:
+                logger.error(f"Error initializing {provider.name} contract: {e}")
+        return contracts
+    
+    def _init_multicall(self):
+        """Initialize Multicall3 contract"""
+        try:
+            return self.w3.eth.contract(
+                address=self.config.get('multicall_address', MULTICALL3_ADDRESS),
+                abi=MULTICALL3_ABI
+            )
+        except Exception as e:
+            logger.error(f"Error initializing Multicall3: {e}")
+            return None
+    
     async def start_monitoring(self):
         """Start monitoring flash loan providers"""
         if self.monitoring_task:
@@ -95,61 +144,154 @@ class FlashLoanManager:
         """
         while True:
             try:
-                update_tasks = []
-                for provider in self.providers.values():
-                    update_tasks.append(self._update_provider_status(provider))
-                
-                await asyncio.gather(*update_tasks)
+                if self.multicall:
+                    try:
+                        await self._multicall_provider_status()
+                    except Exception as e:
+                        logger.error(f"Multicall provider update failed, falling back: {e}")
+                        await self._update_all_providers()
+                else:
+                    await self._update_all_providers()
+                    
                 await asyncio.sleep(self.config.get('provider_update_interval', 10))
                 
             except Exception as e:
                 logger.error(f"Error monitoring providers: {e}")
                 await asyncio.sleep(1)
     
+    def _refresh_provider_arrays(self):
+        """
+        Snapshot provider fees and liquidity into parallel arrays, called
+        whenever providers are assigned or provider status is applied. Liquidity is held as Python ints
+        so wei amounts stay exact.
+        """
+        self._provider_list = list(self.providers.values())
+        self._provider_fees = np.array(
+            [p.fee_percentage for p in self._provider_list], dtype=np.float64
+        )
+        self._provider_liquidity = np.array(
+            [p.current_liquidity for p in self._provider_list], dtype=object
+        )
+    
+    async def _update_all_providers(self):
+        """
+        Update each provider with its own RPC call
+        """
+        await asyncio.gather(*[
+            self._update_provider_status(provider)
+            for provider in self.providers.values()
+        ])
+    
+    async def _multicall_provider_status(self):
+        """
+        Update all providers from a single Multicall3 round-trip
+        """
+        pending = []
+        calls = []
+        for provider in self.providers.values():
+            status_call = self._status_call(provider)
+            if not status_call:
+                continue
+                
+            contract, fn_name, args = status_call
+            pending.append((provider, contract, fn_name))
+            calls.append((
+                contract.address,
+                contract.encodeABI(fn_name=fn_name, args=args)
+            ))
+            
+        if not calls:
+            return
+            
+        _, _, results = await self.multicall.functions.tryBlockAndAggregate(
+            False, calls
+        ).call()
+        
+        for (provider, contract, fn_name), (success, data) in zip(pending, results):
+            if not success:
+                logger.error(f"Error updating {provider.name} status: call reverted")
+                continue
+                
+            try:
+                fn_abi = contract.get_function_by_name(fn_name).abi
+                decoded = self.w3.codec.decode(get_abi_output_types(fn_abi), data)
+                self._apply_status(
+                    provider,
+                    decoded[0] if len(decoded) == 1 else decoded
+                )
+            except Exception as e:
+                logger.error(f"Error updating {provider.name} status: {e}")
+    
+    def _status_call(self, provider: FlashLoanProvider) -> Optional[Tuple[Any, str, List]]:
+        """
+        Contract, view function and arguments that report provider liquidity
+        """
+        handlers = self._status_handlers.get(provider.name)
+        if not handlers or provider.name.lower() not in self._contracts:
+            return None
+        return handlers[0](provider)
+    
+    def _balancer_status_call(self, provider: FlashLoanProvider) -> Tuple[Any, str, List]:
+        """Balancer vault pool tokens"""
+        vault = self._contracts[provider.name.lower()]
+        return vault, 'getPoolTokens', [self.config['balancer_pool_id']]
+    
+    def _aave_status_call(self, provider: FlashLoanProvider) -> Tuple[Any, str, List]:
+        """Aave pool reserve data"""
+        pool = self._contracts[provider.name.lower()]
+        return pool, 'getReserveData', [self.config['weth_address']]
+    
+    def _apply_status(self, provider: FlashLoanProvider, result: Any):
+        """
+        Update provider liquidity from its status call result
+        """
+        handlers = self._status_handlers.get(provider.name)
+        if handlers:
+            handlers[1](provider, result)
+        self._refresh_provider_arrays()
+            
+        # Log status
+        logger.info(
+            f"Provider {provider.name} status: "
+            f"liquidity={provider.current_liquidity / 1e18:.2f} ETH, "
+            f"max_loan={provider.max_loan_amount / 1e18:.2f} ETH"
+        )
+    
+    def _apply_balancer_status(self, provider: FlashLoanProvider, result: Any):
+        """Pool tokens and balances"""
+        tokens, balances, _ = result
+        provider.current_liquidity = sum(balances)
+        provider.max_loan_amount = provider.current_liquidity * 9 // 10  # 90% of liquidity
+    
+    def _apply_aave_status(self, provider: FlashLoanProvider, result: Any):
+        """Reserve data, available liquidity first"""
+        provider.current_liquidity = result[0]
+        provider.max_loan_amount = provider.current_liquidity * 3 // 4
+    
     async def _update_provider_status(self, provider: FlashLoanProvider):
         """
         Update provider liquidity and parameters
         """
-        if self.config.get('test_mode'):
+        handler = self._update_handlers.get(provider.name)
+        if not handler:
             return
-
+            
         try:
-            if provider.name == 'Balancer':
-                # Get Balancer vault contract
-                vault = self.w3.eth.contract(
-                    address=provider.address,
-                    abi=self.config['balancer_vault_abi']
-                )
-                
-                # Get pool tokens and balances
-                pool_id = self.config['balancer_pool_id']
-                tokens, balances, _ = await vault.functions.getPoolTokens(pool_id).call()
-                
-                # Update provider status
-                provider.current_liquidity = sum(balances)
-                provider.max_loan_amount = provider.current_liquidity * 0.9  # 90% of liquidity
-                
-            elif provider.name == 'Aave':
-                # Existing Aave implementation
-                pool = self.w3.eth.contract(
-                    address=provider.address,
-                    abi=self.config['aave_pool_abi']
-                )
-                reserve_data = await pool.functions.getReserveData(
-                    self.config['weth_address']
-                ).call()
-                provider.current_liquidity = reserve_data[0]
-                provider.max_loan_amount = provider.current_liquidity * 0.75
-                
-            # Log status
-            logger.info(
-                f"Provider {provider.name} status: "
-                f"liquidity={provider.current_liquidity / 1e18:.2f} ETH, "
-                f"max_loan={provider.max_loan_amount / 1e18:.2f} ETH"
-            )
-                
+            await handler(provider)
         except Exception as e:
             logger.error(f"Error updating {provider.name} status: {e}")
+    
+    async def _call_status(self, provider: FlashLoanProvider):
+        """
+        Read provider status with a direct RPC call and apply it
+        """
+        status_call = self._status_call(provider)
+        if not status_call:
+            return
+            
+        contract, fn_name, args = status_call
+        result = await getattr(contract.functions, fn_name)(*args).call()
+        self._apply_status(provider, result)
 
     async def prepare_loan(
         self,
@@ -158,15 +300,6 @@ class FlashLoanManager:
         route: List[Address]
     ) -> Optional[FlashLoanParams]:
         """Prepare optimal flash loan parameters"""
-        if self.config.get('test_mode'):
-            return FlashLoanParams(
-                token=token,
-                amount=amount,
-                provider=list(self.providers.values())[0],
-                route=route,
-                expected_profit=0.1
-            )
-            
         try:
             # Get available providers
             available_providers = [
@@ -217,34 +350,45 @@ class FlashLoanManager:
         route: List[Address]
     ) -> Optional[FlashLoanParams]:
         """Optimize flash loan parameters"""
-        best_params = None
-        max_profit = 0
-        
-        for provider in self.providers.values():
-            if provider.current_liquidity < min_amount:
-                continue
-                
-            # Calculate optimal amount
-            amount = min(max_amount, provider.current_liquidity)
-            fee = amount * provider.fee_percentage
+        eligible = self._provider_liquidity >= min_amount
+        if not eligible.any():
+            return None
             
-            # Simulate profit (in test mode, use a simple calculation)
-            if self.config.get('test_mode'):
-                profit = amount * 0.002 - fee  # 0.2% profit before fees
-            else:
-                profit = await self._simulate_arbitrage_profit(amount, route)
-                
-            if profit > max_profit:
-                max_profit = profit
-                best_params = FlashLoanParams(
-                    token=token,
-                    amount=amount,
-                    provider=provider,
-                    route=route,
-                    expected_profit=profit
-                )
+        # Optimal amount per provider, exact wei from the same snapshot
+        amounts = np.minimum(max_amount, self._provider_liquidity)
         
-        return best_params
+        # Simulate profit
+        profits = await self._provider_profits(amounts, eligible, max_amount, route)
+        profits = np.where(eligible, np.asarray(profits, dtype=np.float64), -np.inf)
+        best = int(np.argmax(profits))
+        if profits[best] <= 0:
+            return None
+            
+        provider = self._provider_list[best]
+        return FlashLoanParams(
+            token=token,
+            amount=int(amounts[best]),
+            provider=provider,
+            route=route,
+            expected_profit=float(profits[best])
+        )
+    
+    async def _provider_profits(
+        self,
+        amounts: np.ndarray,
+        eligible: np.ndarray,
+        max_amount: int,
+        route: List[Address]
+    ) -> np.ndarray:
+        """Simulate arbitrage profit for each eligible provider"""
+        profits = np.zeros(len(amounts), dtype=np.float64)
+        indices = np.flatnonzero(eligible)
+        simulated = await asyncio.gather(*[
+            self._simulate_arbitrage_profit(int(amounts[i]), route)
+            for i in indices
+        ])
+        profits[indices] = simulated
+        return profits
     
     async def execute_flash_loan(self, params: FlashLoanParams) -> Optional[str]:
         """
@@ -350,9 +494,7 @@ class FlashLoanManager:
         """
         Update Aave provider status
         """
-        # Implement Aave status update
-        # This is a placeholder
-        pass
+        await self._call_status(provider)
 
     async def _update_dydx_status(self, provider: FlashLoanProvider):
         """
@@ -366,9 +508,7 @@ class FlashLoanManager:
         """
         Update Balancer provider status
         """
-        # Implement Balancer status update
-        # This is a placeholder
-        pass
+        await self._call_status(provider)
 
     def _create_borrow_tx(self, token: Address, amount: int, provider: FlashLoanProvider) -> Dict:
         """
@@ -415,3 +555,63 @@ class FlashLoanManager:
         # Implement profit estimation
         # This is a placeholder
         return 0.0
+
+
+class FlashLoanManagerTest(FlashLoanManager):
+    """FlashLoanManager specialized for test mode, with fixed providers"""
+    
+    def _init_providers(self) -> Dict[str, FlashLoanProvider]:
+        """Test providers with ample liquidity"""
+        return {
+            'balancer': FlashLoanProvider(
+                name='Balancer',
+                address=Address('0x' + '1' * 40),
+                max_loan_amount=int(1e20),  # 100 ETH
+                current_liquidity=int(1e20),
+                fee_percentage=0.0001
+            ),
+            'aave': FlashLoanProvider(
+                name='Aave',
+                address=Address('0x' + '2' * 40),
+                max_loan_amount=int(1e20),
+                current_liquidity=int(1e20),
+                fee_percentage=0.0009
+            )
+        }
+    
+    def _init_contracts(self) -> Dict[str, Any]:
+        """No provider contracts in test mode"""
+        return {}
+    
+    def _init_multicall(self):
+        """No multicall in test mode"""
+        return None
+    
+    async def _update_provider_status(self, provider: FlashLoanProvider):
+        """Test providers are static"""
+        return
+    
+    async def prepare_loan(
+        self,
+        amount: int,
+        token: Address,
+        route: List[Address]
+    ) -> Optional[FlashLoanParams]:
+        """Prepare loan from the first test provider"""
+        return FlashLoanParams(
+            token=token,
+            amount=amount,
+            provider=list(self.providers.values())[0],
+            route=route,
+            expected_profit=0.1
+        )
+    
+    async def _provider_profits(
+        self,
+        amounts: np.ndarray,
+        eligible: np.ndarray,
+        max_amount: int,
+        route: List[Address]
+    ) -> np.ndarray:
+        """Fixed 0.2% profit before fees"""
+        return amounts * 0.002 - amounts * self._provider_fees
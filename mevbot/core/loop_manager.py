@@ -1,11 +1,18 @@
 """Main loop manager for MEV bot."""
 import os
 import time
+import heapq
 import asyncio
+import ctypes
+import ctypes.util
 import logging
-from typing import Dict, List, Optional, Set, Any
-from web3 import Web3
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable
+from web3 import AsyncWeb3, Web3, WebsocketProviderV2
+from web3._utils.method_formatters import receipt_formatter
+from web3.exceptions import TransactionNotFound
+from web3.types import RPCEndpoint
 from eth_typing import HexStr
+from eth_utils import keccak
 
 from mevbot.core.safety.coordinator import SafetyCoordinator, EmergencyLevel
 from mevbot.core.strategy_base import BaseStrategy
@@ -29,13 +36,24 @@ class LoopManager:
         self.config = config
         self.web3 = web3
         self.running = False
-        self.strategies: Dict[str, BaseStrategy] = {}
+        
+        # Strategies in parallel lists, the id -> index map is only for lookup/removal
+        self._strategy_list: List[BaseStrategy] = []
+        self._strategy_ids: List[str] = []
+        self._strategy_index: Dict[str, int] = {}
+        
+        # Readiness bitmap: bit i set means _strategy_list[i] is armed to run.
+        # Strategies flip their bit on start/stop instead of being polled per pass.
+        self._ready_mask = 0
         
         # Initialize safety system
         self.safety = SafetyCoordinator(config.get('safety', {}), web3)
         
-        # Track active transactions
-        self.pending_transactions: Set[str] = set()
+        # Signing account, unwrapped once on start instead of per transaction
+        self._signing_account = None
+        
+        # Track active transactions, hash -> monotonic submit time
+        self.pending_transactions: Dict[str, float] = {}
         self.tx_receipts: Dict[str, Dict] = {}
         
         # Performance tracking
@@ -43,10 +61,44 @@ class LoopManager:
         self.total_executions = 0
         self.successful_executions = 0
         
+        # (checked at, network ok, resources ok), shared by all strategies in a pass
+        self._gate_cache = (float('-inf'), False, False)
+        self.gate_cache_ttl = config.get('gate_cache_ttl', 0.25)
+        
+        # (sampled at, health dict), psutil is sampled at most once per TTL
+        self._health_cache: Tuple[float, Dict] = (float('-inf'), {})
+        self.health_cache_ttl = config.get('health_cache_ttl', 1.0)
+        
+        # Set on new blocks and strategy opportunities to wake the main loop early;
+        # otherwise it keeps the polling cadence of max_idle_interval
+        self._tick = asyncio.Event()
+        self.max_idle_interval = config.get('max_idle_interval', 0.1)
+        
+        # Caps strategies executing at once, sized to the RPC provider's concurrency
+        self._exec_sem = asyncio.Semaphore(config.get('max_parallel_strategies', 8))
+        
+        # Monitor tasks supervised by start()'s task group, cancelled on stop
+        self._monitor_tasks: List[asyncio.Task] = []
+        
+        # Receipt polling, about half a block; backs off while nothing lands
+        self.receipt_poll_latency = config.get('receipt_poll_latency', 6.0)
+        self.receipt_poll_max_latency = config.get('receipt_poll_max_latency', 12.0)
+        self.receipt_timeout = config.get('receipt_timeout', 120)
+        self._receipt_poll_delay = self.receipt_poll_latency
+        
+        # True while a newHeads subscription is driving receipt checks
+        self._heads_active = False
+        
+        # Cleared once the provider reports eth_sendRawTransactionSync as unsupported
+        self._send_raw_sync_supported = True
+        
         # Monitoring
-        self.last_health_check = time.time()
         self.health_check_interval = config.get('health_check_interval', 60)
         
+        # Periodic monitors share one scheduler: min-heap of (due, name, job),
+        # each job returning the delay until it should run again
+        self._timers: List[Tuple[float, str, Callable[[], Awaitable[float]]]] = []
+        
     async def start(self) -> None:
         """Start the main execution loop."""
         if self.running:
@@ -61,16 +113,25 @@ class LoopManager:
             # Start safety system
             await self.safety.start()
             
+            # Unwrap the signing key before the first transaction needs it
+            try:
+                await self._load_signing_account()
+            except Exception as e:
+                logger.warning(f"Signing key not loaded, retrying on first transaction: {str(e)}")
+            
             # Start strategies
-            for strategy in self.strategies.values():
+            for strategy in self._strategy_list:
                 await strategy.start()
             
-            # Start monitoring tasks
-            asyncio.create_task(self._monitor_transactions())
-            asyncio.create_task(self._monitor_health())
-            
-            # Start main loop
-            await self._run_loop()
+            # Monitors and the main loop run under one task group, so a
+            # crash in any of them surfaces here instead of being dropped
+            async with asyncio.TaskGroup() as tg:
+                self._monitor_tasks = [tg.create_task(self._run_scheduler())]
+                if self.config.get('ws_url'):
+                    self._monitor_tasks.append(
+                        tg.create_task(self._monitor_transactions())
+                    )
+                tg.create_task(self._run_loop())
             
         except Exception as e:
             logger.error(f"Error starting loop manager: {str(e)}")
@@ -88,15 +149,24 @@ class LoopManager:
         
         logger.info("Stopping loop manager")
         self.running = False
+        self.wake()
+        
+        # Don't wait out the monitors' sleeps
+        for task in self._monitor_tasks:
+            task.cancel()
+        self._monitor_tasks = []
         
         try:
             # Stop all strategies
-            for strategy in self.strategies.values():
+            for strategy in self._strategy_list:
                 await strategy.stop()
             
             # Stop safety system
             await self.safety.stop()
             
+            # Drop the unwrapped signing key
+            self._signing_account = None
+            
             # Log performance metrics
             self._log_performance_metrics()
             
@@ -106,41 +176,100 @@ class LoopManager:
     async def add_strategy(self, strategy: BaseStrategy) -> None:
         """Add a new strategy to the loop manager."""
         strategy_id = strategy.get_id()
-        if strategy_id in self.strategies:
+        if strategy_id in self._strategy_index:
             raise ValueError(f"Strategy {strategy_id} already exists")
         
-        self.strategies[strategy_id] = strategy
+        self._strategy_index[strategy_id] = len(self._strategy_list)
+        self._strategy_list.append(strategy)
+        self._strategy_ids.append(strategy_id)
+        self.mark_ready(strategy_id)
+        
+        strategy.bind_wakeup(self.wake)
+        strategy.bind_readiness(self.mark_ready, self.mark_not_ready)
         if self.running:
             await strategy.start()
         logger.info(f"Added strategy: {strategy_id}")
     
     async def remove_strategy(self, strategy_id: str) -> None:
         """Remove a strategy from the loop manager."""
-        if strategy_id not in self.strategies:
+        if strategy_id not in self._strategy_index:
             raise ValueError(f"Strategy {strategy_id} not found")
         
-        strategy = self.strategies[strategy_id]
+        strategy = self._strategy_list[self._strategy_index[strategy_id]]
         await strategy.stop()
-        del self.strategies[strategy_id]
+        self._remove_strategy_slot(strategy_id)
         logger.info(f"Removed strategy: {strategy_id}")
     
+    def _remove_strategy_slot(self, strategy_id: str) -> None:
+        """Free a strategy's slot and bit, moving the last strategy into them."""
+        index = self._strategy_index.pop(strategy_id)
+        last = len(self._strategy_list) - 1
+        last_strategy = self._strategy_list.pop()
+        last_id = self._strategy_ids.pop()
+        last_ready = (self._ready_mask >> last) & 1
+        self._ready_mask &= ~((1 << index) | (1 << last))
+        
+        if index != last:
+            self._strategy_list[index] = last_strategy
+            self._strategy_ids[index] = last_id
+            self._strategy_index[last_id] = index
+            self._ready_mask |= last_ready << index
+    
+    @property
+    def strategies(self) -> Dict[str, BaseStrategy]:
+        """Strategies by id, built on demand for the cold paths that need a mapping."""
+        return dict(zip(self._strategy_ids, self._strategy_list))
+    
+    def mark_ready(self, strategy_id: str) -> None:
+        """Arm a strategy for execution on the next loop pass."""
+        bit = self._strategy_index.get(strategy_id)
+        if bit is not None:
+            self._ready_mask |= 1 << bit
+            self.wake()
+    
+    def mark_not_ready(self, strategy_id: str) -> None:
+        """Disarm a strategy so loop passes skip it entirely."""
+        bit = self._strategy_index.get(strategy_id)
+        if bit is not None:
+            self._ready_mask &= ~(1 << bit)
+    
+    def _ready_strategies(self) -> List[BaseStrategy]:
+        """Strategies whose readiness bit is set, lowest bit first."""
+        ready = []
+        mask = self._ready_mask
+        while mask:
+            low = mask & -mask
+            ready.append(self._strategy_list[low.bit_length() - 1])
+            mask ^= low
+        return ready
+    
     async def _run_loop(self) -> None:
         """Run the main execution loop."""
         while self.running:
             try:
+                # This pass serves every wakeup so far, later ones trigger another
+                self._tick.clear()
+                
+                # Refresh the gate cache once per pass, strategies only read it
+                await self._gates()
+                
                 # Execute strategies in parallel
                 strategy_tasks = []
-                for strategy in self.strategies.values():
-                    if await self._should_execute_strategy(strategy):
+                for strategy in self._ready_strategies():
+                    if self._should_execute_strategy(strategy):
                         strategy_tasks.append(
-                            self._execute_strategy_safely(strategy)
+                            self._execute_strategy_bounded(strategy)
                         )
                 
                 if strategy_tasks:
                     await asyncio.gather(*strategy_tasks, return_exceptions=True)
                 
-                # Brief pause between iterations
-                await asyncio.sleep(0.1)
+                # Sleep until there is new work, re-checking at least every max_idle_interval
+                try:
+                    async with asyncio.timeout(self.max_idle_interval):
+                        await self._tick.wait()
+                except TimeoutError:
+                    pass
                 
             except Exception as e:
                 logger.error(f"Error in main loop: {str(e)}")
@@ -151,22 +280,46 @@ class LoopManager:
                 )
                 await asyncio.sleep(1)
     
-    async def _should_execute_strategy(self, strategy: BaseStrategy) -> bool:
-        """Check if a strategy should be executed."""
+    async def _execute_strategy_bounded(self, strategy: BaseStrategy) -> None:
+        """Execute a strategy once a concurrency slot is free."""
+        async with self._exec_sem:
+            await self._execute_strategy_safely(strategy)
+    
+    def wake(self) -> None:
+        """Wake the main loop for another pass over the strategies."""
+        self._tick.set()
+    
+    async def _gates(self) -> Tuple[bool, bool]:
+        """Network and resource gates, reused for gate_cache_ttl seconds."""
+        checked_at, network_ok, resources_ok = self._gate_cache
+        now = time.monotonic()
+        if now - checked_at > self.gate_cache_ttl:
+            network_ok, resources_ok = await self._check_gates()
+            self._gate_cache = (now, network_ok, resources_ok)
+        
+        return network_ok, resources_ok
+    
+    async def _check_gates(self) -> Tuple[bool, bool]:
+        """Query the safety coordinator for network and resource gates."""
+        network_ok = await self.safety.check_network_conditions()
+        resources_ok = await self.safety.check_system_resources()
+        return network_ok, resources_ok
+    
+    def _should_execute_strategy(self, strategy: BaseStrategy) -> bool:
+        """
+        Check if a strategy should be executed.
+        
+        Reads the gate cache refreshed at the top of each loop pass, so no
+        coroutine is created per strategy.
+        """
         try:
             # Check if strategy is ready
             if not strategy.is_ready():
                 return False
             
-            # Check network conditions
-            if not await self.safety.check_network_conditions():
-                return False
-            
-            # Check system resources
-            if not await self.safety.check_system_resources():
-                return False
-            
-            return True
+            # Check network conditions and system resources
+            _, network_ok, resources_ok = self._gate_cache
+            return network_ok and resources_ok
             
         except Exception as e:
             logger.error(f"Error checking strategy execution: {str(e)}")
@@ -187,10 +340,9 @@ class LoopManager:
             # Validate transaction if returned
             if result and isinstance(result, dict):
                 if await self.safety.validate_transaction(result):
-                    # Submit transaction
-                    tx_hash = await self._submit_transaction(result)
+                    # Submit transaction, already validated above
+                    tx_hash = await self._submit_transaction(result, validated=True)
                     if tx_hash:
-                        self.pending_transactions.add(tx_hash)
                         self.successful_executions += 1
             
         except Exception as e:
@@ -206,139 +358,311 @@ class LoopManager:
             # Unregister strategy
             await self.safety.unregister_strategy(strategy_id)
     
-    async def _submit_transaction(self, tx: Dict) -> Optional[str]:
-        """Submit a transaction with safety checks."""
+    async def _submit_transaction(self, tx: Dict, validated: bool = False) -> Optional[str]:
+        """Submit a transaction with safety checks, unless the caller already ran them."""
         try:
             # Final safety validation
-            if not await self.safety.validate_transaction(tx):
+            if not validated and not await self.safety.validate_transaction(tx):
                 return None
             
-            # Sign and send transaction
+            # Sign and hex-encode once, shared by whichever send path is used
             signed_tx = await self._sign_transaction(tx)
-            tx_hash = await self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            tx_hash_hex = HexStr(tx_hash.hex())
+            raw_tx = HexStr('0x' + signed_tx.rawTransaction.hex())
             
-            logger.info(f"Submitted transaction: {tx_hash_hex}")
-            return tx_hash_hex
+            # Known before sending, so a send that fails after the node has
+            # broadcast the transaction can still be tracked
+            local_hash = HexStr('0x' + keccak(signed_tx.rawTransaction).hex())
             
         except Exception as e:
             logger.error(f"Error submitting transaction: {str(e)}")
             return None
+        
+        # Submit and wait for inclusion in one round trip where supported
+        if self.config.get('use_send_raw_sync') and self._send_raw_sync_supported:
+            try:
+                receipt = await self._send_raw_transaction_sync(raw_tx)
+            except Exception as e:
+                # Timeouts, dropped connections and "not included within
+                # timeout" errors can all follow a successful broadcast
+                return self._track_unconfirmed_send(local_hash, e)
+            
+            if receipt is not None:
+                tx_hash_hex = HexStr(receipt['transactionHash'].hex())
+                logger.info(f"Submitted transaction: {tx_hash_hex}")
+                self._record_receipt(tx_hash_hex, receipt)
+                return tx_hash_hex
+        
+        try:
+            # Raw request: the payload is already hex, skip the method formatters
+            tx_hash_hex = HexStr(await self.web3.manager.coro_request(
+                RPCEndpoint('eth_sendRawTransaction'),
+                [raw_tx]
+            ))
+        except ValueError as e:
+            # An RPC error response, the node rejected the transaction
+            logger.error(f"Error submitting transaction: {str(e)}")
+            return None
+        except Exception as e:
+            return self._track_unconfirmed_send(local_hash, e)
+        
+        logger.info(f"Submitted transaction: {tx_hash_hex}")
+        self.pending_transactions[tx_hash_hex] = time.monotonic()
+        return tx_hash_hex
     
-    async def _sign_transaction(self, tx: Dict) -> Any:
-        """Sign a transaction using the secure key manager."""
+    def _track_unconfirmed_send(self, tx_hash: HexStr, error: Exception) -> HexStr:
+        """Track a transaction whose send failed after it may have reached the node."""
+        logger.warning(f"Send of {tx_hash} failed, tracking it as pending: {str(error)}")
+        self.pending_transactions[tx_hash] = time.monotonic()
+        return tx_hash
+    
+    async def _send_raw_transaction_sync(self, raw_tx: HexStr) -> Optional[Dict]:
+        """
+        Send with eth_sendRawTransactionSync, returning the inclusion receipt.
+        
+        Returns None when the provider doesn't implement the method, in which
+        case it is not tried again and the caller falls back to
+        eth_sendRawTransaction. Any other failure is raised.
+        """
         try:
-            # Get private key from secure storage
-            private_key = await self.safety.key_manager.get_private_key(
-                self.config['key_id'],
-                self.config['key_password']
+            receipt = await self.web3.manager.coro_request(
+                RPCEndpoint('eth_sendRawTransactionSync'),
+                [raw_tx]
             )
+            return receipt_formatter(receipt)
             
-            if not private_key:
-                raise ValueError("Failed to retrieve private key")
+        except ValueError as e:
+            error = e.args[0] if e.args else None
+            if isinstance(error, dict) and error.get('code') == -32601:
+                logger.warning("eth_sendRawTransactionSync not supported, disabling")
+                self._send_raw_sync_supported = False
+                return None
+            raise
+    
+    async def _sign_transaction(self, tx: Dict) -> Any:
+        """Sign a transaction with the cached signing account."""
+        try:
+            if self._signing_account is None:
+                await self._load_signing_account()
             
-            # Sign transaction
-            return self.web3.eth.account.sign_transaction(tx, private_key)
+            return self._signing_account.sign_transaction(tx)
             
         except Exception as e:
             logger.error(f"Error signing transaction: {str(e)}")
             raise
     
-    async def _monitor_transactions(self) -> None:
-        """Monitor pending transactions."""
+    async def _load_signing_account(self) -> None:
+        """Unwrap the private key from secure storage once and cache the account."""
+        # Key derivation is deliberately slow, keep it off the event loop
+        private_key = await asyncio.to_thread(
+            self.safety.key_manager.get_private_key,
+            self.config['key_id'],
+            self.config['key_password']
+        )
+        
+        if not private_key:
+            raise ValueError("Failed to retrieve private key")
+        
+        self._signing_account = self.web3.eth.account.from_key(private_key)
+        del private_key
+        
+        self._lock_key_memory(self._signing_account.key)
+    
+    @staticmethod
+    def _lock_key_memory(key: bytes) -> None:
+        """Pin the key bytes in RAM so they are never written to swap."""
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            address = ctypes.cast(ctypes.c_char_p(key), ctypes.c_void_p).value
+            if libc.mlock(ctypes.c_void_p(address), ctypes.c_size_t(len(key))) != 0:
+                logger.warning(
+                    f"mlock failed for signing key: {os.strerror(ctypes.get_errno())}"
+                )
+        except Exception as e:
+            logger.warning(f"Could not lock signing key memory: {str(e)}")
+    
+    async def _run_scheduler(self) -> None:
+        """Run the periodic monitors from one coroutine, soonest due first."""
+        now = time.monotonic()
+        self._timers = [
+            (now, 'txmon', self._poll_receipts_once),
+            (now + self.health_check_interval, 'health', self._health_check_once)
+        ]
+        heapq.heapify(self._timers)
+        
         while self.running:
+            due, name, job = self._timers[0]
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            heapq.heappop(self._timers)
+            
             try:
-                completed_txs = set()
-                
-                for tx_hash in self.pending_transactions:
-                    try:
-                        receipt = await self.web3.eth.get_transaction_receipt(tx_hash)
-                        if receipt:
-                            completed_txs.add(tx_hash)
-                            self.tx_receipts[tx_hash] = receipt
-                            
-                            # Log success/failure
-                            if receipt['status'] == 1:
-                                logger.info(f"Transaction successful: {tx_hash}")
-                            else:
-                                logger.warning(f"Transaction failed: {tx_hash}")
-                                
-                    except Exception as e:
-                        logger.error(f"Error checking transaction {tx_hash}: {str(e)}")
-                
-                # Remove completed transactions
-                self.pending_transactions -= completed_txs
-                
-                # Brief pause
-                await asyncio.sleep(1)
-                
+                interval = await job()
             except Exception as e:
-                logger.error(f"Error in transaction monitor: {str(e)}")
-                await asyncio.sleep(5)
+                logger.error(f"Error in {name} monitor: {str(e)}")
+                interval = 5
+            
+            heapq.heappush(self._timers, (time.monotonic() + interval, name, job))
     
-    async def _monitor_health(self) -> None:
-        """Monitor system health."""
-        while self.running:
-            try:
-                current_time = time.time()
-                
-                # Run health check at interval
-                if current_time - self.last_health_check >= self.health_check_interval:
-                    await self.check_system_health()
-                    self.last_health_check = current_time
+    async def _poll_receipts_once(self) -> float:
+        """Poll pending receipts unless newHeads is driving them, returning the next delay."""
+        if self._heads_active:
+            return self.receipt_poll_latency
+        
+        completed = await self._check_pending_transactions()
+        
+        # Back off on repeated misses, snap back once receipts land
+        if completed or not self.pending_transactions:
+            self._receipt_poll_delay = self.receipt_poll_latency
+        else:
+            self._receipt_poll_delay = min(
+                self._receipt_poll_delay * 2, self.receipt_poll_max_latency
+            )
+        return self._receipt_poll_delay
+    
+    async def _health_check_once(self) -> float:
+        """Run a system health check, returning the next delay."""
+        await self.check_system_health()
+        return self.health_check_interval
+    
+    async def _monitor_transactions(self) -> None:
+        """Check receipts per new block, the scheduler polls while this is down."""
+        # Receipts can only change when a block lands, so wait for heads
+        self._heads_active = True
+        try:
+            await self._monitor_transactions_on_heads()
+            if self.running:
+                logger.warning("newHeads subscription ended, falling back to polling")
+        except Exception as e:
+            logger.error(
+                f"newHeads subscription failed, falling back to polling: {str(e)}"
+            )
+        finally:
+            self._heads_active = False
+    
+    async def _monitor_transactions_on_heads(self) -> None:
+        """Check pending transactions once per new block."""
+        async with AsyncWeb3.persistent_websocket(
+            WebsocketProviderV2(self.config['ws_url'])
+        ) as ws_web3:
+            await ws_web3.eth.subscribe('newHeads')
+            
+            async for _ in ws_web3.ws.process_subscriptions():
+                if not self.running:
+                    break
                 
-                # Brief pause
-                await asyncio.sleep(1)
+                # New block, strategies may have fresh opportunities
+                self.wake()
                 
+                try:
+                    await self._check_pending_transactions()
+                except Exception as e:
+                    logger.error(f"Error in transaction monitor: {str(e)}")
+    
+    async def _check_pending_transactions(self) -> int:
+        """
+        Check all pending transactions for receipts in one round trip.
+        
+        Returns:
+            Number of transactions that completed
+        """
+        tx_hashes = list(self.pending_transactions)
+        if not tx_hashes:
+            return 0
+        
+        receipts = await self._fetch_receipts(tx_hashes)
+        
+        completed = 0
+        for tx_hash, receipt in zip(tx_hashes, receipts):
+            if isinstance(receipt, TransactionNotFound):
+                continue
+            
+            if isinstance(receipt, Exception):
+                logger.error(f"Error checking transaction {tx_hash}: {str(receipt)}")
+                continue
+            
+            if receipt:
+                # Drop completed transactions in the same pass
+                del self.pending_transactions[tx_hash]
+                self._record_receipt(tx_hash, receipt)
+                completed += 1
+        
+        # Stop polling transactions that were never mined
+        cutoff = time.monotonic() - self.receipt_timeout
+        for tx_hash in [h for h, submitted in self.pending_transactions.items() if submitted < cutoff]:
+            del self.pending_transactions[tx_hash]
+            logger.warning(f"No receipt for {tx_hash} after {self.receipt_timeout}s, dropping it")
+        
+        return completed
+    
+    def _record_receipt(self, tx_hash: str, receipt: Dict) -> None:
+        """Store a transaction receipt and log its outcome."""
+        self.tx_receipts[tx_hash] = receipt
+        
+        # Log success/failure
+        if receipt['status'] == 1:
+            logger.info(f"Transaction successful: {tx_hash}")
+        else:
+            logger.warning(f"Transaction failed: {tx_hash}")
+    
+    async def _fetch_receipts(self, tx_hashes: List[str]) -> List[Any]:
+        """
+        Fetch receipts for the given hashes.
+        
+        Uses a single JSON-RPC batch when the provider supports it, otherwise
+        issues the lookups concurrently. Failed lookups are returned as
+        exceptions in place of their receipt.
+        """
+        if hasattr(self.web3, 'batch_requests'):
+            try:
+                async with self.web3.batch_requests() as batch:
+                    for tx_hash in tx_hashes:
+                        batch.add(self.web3.eth.get_transaction_receipt(tx_hash))
+                    return await batch.async_execute()
             except Exception as e:
-                logger.error(f"Error in health monitor: {str(e)}")
-                await asyncio.sleep(5)
+                logger.debug(f"Batched receipt lookup failed, falling back: {str(e)}")
+        
+        return await asyncio.gather(
+            *(self.web3.eth.get_transaction_receipt(tx_hash) for tx_hash in tx_hashes),
+            return_exceptions=True
+        )
     
     async def monitor_transaction(self, tx_hash: str) -> None:
         """Monitor a specific transaction."""
         try:
-            receipt = await self.web3.eth.wait_for_transaction_receipt(tx_hash)
+            receipt = await self.web3.eth.wait_for_transaction_receipt(
+                tx_hash,
+                timeout=self.receipt_timeout,
+                poll_latency=self.receipt_poll_latency
+            )
             if receipt:
-                self.tx_receipts[tx_hash] = receipt
-                # Log success/failure
-                if receipt['status'] == 1:
-                    logger.info(f"Transaction successful: {tx_hash}")
-                else:
-                    logger.warning(f"Transaction failed: {tx_hash}")
+                self._record_receipt(tx_hash, receipt)
         except Exception as e:
             logger.error(f"Error monitoring transaction {tx_hash}: {str(e)}")
             raise
 
     def get_active_strategies(self) -> List[str]:
         """Get list of active strategy IDs."""
-        return list(self.strategies.keys())
+        return list(self._strategy_ids)
 
     async def execute_strategy(self, strategy_id: str) -> None:
         """Execute a specific strategy."""
-        if strategy_id not in self.strategies:
+        if strategy_id not in self._strategy_index:
             raise ValueError(f"Strategy {strategy_id} not found")
         
-        strategy = self.strategies[strategy_id]
+        strategy = self._strategy_list[self._strategy_index[strategy_id]]
         await self._execute_strategy_safely(strategy)
 
     async def check_system_health(self) -> Dict:
         """Check system health status."""
+        now = time.monotonic()
+        sampled_at, system_health = self._health_cache
+        if now - sampled_at < self.health_cache_ttl:
+            return system_health
+        
         try:
-            import psutil
-            
-            # Get system metrics
-            cpu_usage = psutil.cpu_percent()
-            memory = psutil.virtual_memory()
-            
-            # Determine health status
-            healthy = cpu_usage <= 80.0 and memory.percent <= 90.0
-            
-            system_health = {
-                'cpu_usage': cpu_usage,
-                'memory_usage': memory.percent,
-                'healthy': healthy
-            }
-            
+            # psutil reads /proc synchronously, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            system_health = await loop.run_in_executor(None, self._sample_system_health)
+            self._health_cache = (now, system_health)
             return system_health
             
         except Exception as e:
@@ -350,6 +674,24 @@ class LoopManager:
                 'error': str(e)
             }
 
+    @staticmethod
+    def _sample_system_health() -> Dict:
+        """Sample CPU and memory usage, run in an executor thread."""
+        import psutil
+        
+        # Get system metrics
+        cpu_usage = psutil.cpu_percent()
+        memory = psutil.virtual_memory()
+        
+        # Determine health status
+        healthy = cpu_usage <= 80.0 and memory.percent <= 90.0
+        
+        return {
+            'cpu_usage': cpu_usage,
+            'memory_usage': memory.percent,
+            'healthy': healthy
+        }
+
     def _log_performance_metrics(self) -> None:
         """Log performance metrics."""
         if not self.start_time:
@@ -1,16 +1,23 @@
 """Memory optimization using huge pages"""
 import os
+import re
 import mmap
 import ctypes
+import ctypes.util
 import logging
 import psutil
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Set
 from dataclasses import dataclass
-import subprocess
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# mmap flag bits selecting the huge page size: log2(page bytes) << MAP_HUGE_SHIFT
+_MAP_HUGE_SHIFT = 26
+
+# HugePages counters in /proc/meminfo, e.g. b'HugePages_Free:     960'
+_HP_RE = re.compile(rb'HugePages_(Total|Free|Rsvd|Surp):\s+(\d+)')
+
 @dataclass
 class HugePagesConfig:
     """Huge pages configuration"""
@@ -42,6 +49,19 @@ class MemoryManager:
         self.initialized = False
         self._mapped_regions: Dict[str, mmap.mmap] = {}
         
+        # Private anonymous mappings skip the hugetlbfs file entirely
+        self.anonymous_hugepages = config.get('anonymous_hugepages', True)
+        self._anonymous_regions: Set[str] = set()
+        
+        # Fault pages in at map time, not on first touch in the hot path
+        self.prefault = config.get('prefault_huge_pages', True)
+        
+        # Free huge pages tracked in-process, re-synced with meminfo periodically
+        self._free_pages: Optional[int] = None
+        self._region_pages: Dict[str, int] = {}
+        self._alloc_calls_since_reconcile = 0
+        self.reconcile_interval = config.get('huge_pages_reconcile_interval', 64)
+        
     def initialize(self) -> bool:
         """Initialize huge pages"""
         if self.initialized:
@@ -56,6 +76,7 @@ class MemoryManager:
             
             # Allocate huge pages
             self._allocate_huge_pages()
+            self._free_pages = self._get_available_pages()
             
             self.initialized = True
             logger.info("Memory optimization initialized successfully")
@@ -84,12 +105,9 @@ class MemoryManager:
             raise
             
     def _write_sysctl(self, param: str, value: str):
-        """Write sysctl parameter"""
-        try:
-            subprocess.run(['sysctl', '-w', f'{param}={value}'], check=True)
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to set sysctl parameter {param}: {e}")
-            raise
+        """Write sysctl parameter directly through /proc/sys"""
+        # vm.nr_hugepages -> /proc/sys/vm/nr_hugepages, no fork/exec of sysctl
+        self._write_to_file(f"/proc/sys/{param.replace('.', '/')}", value)
             
     def _write_to_file(self, path: str, value: str):
         """Write value to file"""
@@ -114,12 +132,12 @@ class MemoryManager:
                     logger.info(f"hugetlbfs already mounted at {mount_point}")
                     return
                     
-            # Mount hugetlbfs
-            subprocess.run([
-                'mount', '-t', 'hugetlbfs',
-                '-o', f'pagesize={self.config.page_size}k',
-                'none', str(mount_point)
-            ], check=True)
+            # Mount hugetlbfs with mount(2) rather than shelling out to mount(8)
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            options = f'pagesize={self.config.page_size}k'.encode()
+            if libc.mount(b'none', str(mount_point).encode(), b'hugetlbfs', 0, options) != 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno), str(mount_point))
             
             logger.info(f"hugetlbfs mounted at {mount_point}")
             
@@ -131,13 +149,7 @@ class MemoryManager:
         """Allocate huge pages"""
         try:
             # Read current allocation
-            with open('/proc/meminfo', 'r') as f:
-                meminfo = {}
-                for line in f:
-                    if 'HugePages' in line:
-                        key, value = line.split(':')
-                        meminfo[key.strip()] = value.strip()
-                current = int(meminfo.get('HugePages_Total', '0').split()[0])
+            current = self._read_hugepages().get(b'Total', 0)
                 
             if current < self.config.pages_count:
                 pages_to_allocate = self.config.pages_count - current
@@ -161,21 +173,25 @@ class MemoryManager:
                 pages_needed = 1
                 
             # Check available pages
-            available = self._get_available_pages()
+            available = self._available_pages()
             if available < pages_needed + self.config.min_free_pages:
                 logger.error(f"Not enough huge pages available. Need {pages_needed}, have {available}")
                 return None
                 
-            # Create file in hugetlbfs
-            file_path = Path(self.config.mount_point) / name
-            with open(file_path, 'wb+') as f:
-                # Allocate the memory
-                mem = mmap.mmap(
-                    f.fileno(), pages_needed * self.config.page_size * 1024,
-                    flags=mmap.MAP_SHARED | mmap.MAP_HUGETLB
-                )
+            size = pages_needed * self.config.page_size * 1024
+            mem = None
+            if self.anonymous_hugepages:
+                mem = self._map_anonymous(size)
+                if mem is not None:
+                    self._anonymous_regions.add(name)
+                    
+            if mem is None:
+                mem = self._map_hugetlbfs(name, size)
                 
+            self._advise_region(mem)
             self._mapped_regions[name] = mem
+            self._region_pages[name] = pages_needed
+            self._free_pages -= pages_needed
             logger.info(f"Allocated {size_mb}MB using {pages_needed} huge pages for {name}")
             return mem
             
@@ -183,6 +199,41 @@ class MemoryManager:
             logger.error(f"Failed to allocate memory region {name}: {e}")
             return None
             
+    def _map_anonymous(self, size: int) -> Optional[mmap.mmap]:
+        """Map private anonymous huge pages, no hugetlbfs file involved"""
+        huge_size_flag = ((self.config.page_size * 1024).bit_length() - 1) << _MAP_HUGE_SHIFT
+        try:
+            return mmap.mmap(
+                -1, size,
+                flags=(mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS | mmap.MAP_HUGETLB |
+                       huge_size_flag | self._populate_flag())
+            )
+        except OSError as e:
+            logger.warning(f"Anonymous huge page mapping failed, using hugetlbfs: {e}")
+            return None
+            
+    def _map_hugetlbfs(self, name: str, size: int) -> mmap.mmap:
+        """Map huge pages backed by a file in hugetlbfs"""
+        file_path = Path(self.config.mount_point) / name
+        with open(file_path, 'wb+') as f:
+            return mmap.mmap(
+                f.fileno(), size,
+                flags=mmap.MAP_SHARED | mmap.MAP_HUGETLB | self._populate_flag()
+            )
+            
+    def _populate_flag(self) -> int:
+        """MAP_POPULATE when prefaulting is enabled"""
+        return mmap.MAP_POPULATE if self.prefault else 0
+            
+    def _advise_region(self, mem: mmap.mmap):
+        """Keep the region out of forked children and ask for huge page backing"""
+        for option in (mmap.MADV_DONTFORK, mmap.MADV_HUGEPAGE):
+            try:
+                mem.madvise(option)
+            except OSError as e:
+                # MADV_HUGEPAGE only applies to transparent huge pages
+                logger.debug(f"madvise({option}) failed: {e}")
+            
     def free_region(self, name: str) -> bool:
         """Free a memory region"""
         try:
@@ -190,12 +241,17 @@ class MemoryManager:
                 mem = self._mapped_regions[name]
                 mem.close()
                 
-                # Remove the file
-                file_path = Path(self.config.mount_point) / name
-                if file_path.exists():
-                    file_path.unlink()
+                # Remove the file, anonymous regions have none
+                if name in self._anonymous_regions:
+                    self._anonymous_regions.discard(name)
+                else:
+                    file_path = Path(self.config.mount_point) / name
+                    if file_path.exists():
+                        file_path.unlink()
                     
                 del self._mapped_regions[name]
+                if self._free_pages is not None:
+                    self._free_pages += self._region_pages.pop(name, 0)
                 logger.info(f"Freed memory region {name}")
                 return True
                 
@@ -205,16 +261,31 @@ class MemoryManager:
             logger.error(f"Failed to free memory region {name}: {e}")
             return False
             
+    def _read_hugepages(self) -> Dict[bytes, int]:
+        """Read HugePages counters from /proc/meminfo in a single read"""
+        fd = os.open('/proc/meminfo', os.O_RDONLY)
+        try:
+            # meminfo is well under 8 KiB
+            data = os.read(fd, 8192)
+        finally:
+            os.close(fd)
+            
+        return {key: int(value) for key, value in _HP_RE.findall(data)}
+            
+    def _available_pages(self) -> int:
+        """Free huge pages from the live counter, reconciled every reconcile_interval calls"""
+        if (self._free_pages is None or
+                self._alloc_calls_since_reconcile >= self.reconcile_interval):
+            self._free_pages = self._get_available_pages()
+            self._alloc_calls_since_reconcile = 0
+            
+        self._alloc_calls_since_reconcile += 1
+        return self._free_pages
+            
     def _get_available_pages(self) -> int:
         """Get number of available huge pages"""
         try:
-            with open('/proc/meminfo', 'r') as f:
-                meminfo = {}
-                for line in f:
-                    if 'HugePages' in line:
-                        key, value = line.split(':')
-                        meminfo[key.strip()] = value.strip()
-                return int(meminfo.get('HugePages_Free', '0').split()[0])
+            return self._read_hugepages().get(b'Free', 0)
         except Exception as e:
             logger.error(f"Failed to get available huge pages: {e}")
             return 0
@@ -222,18 +293,13 @@ class MemoryManager:
     def get_stats(self) -> Dict:
         """Get memory statistics"""
         try:
-            with open('/proc/meminfo', 'r') as f:
-                meminfo = {}
-                for line in f:
-                    if 'HugePages' in line:
-                        key, value = line.split(':')
-                        meminfo[key.strip()] = value.strip()
+            hugepages = self._read_hugepages()
                 
             stats = {
-                'total_pages': int(meminfo.get('HugePages_Total', '0').split()[0]),
-                'free_pages': int(meminfo.get('HugePages_Free', '0').split()[0]),
-                'reserved_pages': int(meminfo.get('HugePages_Rsvd', '0').split()[0]),
-                'surplus_pages': int(meminfo.get('HugePages_Surp', '0').split()[0]),
+                'total_pages': hugepages.get(b'Total', 0),
+                'free_pages': hugepages.get(b'Free', 0),
+                'reserved_pages': hugepages.get(b'Rsvd', 0),
+                'surplus_pages': hugepages.get(b'Surp', 0),
                 'page_size_kb': self.config.page_size,
                 'mapped_regions': len(self._mapped_regions),
                 'mapped_regions_size_mb': sum(
@@ -1,27 +1,109 @@
 """Mempool monitoring and transaction management"""
-from typing import Dict, List, Optional, Set
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+from collections import defaultdict, deque
 from dataclasses import dataclass
-from web3 import Web3
+from web3 import AsyncWeb3, Web3, WebsocketProviderV2
 import asyncio
+import aiohttp
+import hashlib
 import logging
+import os
+import struct
 from eth_typing import Address, HexStr
+from eth_utils import function_signature_to_4byte_selector
+from hexbytes import HexBytes
 from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import time
 
+try:
+    from pyroaring import BitMap
+except ImportError:
+    BitMap = set  # Same add/discard/&/| interface, without the compression
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Router entry points by protocol, keyed below by their 4-byte selector
+PROTOCOL_SIGNATURES = {
+    'uniswap_v2': [
+        'swapExactTokensForTokens(uint256,uint256,address[],address,uint256)',
+        'swapTokensForExactTokens(uint256,uint256,address[],address,uint256)',
+        'swapExactETHForTokens(uint256,address[],address,uint256)',
+        'swapTokensForExactETH(uint256,uint256,address[],address,uint256)',
+        'swapExactTokensForETH(uint256,uint256,address[],address,uint256)',
+        'swapETHForExactTokens(uint256,address[],address,uint256)',
+    ],
+    'uniswap_v3': [
+        'exactInputSingle((address,address,uint24,address,uint256,uint256,uint256,uint160))',
+        'exactInput((bytes,address,uint256,uint256,uint256))',
+        'exactOutputSingle((address,address,uint24,address,uint256,uint256,uint256,uint160))',
+        'exactOutput((bytes,address,uint256,uint256,uint256))',
+    ],
+    'uniswap_universal': [
+        'execute(bytes,bytes[],uint256)',
+        'execute(bytes,bytes[])',
+    ],
+    'balancer': [
+        'swap((bytes32,uint8,address,address,uint256,bytes),(address,bool,address,bool),uint256,uint256)',
+        'batchSwap(uint8,(bytes32,uint256,uint256,uint256,bytes)[],address[],(address,bool,address,bool),int256[],uint256)',
+    ],
+    'curve': [
+        'exchange(int128,int128,uint256,uint256)',
+        'exchange_underlying(int128,int128,uint256,uint256)',
+    ],
+}
+
+# One hash probe per transaction on the raw selector bytes
+PROTOCOL_SELECTORS: Dict[bytes, str] = {
+    function_signature_to_4byte_selector(signature): protocol
+    for protocol, signatures in PROTOCOL_SIGNATURES.items()
+    for signature in signatures
+}
+
+# Golomb-Rice parameters for exported seen-hash filters (BIP-158 defaults),
+# giving a 1/GCS_M false positive rate at roughly P + 2 bits per hash
+GCS_P = 19
+GCS_M = 784931
+
+# Filter hash functions, recorded in the filter header so probes match exports
+GCS_HASH_BLAKE2B = 0
+GCS_HASH_XXH3 = 1
+
+def _gcs_hasher(algorithm: int, key: bytes) -> Callable[[bytes], int]:
+    """64-bit keyed hash for filter items"""
+    if algorithm == GCS_HASH_XXH3:
+        if xxhash is None:
+            raise RuntimeError("Filter was hashed with xxh3 but xxhash is not installed")
+        seed = int.from_bytes(key[:8], 'little')
+        return lambda item: xxhash.xxh3_64_intdigest(item, seed=seed)
+    
+    return lambda item: int.from_bytes(
+        hashlib.blake2b(item, key=key, digest_size=8).digest(), 'little'
+    )
+
+def _raw(value) -> bytes:
+    """Canonical raw bytes for a hash or address given as hex or bytes"""
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value[:2] in ('0x', '0X') else value)
+    return bytes(value)
+
+@dataclass(slots=True)
 class Transaction:
     """Represents a transaction in the mempool"""
-    hash: HexStr
-    from_address: Address
-    to_address: Optional[Address]
+    hash: bytes  # 32 raw bytes
+    from_address: bytes  # 20 raw bytes
+    to_address: Optional[bytes]
     value: int
     gas_price: int
     gas_limit: int
     nonce: int
     data: bytes
-    timestamp: float
+    timestamp: float  # Monotonic seconds since the owner started
 
 class MempoolMonitor:
     """Monitors mempool for potential MEV opportunities"""
@@ -29,11 +111,30 @@ class MempoolMonitor:
     def __init__(self, w3: Web3, config: Dict):
         self.w3 = w3
         self.config = config
-        self.transactions: Dict[HexStr, Transaction] = {}
-        self.watched_addresses: Set[Address] = set()
+        # Hashes and addresses are held as raw bytes, hex only at the edges
+        self.transactions: Dict[bytes, Transaction] = {}
+        self.watched_addresses: Set[bytes] = set()
         self.running = False
         self._monitor_task = None
         
+        # Push-based feed of newly seen transactions
+        self.tx_queue: asyncio.Queue = asyncio.Queue(
+            maxsize=config.get('tx_queue_size', 10000)
+        )
+        
+        # Subscribed hashes are fetched in batches of up to batch_size,
+        # waiting at most batch_window seconds to fill one
+        self.batch_size = config.get('tx_fetch_batch_size', 64)
+        self.batch_window = config.get('tx_fetch_batch_window', 0.02)
+        self._last_cleanup = 0.0
+        
+        # Timestamps are monotonic seconds since this epoch, sampled once per batch
+        self._epoch = time.monotonic()
+        
+    def _clock(self) -> float:
+        """Monotonic seconds since the monitor was created"""
+        return time.monotonic() - self._epoch
+        
     async def start(self):
         """Start monitoring the mempool"""
         if self.running:
@@ -51,102 +152,258 @@ class MempoolMonitor:
         
     def add_watch_address(self, address: Address):
         """Add address to watch list"""
-        self.watched_addresses.add(address)
+        self.watched_addresses.add(_raw(address))
         
     def remove_watch_address(self, address: Address):
         """Remove address from watch list"""
-        self.watched_addresses.discard(address)
+        self.watched_addresses.discard(_raw(address))
         
     async def get_transaction(self, tx_hash: HexStr) -> Optional[Transaction]:
         """Get transaction details from mempool"""
-        return self.transactions.get(tx_hash)
+        return self.transactions.get(_raw(tx_hash))
+        
+    def add_pending_transaction(self, tx: Dict, now: Optional[float] = None) -> Optional[Transaction]:
+        """Record a pending transaction and queue it for analysis"""
+        # HexBytes hashes compare equal to raw bytes, so look up without copying
+        tx_hash = tx['hash']
+        if isinstance(tx_hash, str):
+            tx_hash = _raw(tx_hash)
+        
+        # Skip if already processed
+        transactions = self.transactions
+        if tx_hash in transactions:
+            return None
+        tx_hash = bytes(tx_hash)
+            
+        # Create transaction object
+        transaction = Transaction(
+            hash=tx_hash,
+            from_address=_raw(tx['from']),
+            to_address=_raw(tx['to']) if tx.get('to') else None,
+            value=tx['value'],
+            gas_price=tx['gasPrice'],
+            gas_limit=tx['gas'],
+            nonce=tx['nonce'],
+            data=tx.get('input', b''),
+            timestamp=self._clock() if now is None else now
+        )
+        
+        # Store transaction
+        transactions[tx_hash] = transaction
+        
+        # Log if it involves watched address
+        watched = self.watched_addresses
+        if watched and (transaction.from_address in watched or
+                        transaction.to_address in watched):
+            logger.info(f"Detected transaction involving watched address: 0x{tx_hash.hex()}")
+        
+        try:
+            self.tx_queue.put_nowait(transaction)
+        except asyncio.QueueFull:
+            logger.warning(f"Transaction queue full, dropping 0x{tx_hash.hex()}")
+            
+        return transaction
+        
+    async def stream(self) -> AsyncIterator[Transaction]:
+        """Yield pending transactions as they arrive"""
+        while True:
+            yield await self.tx_queue.get()
         
     async def _monitor_loop(self):
         """Main monitoring loop"""
+        # Pending hashes are pushed to us when a websocket is configured
+        if self.config.get('ws_url'):
+            try:
+                await self._monitor_subscription()
+                if not self.running:
+                    return
+                logger.warning("Pending transaction subscription ended, falling back to polling")
+            except Exception as e:
+                logger.error(f"Pending transaction subscription failed, falling back to polling: {e}")
+        
+        # Bound once rather than per transaction
+        get_pending = self.w3.eth.get_pending_transactions
+        add = self.add_pending_transaction
+        
         while self.running:
             try:
                 # Get pending transactions
-                pending = await self.w3.eth.get_pending_transactions()
+                pending = await get_pending()
                 
-                # Process each transaction
+                # Process each transaction against one clock sample
+                now = self._clock()
                 for tx in pending:
-                    tx_hash = tx['hash'].hex()
-                    
-                    # Skip if already processed
-                    if tx_hash in self.transactions:
-                        continue
-                        
-                    # Create transaction object
-                    transaction = Transaction(
-                        hash=tx_hash,
-                        from_address=tx['from'],
-                        to_address=tx.get('to'),
-                        value=tx['value'],
-                        gas_price=tx['gasPrice'],
-                        gas_limit=tx['gas'],
-                        nonce=tx['nonce'],
-                        data=tx.get('input', b''),
-                        timestamp=time.time()
-                    )
-                    
-                    # Store transaction
-                    self.transactions[tx_hash] = transaction
-                    
-                    # Log if it involves watched address
-                    if (transaction.from_address in self.watched_addresses or
-                        transaction.to_address in self.watched_addresses):
-                        logger.info(f"Detected transaction involving watched address: {tx_hash}")
+                    add(tx, now)
                 
-                # Clean up old transactions
-                current_time = time.time()
-                old_txs = [
-                    hash for hash, tx in self.transactions.items()
-                    if current_time - tx.timestamp > 300  # 5 minutes
-                ]
-                
-                for tx_hash in old_txs:
-                    del self.transactions[tx_hash]
+                self._cleanup_old_transactions(now)
                     
             except Exception as e:
                 logger.error(f"Error in monitor loop: {e}")
                 
             # Add delay between iterations
             await asyncio.sleep(1)
+            
+    async def _monitor_subscription(self):
+        """Feed newPendingTransactions hashes to the batch fetcher"""
+        async with AsyncWeb3.persistent_websocket(
+            WebsocketProviderV2(self.config['ws_url'])
+        ) as ws_w3:
+            await ws_w3.eth.subscribe('newPendingTransactions')
+            
+            hashes: asyncio.Queue = asyncio.Queue()
+            fetcher = asyncio.create_task(self._fetch_pending_batches(hashes))
+            try:
+                async for message in ws_w3.ws.process_subscriptions():
+                    if not self.running:
+                        break
+                    hashes.put_nowait(message['result'])
+            finally:
+                fetcher.cancel()
+                
+    async def _fetch_pending_batches(self, hashes: asyncio.Queue):
+        """Fetch queued hashes batch_size at a time and record the transactions"""
+        transactions = self.transactions
+        add = self.add_pending_transaction
+        
+        while True:
+            batch = [await hashes.get()]
+            try:
+                async with asyncio.timeout(self.batch_window):
+                    while len(batch) < self.batch_size:
+                        batch.append(await hashes.get())
+            except TimeoutError:
+                pass
+                
+            # Don't refetch transactions we already hold
+            batch = [
+                h for h in batch
+                if (h if isinstance(h, bytes) else _raw(h)) not in transactions
+            ]
+            if batch:
+                try:
+                    fetched = await self._fetch_transactions(batch)
+                    now = self._clock()
+                    for tx in fetched:
+                        if tx and not isinstance(tx, Exception):
+                            add(tx, now)
+                except Exception as e:
+                    logger.error(f"Error fetching pending transactions: {e}")
+                    
+            # Cleanup scans every transaction, run it at most once a second
+            now = self._clock()
+            if now - self._last_cleanup >= 1:
+                self._cleanup_old_transactions(now)
+                
+    async def _fetch_transactions(self, tx_hashes: List[HexStr]) -> List[Any]:
+        """
+        Fetch transactions for the given hashes.
+        
+        Uses a single JSON-RPC batch when the provider supports it, otherwise
+        issues the lookups concurrently. Failed lookups are returned as
+        exceptions in place of their transaction.
+        """
+        if hasattr(self.w3, 'batch_requests'):
+            try:
+                async with self.w3.batch_requests() as batch:
+                    for tx_hash in tx_hashes:
+                        batch.add(self.w3.eth.get_transaction(tx_hash))
+                    return await batch.async_execute()
+            except Exception as e:
+                logger.debug(f"Batched transaction lookup failed, falling back: {e}")
+                
+        return await asyncio.gather(
+            *(self.w3.eth.get_transaction(tx_hash) for tx_hash in tx_hashes),
+            return_exceptions=True
+        )
+        
+    def _cleanup_old_transactions(self, now: Optional[float] = None):
+        """Drop transactions seen more than 5 minutes ago"""
+        current_time = self._clock() if now is None else now
+        self._last_cleanup = current_time
+        
+        # Insertion order is arrival order, so stale entries form a prefix
+        old_txs = []
+        for tx_hash, tx in self.transactions.items():
+            if current_time - tx.timestamp <= 300:  # 5 minutes
+                break
+            old_txs.append(tx_hash)
+        
+        for tx_hash in old_txs:
+            del self.transactions[tx_hash]
 
 class MempoolManager:
     def __init__(self, w3: Web3, config: Dict):
         self.w3 = w3
         self.config = config
-        self.pending_txs: Dict[HexStr, Transaction] = {}
         self.known_bots: Set[Address] = set()
         self.executor = ThreadPoolExecutor(max_workers=4)
         
         # Performance optimizations
         self.enable_custom_indexing = True
-        self.index_by_protocol = {}  # Protocol-specific transaction indexing
-        self.index_by_token = {}     # Token-specific transaction indexing
+        # Protocol- and token-specific indexes, as bitmaps of pending row ids
+        self.index_by_protocol: Dict[str, BitMap] = defaultdict(BitMap)
+        self.index_by_token: Dict[str, BitMap] = defaultdict(BitMap)
+        
+        # Pending transactions as struct-of-arrays, one row per transaction so
+        # cleanup and filtering are vector scans. Row ids are stable until eviction.
+        capacity = config.get('max_pending_tx', 100_000)
+        self._tx_rows: Dict[bytes, int] = {}
+        self._free_rows: List[int] = list(range(capacity - 1, -1, -1))
+        self._row_live = np.zeros(capacity, dtype=np.bool_)
+        self._row_tx = np.empty(capacity, dtype=object)
+        self._row_hash = np.empty(capacity, dtype=object)
+        self._row_value = np.zeros(capacity, dtype=np.float64)  # wei overflows uint64
+        self._row_gas_price = np.zeros(capacity, dtype=np.uint64)
+        self._row_gas_limit = np.zeros(capacity, dtype=np.uint64)
+        self._row_timestamp = np.zeros(capacity, dtype=np.float64)  # Seconds since _epoch
+        
+        # Hashes in arrival order, so cleanup pops stale ones off the front
+        # instead of scanning every row. Removed hashes are skipped lazily.
+        self._arrivals: deque = deque()
+        
+        # Monotonic clock origin, sampled once per batch rather than per transaction
+        self._epoch = time.monotonic()
+        
+        # Raw hashes already fetched, checked before any RPC. Two generations
+        # rotate at capacity so recently evicted hashes are still remembered.
+        self._seen: Set[bytes] = set()
+        self._seen_previous: Set[bytes] = set()
+        self.seen_capacity = config.get('seen_tx_capacity', 1_000_000)
+        
+        # Caps in-flight transaction lookups below the provider's rate limit
+        self._rpc_sem = asyncio.Semaphore(config.get('max_inflight_rpc', 32))
+        
+        # Keep-alive HTTP pool shared by every RPC on this provider, opened on start
+        self._session: Optional[aiohttp.ClientSession] = None
         
     async def start_monitoring(self):
         """
         Start monitoring the mempool with optimized indexing
         """
         try:
+            await self._open_session()
+            
             # Subscribe to pending transactions
             pending_filter = await self.w3.eth.filter('pending')
             
+            # Bound once rather than per transaction
+            get_new_entries = pending_filter.get_new_entries
+            process = self._process_transaction
+            
             while True:
                 try:
                     # Get new pending transactions
-                    new_pending = await pending_filter.get_new_entries()
+                    new_pending = await get_new_entries()
+                    now = self._clock()
                     
                     # Process transactions in parallel
                     await asyncio.gather(*[
-                        self._process_transaction(tx_hash)
+                        process(tx_hash, now)
                         for tx_hash in new_pending
                     ])
                     
                     # Clean up old transactions
-                    self._cleanup_old_transactions()
+                    self._cleanup_old_transactions(now)
                     
                 except Exception as e:
                     logger.error(f"Error processing pending transactions: {e}")
@@ -156,36 +413,72 @@ class MempoolManager:
             logger.error(f"Error in mempool monitoring: {e}")
             raise
     
-    async def _process_transaction(self, tx_hash: HexStr):
+    def _clock(self) -> float:
+        """
+        Monotonic seconds since the manager was created
+        """
+        return time.monotonic() - self._epoch
+    
+    async def _open_session(self):
+        """
+        Route provider requests through one pooled keep-alive session
+        """
+        if self._session or not hasattr(self.w3.provider, 'cache_async_session'):
+            return
+        
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.config.get('rpc_pool_size', 64),
+                keepalive_timeout=300
+            )
+        )
+        await self.w3.provider.cache_async_session(self._session)
+    
+    async def close(self):
+        """
+        Close the pooled HTTP session
+        """
+        if self._session:
+            await self._session.close()
+            self._session = None
+    
+    async def _process_transaction(self, tx_hash: HexStr, now: Optional[float] = None):
         """
         Process and index a new transaction
         """
+        # Skip hashes already fetched, marking before the RPC so duplicates
+        # within the same batch are dropped too
+        key = _raw(tx_hash)
+        if not self._mark_seen(key):
+            return
+        
         try:
             # Get transaction details
-            tx = await self.w3.eth.get_transaction(tx_hash)
+            async with self._rpc_sem:
+                tx = await self.w3.eth.get_transaction(tx_hash)
             
             if not tx:
                 return
             
             # Create transaction object
             transaction = Transaction(
-                hash=tx_hash,
-                from_address=tx['from'],
-                to_address=tx.get('to'),
+                hash=key,
+                from_address=_raw(tx['from']),
+                to_address=_raw(tx['to']) if tx.get('to') else None,
                 value=tx.get('value', 0),
                 gas_price=tx.get('gasPrice', 0),
                 gas_limit=tx.get('gas', 0),
                 nonce=tx.get('nonce', 0),
                 data=tx.get('input', b''),
-                timestamp=time.time()
+                timestamp=self._clock() if now is None else now
             )
             
             # Store transaction
-            self.pending_txs[tx_hash] = transaction
+            row = self._store_transaction(transaction)
             
             # Update custom indexes if enabled
             if self.enable_custom_indexing:
-                await self._update_indexes(transaction)
+                await self._update_indexes(transaction, row)
             
             # Analyze for MEV opportunities
             if self._is_relevant_transaction(transaction):
@@ -194,7 +487,148 @@ class MempoolManager:
         except Exception as e:
             logger.error(f"Error processing transaction {tx_hash}: {e}")
     
-    async def _update_indexes(self, transaction: Transaction):
+    @property
+    def pending_txs(self) -> Dict[bytes, Transaction]:
+        """
+        Pending transactions by hash, built on demand
+        """
+        return {tx_hash: self._row_tx[row] for tx_hash, row in self._tx_rows.items()}
+    
+    def _store_transaction(self, transaction: Transaction) -> int:
+        """
+        Write a transaction into a free row, returning the row id
+        """
+        row = self._tx_rows.get(transaction.hash)
+        if row is None:
+            if not self._free_rows:
+                self._grow_rows()
+            row = self._free_rows.pop()
+            self._tx_rows[transaction.hash] = row
+            self._arrivals.append(transaction.hash)
+        
+        self._row_live[row] = True
+        self._row_tx[row] = transaction
+        self._row_hash[row] = transaction.hash
+        self._row_value[row] = transaction.value
+        self._row_gas_price[row] = transaction.gas_price
+        self._row_gas_limit[row] = transaction.gas_limit
+        self._row_timestamp[row] = transaction.timestamp
+        return row
+    
+    def _grow_rows(self):
+        """
+        Double the row capacity
+        """
+        capacity = len(self._row_live)
+        for name in ('_row_live', '_row_tx', '_row_hash', '_row_value',
+                     '_row_gas_price', '_row_gas_limit', '_row_timestamp'):
+            column = getattr(self, name)
+            grown = np.zeros(capacity * 2, dtype=column.dtype)
+            grown[:capacity] = column
+            setattr(self, name, grown)
+        
+        self._free_rows.extend(range(capacity * 2 - 1, capacity - 1, -1))
+    
+    def filter_pending(self,
+                       min_value: Optional[int] = None,
+                       max_gas: Optional[int] = None) -> List[bytes]:
+        """
+        Hashes of pending transactions matching the criteria
+        """
+        mask = self._row_live.copy()
+        
+        # Wei overflows uint64 so values are compared as float64, with exact
+        # integer compares only where rounding ties
+        if min_value is not None:
+            threshold = np.float64(min_value)
+            mask &= self._row_value >= threshold
+            for row in np.flatnonzero(mask & (self._row_value == threshold)).tolist():
+                mask[row] = self._row_tx[row].value >= min_value
+        if max_gas is not None:
+            mask &= self._row_gas_limit <= max_gas
+        
+        return self._row_hash[mask].tolist()
+    
+    def _mark_seen(self, key: bytes) -> bool:
+        """
+        Record a raw transaction hash, returning False if it was already seen
+        """
+        if key in self._seen or key in self._seen_previous:
+            return False
+        
+        if len(self._seen) >= self.seen_capacity:
+            self._seen_previous = self._seen
+            self._seen = set()
+        
+        self._seen.add(key)
+        return True
+    
+    def export_filter(self) -> bytes:
+        """
+        Golomb-Rice coded filter of every seen transaction hash, for sharing with peers
+        """
+        key = os.urandom(16)
+        algorithm = GCS_HASH_XXH3 if xxhash is not None else GCS_HASH_BLAKE2B
+        hasher = _gcs_hasher(algorithm, key)
+        hashes = self._seen | self._seen_previous
+        count = len(hashes)
+        modulus = count * GCS_M
+        values = sorted((hasher(tx_hash) * modulus) >> 64 for tx_hash in hashes)
+        
+        # Delta-encode the sorted values: quotient in unary, remainder in P bits
+        codes = []
+        last = 0
+        for value in values:
+            delta = value - last
+            last = value
+            codes.append('1' * (delta >> GCS_P) + '0' + format(delta & ((1 << GCS_P) - 1), f'0{GCS_P}b'))
+        
+        bits = ''.join(codes)
+        bits += '0' * (-len(bits) % 8)
+        payload = int(bits, 2).to_bytes(len(bits) // 8, 'big') if bits else b''
+        return struct.pack('<IB', count, algorithm) + key + payload
+    
+    @staticmethod
+    def probe_filter(blob: bytes, tx_hash: HexStr) -> bool:
+        """
+        Check whether a transaction hash may be in an exported filter
+        """
+        return MempoolManager.probe_filter_any(blob, [tx_hash])
+    
+    @staticmethod
+    def probe_filter_any(blob: bytes, tx_hashes: List[HexStr]) -> bool:
+        """
+        Check whether any of the hashes may be in an exported filter, in one pass
+        """
+        count, algorithm = struct.unpack_from('<IB', blob)
+        if not count or not tx_hashes:
+            return False
+        
+        key, stream = blob[5:21], blob[21:]
+        hasher = _gcs_hasher(algorithm, key)
+        modulus = count * GCS_M
+        targets = sorted((hasher(_raw(tx_hash)) * modulus) >> 64 for tx_hash in tx_hashes)
+        bits = format(int.from_bytes(stream, 'big'), f'0{len(stream) * 8}b')
+        
+        # Decode the filter once, merging against the sorted targets
+        pos = 0
+        value = 0
+        t = 0
+        for _ in range(count):
+            end = bits.find('0', pos)
+            value += ((end - pos) << GCS_P) + int(bits[end + 1:end + 1 + GCS_P], 2)
+            pos = end + 1 + GCS_P
+            
+            while targets[t] < value:
+                t += 1
+                if t == len(targets):
+                    return False
+            if targets[t] == value:
+                return True
+        
+        return False
+    
+    async def _update_indexes(self, transaction: Transaction, row: int):
         """
         Update custom indexes for faster querying
         """
@@ -202,12 +636,12 @@ class MempoolManager:
             # Decode transaction input
             protocol = self._identify_protocol(transaction.data)
             if protocol:
-                self.index_by_protocol.setdefault(protocol, set()).add(transaction.hash)
+                self.index_by_protocol[protocol].add(row)
             
             # Index by token
             token = self._identify_token(transaction.to_address)
             if token:
-                self.index_by_token.setdefault(token, set()).add(transaction.hash)
+                self.index_by_token[token].add(row)
             
         except Exception as e:
             logger.error(f"Error updating indexes: {e}")
@@ -216,11 +650,11 @@ class MempoolManager:
         """
         Identify the protocol based on transaction input data
         """
-        # Implement protocol identification logic
-        # This is a placeholder
-        return None
+        if isinstance(data, str):
+            data = HexBytes(data)
+        return PROTOCOL_SELECTORS.get(bytes(data[:4]))
     
-    def _identify_token(self, address: Optional[Address]) -> Optional[str]:
+    def _identify_token(self, address: Optional[bytes]) -> Optional[str]:
         """
         Identify token from address
         """
@@ -244,35 +678,66 @@ class MempoolManager:
         # This is a placeholder
         pass
     
-    def _cleanup_old_transactions(self):
+    def _cleanup_old_transactions(self, now: Optional[float] = None):
         """
         Clean up old transactions from memory
         """
-        current_time = time.time()
+        current_time = self._clock() if now is None else now
         old_threshold = current_time - self.config.get('tx_cleanup_threshold', 60)
         
-        # Remove old transactions
-        old_txs = [
-            tx_hash for tx_hash, tx in self.pending_txs.items()
-            if tx.timestamp < old_threshold
-        ]
-        
-        for tx_hash in old_txs:
-            self._remove_transaction(tx_hash)
+        # Remove old transactions from the front of the arrival order
+        arrivals = self._arrivals
+        while arrivals:
+            tx_hash = arrivals[0]
+            row = self._tx_rows.get(tx_hash)
+            if row is not None and self._row_timestamp[row] >= old_threshold:
+                break
+            arrivals.popleft()
+            if row is not None:
+                self._remove_transaction(tx_hash)
     
-    def _remove_transaction(self, tx_hash: HexStr):
+    def _remove_transaction(self, tx_hash: bytes):
         """
         Remove transaction and update indexes
         """
-        if tx_hash in self.pending_txs:
-            tx = self.pending_txs[tx_hash]
-            
-            # Remove from main storage
-            del self.pending_txs[tx_hash]
+        row = self._tx_rows.pop(_raw(tx_hash), None)
+        if row is not None:
+            # Release the row; callers may still hold the Transaction itself
+            self._row_live[row] = False
+            self._row_tx[row] = None
+            self._row_hash[row] = None
+            self._free_rows.append(row)
             
             # Remove from indexes
             if self.enable_custom_indexing:
-                self._remove_from_indexes(tx_hash)
+                self._remove_from_indexes(row)
+    
+    def _remove_from_indexes(self, row: int):
+        """
+        Drop a row from the protocol and token indexes
+        """
+        for index in (self.index_by_protocol, self.index_by_token):
+            for key in [key for key, rows in index.items() if row in rows]:
+                index[key].discard(row)
+                if not index[key]:
+                    del index[key]
+    
+    def query_indexes(self,
+                      protocol: Optional[str] = None,
+                      token: Optional[str] = None) -> List[bytes]:
+        """
+        Hashes of pending transactions matching every given index key
+        """
+        selected = [
+            index.get(key, BitMap())
+            for index, key in ((self.index_by_protocol, protocol), (self.index_by_token, token))
+            if key is not None
+        ]
+        if not selected:
+            return []
+        
+        rows = selected[0] & selected[1] if len(selected) == 2 else selected[0]
+        return self._row_hash[np.fromiter(rows, dtype=np.intp, count=len(rows))].tolist()
 
     async def scan_mempool(self) -> List[Dict]:
         """
@@ -294,17 +759,23 @@ class MempoolManager:
         """
         Filter transactions based on criteria
         """
-        filtered = []
+        count = len(transactions)
+        mask = np.ones(count, dtype=np.bool_)
         
-        for tx in transactions:
-            # Apply value filter
-            if min_value is not None and int(tx['value']) < min_value:
-                continue
-                
-            # Apply gas filter
-            if max_gas is not None and int(tx['gas']) > max_gas:
-                continue
-                
-            filtered.append(tx)
-            
-        return filtered
+        # Apply value filter. Wei overflows uint64 so values are compared as
+        # float64, with exact integer compares only where rounding ties.
+        if min_value is not None:
+            values = [int(tx['value']) for tx in transactions]
+            value_arr = np.array(values, dtype=np.float64)
+            threshold = np.float64(min_value)
+            mask &= value_arr >= threshold
+            for i in np.flatnonzero(value_arr == threshold).tolist():
+                mask[i] = values[i] >= min_value
+        
+        # Apply gas filter
+        if max_gas is not None:
+            gas_arr = np.fromiter((int(tx['gas']) for tx in transactions),
+                                  dtype=np.uint64, count=count)
+            mask &= gas_arr <= max_gas
+        
+        return [transactions[i] for i in np.flatnonzero(mask).tolist()]
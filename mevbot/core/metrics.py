@@ -1,10 +1,9 @@
 """Performance tracking and metrics collection"""
-from typing import Dict, List, Optional
+from typing import Deque, Dict, Optional
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import defaultdict, deque
 import time
 import logging
-import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +15,9 @@ class StrategyMetrics:
     failures: int = 0
     total_profit: float = 0.0
     total_gas: int = 0
-    execution_times: List[float] = field(default_factory=list)
+    total_execution_time: float = 0.0
+    # Most recent execution times only, totals above cover the full history
+    execution_times: Deque[float] = field(default_factory=lambda: deque(maxlen=1024))
     
     @property
     def success_rate(self) -> float:
@@ -35,8 +36,8 @@ class StrategyMetrics:
         
     @property
     def average_execution_time(self) -> float:
-        """Calculate average execution time"""
-        return np.mean(self.execution_times) if self.execution_times else 0
+        """Calculate average execution time per attempt"""
+        return self.total_execution_time / self.attempts if self.attempts > 0 else 0
 
 class PerformanceTracker:
     def __init__(self):
@@ -64,6 +65,7 @@ class PerformanceTracker:
             metrics.failures += 1
             
         metrics.total_gas += gas_used
+        metrics.total_execution_time += execution_time
         metrics.execution_times.append(execution_time)
         
     def get_metrics(self, strategy: str) -> Optional[StrategyMetrics]:
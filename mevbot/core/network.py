@@ -8,6 +8,11 @@ import asyncio
 import socket
 import struct
 
+try:
+    from . import _dpdk_ext
+except ImportError:
+    _dpdk_ext = None
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -183,3 +188,15 @@ class DPDKManager:
                 ("lpbk_mode", ctypes.c_uint32)
             ]
         return RteEthConf()
+    
+    def rx_burst(self, port_id: int, queue_id: int, out_ptrs, count: int) -> int:
+        """Receive up to count packets into a uint64 buffer of mbuf addresses"""
+        if _dpdk_ext is None:
+            raise RuntimeError("DPDK burst extension not built")
+        return _dpdk_ext.rx_burst(port_id, queue_id, out_ptrs, count)
+        
+    def tx_burst(self, port_id: int, queue_id: int, pkt_ptrs, count: int) -> int:
+        """Send count mbufs from a uint64 buffer of mbuf addresses"""
+        if _dpdk_ext is None:
+            raise RuntimeError("DPDK burst extension not built")
+        return _dpdk_ext.tx_burst(port_id, queue_id, pkt_ptrs, count)
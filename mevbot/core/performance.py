@@ -1,29 +1,78 @@
 """Performance Monitoring System"""
+import os
 import time
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 import psutil
 import asyncio
-from collections import deque
+from collections import defaultdict
 from dataclasses import dataclass
+from functools import partial
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
 
 logger = logging.getLogger(__name__)
 
+# Kernel counters read directly for system metrics, kept open between samples
+PROC_FILES = {
+    'stat': '/proc/stat',
+    'meminfo': '/proc/meminfo',
+    'net': '/proc/net/dev',
+    'disk': '/proc/diskstats',
+}
+SYS_BLOCK = '/sys/block'  # Whole disks, so partitions aren't counted twice
+
+class RingBuffer:
+    """Fixed-size NumPy ring buffer keeping a running sum of its contents"""
+    
+    __slots__ = ('_buf', '_idx', '_filled', '_sum')
+    
+    def __init__(self, size: int = 100, dtype=np.float64):
+        self._buf = np.zeros(size, dtype=dtype)
+        self._idx = 0
+        self._filled = 0
+        self._sum = 0.0
+        
+    def append(self, value) -> None:
+        """Store a value, overwriting the oldest once full"""
+        # Slots start zeroed, so subtracting the evicted value is always safe
+        self._sum += value - self._buf[self._idx].item()
+        self._buf[self._idx] = value
+        self._idx = (self._idx + 1) % len(self._buf)
+        self._filled = min(self._filled + 1, len(self._buf))
+        
+    @property
+    def total(self) -> float:
+        return self._sum
+        
+    def mean(self) -> float:
+        return self._sum / self._filled if self._filled else 0.0
+        
+    def values(self) -> np.ndarray:
+        """Contents oldest first"""
+        if self._filled < len(self._buf):
+            return self._buf[:self._filled]
+        return np.concatenate((self._buf[self._idx:], self._buf[:self._idx]))
+        
+    def __len__(self) -> int:
+        return self._filled
+        
+    def __iter__(self) -> Iterator:
+        return iter(self.values().tolist())
+
 @dataclass
 class LatencyMetrics:
-    rpc_calls: deque
-    tx_submissions: deque
-    calculations: deque
-    pool_updates: deque
+    rpc_calls: RingBuffer
+    tx_submissions: RingBuffer
+    calculations: RingBuffer
+    pool_updates: RingBuffer
     
     def __init__(self, maxlen: int = 1000):
-        self.rpc_calls = deque(maxlen=maxlen)
-        self.tx_submissions = deque(maxlen=maxlen)
-        self.calculations = deque(maxlen=maxlen)
-        self.pool_updates = deque(maxlen=maxlen)
+        self.rpc_calls = RingBuffer(maxlen)
+        self.tx_submissions = RingBuffer(maxlen)
+        self.calculations = RingBuffer(maxlen)
+        self.pool_updates = RingBuffer(maxlen)
 
 @dataclass
 class SystemMetrics:
@@ -38,10 +87,11 @@ class PerformanceMonitor:
     
     def __init__(self, config: Dict):
         self.config = config
-        self.success_rates = {}  # Store success rates for different operations
-        self.latencies = {}  # Store latencies for different operations
-        self.profits = []  # Store profit history
-        self.gas_costs = []  # Store gas cost history
+        # Last 100 success flags and latencies per operation, created on first use
+        self.success_rates: Dict[str, RingBuffer] = defaultdict(partial(RingBuffer, 100, np.uint8))
+        self.latencies: Dict[str, RingBuffer] = defaultdict(partial(RingBuffer, 100))
+        self.profits = RingBuffer(100)  # Store last 100 profits
+        self.gas_costs = RingBuffer(100)  # Store last 100 gas costs
         
         # Performance thresholds - more lenient in test mode
         self.thresholds = {
@@ -49,8 +99,18 @@ class PerformanceMonitor:
             'max_calc_latency': 0.5 if config.get('test_mode') else 0.05,  # 500ms in test, 50ms in prod
             'min_success_rate': 0.5 if config.get('test_mode') else 0.95,  # 50% in test, 95% in prod
             'max_memory_usage': 0.9,  # 90%
+            'max_cpu_usage': config.get('max_cpu_usage', 0.9),
             'min_profit': 0.01 if config.get('test_mode') else 0.05  # 0.01 ETH in test, 0.05 ETH in prod
         }
+        
+        # /proc handles rewound and re-read per sample, None off Linux
+        self._proc: Optional[Dict[str, object]] = None
+        self._disks: frozenset = frozenset()
+        self._cpu_times: Optional[Tuple[int, int]] = None  # (idle, total) at last sample
+        
+        # Periodic performance report, scheduled while monitor_loop runs
+        self.report_interval = config.get('report_interval', 60)
+        self._report_handle: Optional[asyncio.TimerHandle] = None
     
     @asynccontextmanager
     async def measure_latency(self, metric: str):
@@ -60,18 +120,12 @@ class PerformanceMonitor:
             yield
         finally:
             duration = time.time() - start_time
-            if metric not in self.latencies:
-                self.latencies[metric] = []
             
             # Add new latency
             self.latencies[metric].append(duration)
             
-            # Keep only last 100 measurements
-            if len(self.latencies[metric]) > 100:
-                self.latencies[metric] = self.latencies[metric][-100:]
-            
             # Calculate average latency
-            avg_latency = sum(self.latencies[metric]) / len(self.latencies[metric])
+            avg_latency = self.latencies[metric].mean()
             
             # Log warning if latency is high (adjusted for test mode)
             threshold = 0.5 if self.config.get('test_mode') else 0.1  # More lenient in test mode
@@ -81,10 +135,9 @@ class PerformanceMonitor:
     async def collect_system_metrics(self):
         """Collect system performance metrics"""
         try:
-            cpu = psutil.cpu_percent(interval=1) / 100
-            memory = psutil.virtual_memory().percent / 100
-            net_io = psutil.net_io_counters()._asdict()
-            disk_io = psutil.disk_io_counters()._asdict()
+            # Sampling touches the filesystem, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            cpu, memory, net_io, disk_io = await loop.run_in_executor(None, self._sample_system)
             
             metrics = SystemMetrics(
                 cpu_usage=cpu,
@@ -103,20 +156,101 @@ class PerformanceMonitor:
         except Exception as e:
             logger.error(f"Error collecting system metrics: {e}")
     
+    def _sample_system(self) -> Tuple[float, float, Dict[str, int], Dict[str, int]]:
+        """Sample CPU, memory, network and disk counters in one pass"""
+        if self._proc is None:
+            try:
+                self._proc = {name: open(path, 'rb', buffering=0) for name, path in PROC_FILES.items()}
+                self._disks = frozenset(os.listdir(SYS_BLOCK))
+            except OSError:
+                self._proc = {}
+        
+        if not self._proc:
+            # No procfs, psutil reports CPU usage since its previous call
+            return (
+                psutil.cpu_percent(interval=None) / 100,
+                psutil.virtual_memory().percent / 100,
+                psutil.net_io_counters()._asdict(),
+                psutil.disk_io_counters()._asdict()
+            )
+        
+        raw = {}
+        for name, handle in self._proc.items():
+            handle.seek(0)
+            raw[name] = handle.read()
+        
+        return (
+            self._parse_cpu(raw['stat']),
+            self._parse_memory(raw['meminfo']),
+            self._parse_net(raw['net']),
+            self._parse_disk(raw['disk'])
+        )
+    
+    def _parse_cpu(self, stat: bytes) -> float:
+        """CPU busy fraction since the previous sample, from the aggregate cpu line"""
+        fields = [int(value) for value in stat[:stat.index(b'\n')].split()[1:9]]
+        idle = fields[3] + fields[4]  # idle + iowait
+        total = sum(fields)
+        
+        previous, self._cpu_times = self._cpu_times, (idle, total)
+        if previous is None or total == previous[1]:
+            return 0.0
+        return 1 - (idle - previous[0]) / (total - previous[1])
+    
+    @staticmethod
+    def _parse_memory(meminfo: bytes) -> float:
+        """Used memory fraction, counting reclaimable memory as free"""
+        values = {}
+        for line in meminfo.splitlines():
+            key, _, rest = line.partition(b':')
+            if key in (b'MemTotal', b'MemAvailable'):
+                values[key] = int(rest.split()[0])
+                if len(values) == 2:
+                    break
+        return 1 - values[b'MemAvailable'] / values[b'MemTotal']
+    
+    @staticmethod
+    def _parse_net(dev: bytes) -> Dict[str, int]:
+        """Network counters summed over every interface"""
+        totals = np.zeros(16, dtype=np.int64)
+        for line in dev.splitlines()[2:]:
+            totals += np.array(line.partition(b':')[2].split()[:16], dtype=np.int64)
+        
+        return {
+            'bytes_sent': int(totals[8]),
+            'bytes_recv': int(totals[0]),
+            'packets_sent': int(totals[9]),
+            'packets_recv': int(totals[1]),
+            'errin': int(totals[2]),
+            'errout': int(totals[10]),
+            'dropin': int(totals[3]),
+            'dropout': int(totals[11]),
+        }
+    
+    def _parse_disk(self, diskstats: bytes) -> Dict[str, int]:
+        """Disk counters summed over whole disks"""
+        totals = np.zeros(8, dtype=np.int64)
+        for line in diskstats.splitlines():
+            fields = line.split()
+            if fields[2].decode() in self._disks:
+                totals += np.array(fields[3:11], dtype=np.int64)
+        
+        return {
+            'read_count': int(totals[0]),
+            'write_count': int(totals[4]),
+            'read_bytes': int(totals[2]) * 512,  # Sectors are always 512 bytes here
+            'write_bytes': int(totals[6]) * 512,
+            'read_time': int(totals[3]),
+            'write_time': int(totals[7]),
+        }
+    
     def update_success_rate(self, metric: str, success: bool) -> None:
         """Update success rate for a given metric"""
-        if metric not in self.success_rates:
-            self.success_rates[metric] = []
-        
         # Add new result
-        self.success_rates[metric].append(success)
-        
-        # Keep only last 100 results
-        if len(self.success_rates[metric]) > 100:
-            self.success_rates[metric] = self.success_rates[metric][-100:]
+        self.success_rates[metric].append(int(success))
         
         # Calculate success rate
-        rate = sum(self.success_rates[metric]) / len(self.success_rates[metric])
+        rate = self.success_rates[metric].mean()
         
         # Log warning if success rate is low (more lenient in test mode)
         threshold = 0.5 if self.config.get('test_mode') else 0.95
@@ -130,14 +264,9 @@ class PerformanceMonitor:
             self.profits.append(net_profit)
             self.gas_costs.append(gas_cost)
             
-            # Keep only last 100 records
-            if len(self.profits) > 100:
-                self.profits = self.profits[-100:]
-                self.gas_costs = self.gas_costs[-100:]
-            
             # Calculate total profits
-            total_profit = sum(self.profits)
-            total_gas = sum(self.gas_costs) / 1e18  # Convert to ETH
+            total_profit = self.profits.total
+            total_gas = self.gas_costs.total / 1e18  # Convert to ETH
             
             # Log significant profits
             threshold = 0.01 if self.config.get('test_mode') else 0.05  # Lower threshold in test mode
@@ -151,17 +280,19 @@ class PerformanceMonitor:
         """Generate comprehensive performance report"""
         try:
             # Calculate metrics
-            rpc_latency = np.mean(list(self.latencies.get('rpc_calls', []))) if self.latencies.get('rpc_calls', []) else 0
-            calc_latency = np.mean(list(self.latencies.get('calculations', []))) if self.latencies.get('calculations', []) else 0
+            rpc_calls = self.latencies.get('rpc_calls')
+            calculations = self.latencies.get('calculations')
+            rpc_latency = np.mean(rpc_calls.values()) if rpc_calls else 0
+            calc_latency = np.mean(calculations.values()) if calculations else 0
             success_rates = {
-                k: np.mean(list(v)) if v else 0
+                k: np.mean(v.values()) if v else 0
                 for k, v in self.success_rates.items()
             }
             
             # Calculate profit metrics
-            profits = list(self.profits)
-            total_profit = sum(profits)
-            avg_profit = np.mean(profits) if profits else 0
+            profits = self.profits.values()
+            total_profit = self.profits.total
+            avg_profit = np.mean(profits) if len(profits) else 0
             profit_std = np.std(profits) if len(profits) > 1 else 0
             
             return {
@@ -185,19 +316,31 @@ class PerformanceMonitor:
             logger.error(f"Error generating performance report: {e}")
             return {}
     
+    def _emit_report(self):
+        """Log a performance report and schedule the next one"""
+        self._report_handle = asyncio.get_running_loop().call_later(
+            self.report_interval, self._emit_report
+        )
+        report = self.get_performance_report()
+        logger.info(f"Performance Report: {report}")
+    
     async def monitor_loop(self):
         """Continuous monitoring loop"""
-        while True:
-            try:
-                await self.collect_system_metrics()
-                
-                # Generate and log report every minute
-                if datetime.now().second == 0:
-                    report = self.get_performance_report()
-                    logger.info(f"Performance Report: {report}")
-                
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                await asyncio.sleep(5)
+        # Reports run on their own timer rather than polling the wall clock
+        if self._report_handle is None:
+            self._report_handle = asyncio.get_running_loop().call_later(
+                self.report_interval, self._emit_report
+            )
+        
+        try:
+            while True:
+                try:
+                    await self.collect_system_metrics()
+                    await asyncio.sleep(1)
+                    
+                except Exception as e:
+                    logger.error(f"Error in monitoring loop: {e}")
+                    await asyncio.sleep(5)
+        finally:
+            self._report_handle.cancel()
+            self._report_handle = None
@@ -1,7 +1,8 @@
 """Circuit breaker system for MEV bot safety controls."""
 import time
 import logging
-from typing import Dict, Optional, List
+from typing import Deque, Dict, List, Optional, Tuple
+from collections import deque
 from decimal import Decimal
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -10,22 +11,34 @@ from web3 import Web3
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+WEI_PER_ETHER = 10**18
+WEI_PER_GWEI = 10**9
+
+def _to_wei(amount, unit: int = WEI_PER_ETHER) -> int:
+    """Convert a configured amount (str, int, float or Decimal) to integer wei."""
+    if type(amount) is int:
+        # Whole units scale exactly, no Decimal round trip needed
+        return amount * unit
+    return int(Decimal(str(amount)) * unit)
+
+# All amounts below are integer wei, so per-transaction checks are plain int math
+
+@dataclass(slots=True)
 class PositionLimit:
-    max_size: Decimal
-    current_size: Decimal = Decimal('0')
+    max_size: int
+    current_size: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class GasLimit:
-    max_price_gwei: int
-    max_daily_spend: Decimal
-    current_daily_spend: Decimal = Decimal('0')
+    max_price: int
+    max_daily_spend: int
+    current_daily_spend: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class ProfitMetrics:
-    min_profit_threshold: Decimal
-    max_daily_loss: Decimal
-    current_daily_pnl: Decimal = Decimal('0')
+    min_profit_threshold: int
+    max_daily_loss: int
+    current_daily_pnl: int = 0
 
 class CircuitBreaker:
     """
@@ -37,6 +50,11 @@ class CircuitBreaker:
     - Profit/loss thresholds
     - Transaction rate limiting
     - Slippage protection
+    
+    Checks and counters are synchronous and unlocked. This relies on a single
+    writer: only the coroutine validating transactions on the event loop
+    thread mutates the counters, so no await can interleave a read and its
+    update.
     """
     
     def __init__(self, config: Dict):
@@ -47,27 +65,29 @@ class CircuitBreaker:
         self.trigger_reason = None
         
         # Initialize limits
+        # Limits are configured in ether (gas price in gwei) and held in wei
         self.position_limit = PositionLimit(
-            max_size=Decimal(str(config['max_position_size'])),
+            max_size=_to_wei(config['max_position_size']),
         )
         
         self.gas_limit = GasLimit(
-            max_price_gwei=config['max_gas_price_gwei'],
-            max_daily_spend=Decimal(str(config['max_daily_gas_spend'])),
+            max_price=_to_wei(config['max_gas_price_gwei'], WEI_PER_GWEI),
+            max_daily_spend=_to_wei(config['max_daily_gas_spend']),
         )
         
         self.profit_metrics = ProfitMetrics(
-            min_profit_threshold=Decimal(str(config['min_profit_threshold'])),
-            max_daily_loss=Decimal(str(config['max_daily_loss'])),
+            min_profit_threshold=_to_wei(config['min_profit_threshold']),
+            max_daily_loss=_to_wei(config['max_daily_loss']),
         )
         
         # Transaction rate limiting
         self.tx_window = float(config.get('tx_rate_window', 60))  # 60 seconds default
         self.max_tx_per_window = config.get('max_tx_per_window', 10)
-        self.tx_timestamps: List[float] = []
+        self.tx_timestamps: Deque[float] = deque()  # Monotonic, oldest first
         
-        # Slippage protection
+        # Slippage protection, as an exact fraction for integer comparison
         self.max_slippage = Decimal(str(config.get('max_slippage', '0.01')))  # 1% default
+        self._max_slippage_num, self._max_slippage_den = self.max_slippage.as_integer_ratio()
         
         # Last check time
         self.last_health_check = time.time()
@@ -75,118 +95,132 @@ class CircuitBreaker:
     
     async def validate_transaction(self, tx: Dict) -> bool:
         """Validate if a transaction meets all safety criteria."""
+        return (await self.validate_batch([tx]))[0]
+    
+    async def validate_batch(self, txs: List[Dict]) -> List[bool]:
+        """
+        Validate candidate transactions in one pass.
+        
+        The health check and clock read are shared by the whole batch. Each
+        transaction is checked against the totals including every earlier
+        acceptance in the batch, and accepted deltas are recorded at the end.
+        A transaction that cannot be checked is rejected without affecting the
+        rest of the batch.
+        """
+        results = [False] * len(txs)
         if not self.enabled:
             logger.warning("Circuit breaker is disabled")
-            return False
+            return results
             
         try:
-            # Check system health
-            await self._check_system_health()
+            self._check_system_health()
             
-            # Check if breaker is triggered
             if self.triggered:
                 logger.warning("Circuit breaker is triggered")
-                return False
+                return results
             
-            # Get transaction details
-            value = Decimal(str(Web3.from_wei(tx['value'], 'ether')))
-            gas_price = Decimal(str(Web3.from_wei(tx.get('gasPrice', 0), 'gwei'))) if 'gasPrice' in tx else Decimal('0')
-            gas = Decimal(str(tx.get('gas', 21000)))  # Default gas limit
-            expected_profit = Decimal(str(Web3.from_wei(tx.get('expected_profit', 0), 'ether')))
+            now = time.monotonic()
+            timestamps = self.tx_timestamps
+            while timestamps and now - timestamps[0] > self.tx_window:
+                timestamps.popleft()
             
-            # Check position size
-            if not await self._check_position_size(value):
-                return False
-                
-            # Check gas limits
-            if not await self._check_gas_limits(gas_price, gas):
-                return False
-                
-            # Check transaction rate
-            if not await self._check_tx_rate():
-                return False
-                
-            # Check profit threshold
-            if not await self._check_profit_threshold(expected_profit):
-                return False
-                
-            # Check slippage if applicable
-            if 'expected_price' in tx and 'actual_price' in tx:
-                expected_price = Decimal(str(Web3.from_wei(tx['expected_price'], 'ether')))
-                actual_price = Decimal(str(Web3.from_wei(tx['actual_price'], 'ether')))
-                if not await self._check_slippage(expected_price, actual_price):
-                    return False
+            position = self.position_limit.current_size
+            gas_spend = self.gas_limit.current_daily_spend
+            accepted = 0
+            validate_one = self._validate_one_sync
             
-            # All checks passed, record transaction
-            self.tx_timestamps.append(time.time())
-            self.position_limit.current_size += value
+            for i, tx in enumerate(txs):
+                try:
+                    deltas, reason = validate_one(tx, position, gas_spend, len(timestamps) + accepted)
+                except Exception as e:
+                    # A malformed transaction is rejected on its own
+                    logger.error(f"Transaction validation failed: {str(e)}")
+                    continue
+                if deltas is None:
+                    if reason is not None:
+                        # Tripped, so nothing later in the batch can pass
+                        self.trigger_breaker(reason)
+                        break
+                    continue
+                position += deltas[0]
+                gas_spend += deltas[1]
+                accepted += 1
+                results[i] = True
             
-            return True
+            # Record every accepted transaction at once
+            timestamps.extend([now] * accepted)
+            self.position_limit.current_size = position
+            self.gas_limit.current_daily_spend = gas_spend
             
-        except Exception as e:
-            logger.error(f"Transaction validation failed: {str(e)}")
-            return False
-    
-    async def _check_position_size(self, value: Decimal) -> bool:
-        """Check if position size is within limits."""
-        if self.position_limit.current_size + value > self.position_limit.max_size:
-            await self.trigger_breaker(f"Position size limit exceeded: {self.position_limit.current_size + value} > {self.position_limit.max_size}")
-            return False
-        return True
-    
-    async def _check_gas_limits(self, gas_price: Decimal, gas: Decimal) -> bool:
-        """Check if gas price and total spend are within limits."""
-        if gas_price > self.gas_limit.max_price_gwei:
-            await self.trigger_breaker(f"Gas price too high: {gas_price} > {self.gas_limit.max_price_gwei}")
-            return False
+            return results
             
-        gas_cost = gas_price * gas / Decimal('1000000000')  # Convert to ETH
-        if self.gas_limit.current_daily_spend + gas_cost > self.gas_limit.max_daily_spend:
-            await self.trigger_breaker("Daily gas spend limit would be exceeded")
-            return False
-            
-        self.gas_limit.current_daily_spend += gas_cost
-        return True
+        except Exception as e:
+            logger.error(f"Batch validation failed: {str(e)}")
+            return [False] * len(txs)
     
-    async def _check_tx_rate(self) -> bool:
-        """Check if transaction rate is within limits."""
-        current_time = time.time()
+    def _validate_one_sync(self, tx: Dict, position: int, gas_spend: int,
+                           tx_count: int) -> Tuple[Optional[Tuple[int, int]], Optional[str]]:
+        """
+        Check one transaction against running batch totals without touching state.
         
-        # Remove expired timestamps
-        self.tx_timestamps = [t for t in self.tx_timestamps if current_time - t <= self.tx_window]
+        Returns:
+            ((value, gas_cost), None) if accepted, otherwise (None, reason) where
+            reason is set only when the rejection should trigger the breaker
+        """
+        value = tx['value']
+        gas_price = tx.get('gasPrice', 0)
+        gas_cost = gas_price * tx.get('gas', 21000)
         
-        # Check if we would exceed the rate limit
-        if len(self.tx_timestamps) >= self.max_tx_per_window:
-            logger.warning(f"Transaction rate limit reached: {len(self.tx_timestamps)} >= {self.max_tx_per_window}")
-            return False
-            
-        return True
-    
-    async def _check_profit_threshold(self, expected_profit: Decimal) -> bool:
-        """Check if expected profit meets minimum threshold."""
+        if position + value > self.position_limit.max_size:
+            return None, (
+                f"Position size limit exceeded: "
+                f"{Web3.from_wei(position + value, 'ether')} > "
+                f"{Web3.from_wei(self.position_limit.max_size, 'ether')}"
+            )
+        
+        if gas_price > self.gas_limit.max_price:
+            return None, (
+                f"Gas price too high: {Web3.from_wei(gas_price, 'gwei')} > "
+                f"{Web3.from_wei(self.gas_limit.max_price, 'gwei')}"
+            )
+        
+        if gas_spend + gas_cost > self.gas_limit.max_daily_spend:
+            return None, "Daily gas spend limit would be exceeded"
+        
+        if tx_count >= self.max_tx_per_window:
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Transaction rate limit reached: %d >= %d", tx_count, self.max_tx_per_window)
+            return None, None
+        
+        expected_profit = tx.get('expected_profit', 0)
         if expected_profit < self.profit_metrics.min_profit_threshold:
-            await self.trigger_breaker(f"Profit below minimum threshold: {expected_profit} < {self.profit_metrics.min_profit_threshold}")
-            return False
-        return True
-    
-    async def _check_slippage(self, expected_price: Decimal, actual_price: Decimal) -> bool:
-        """Check if price slippage is within acceptable range."""
-        slippage = abs(actual_price - expected_price) / expected_price
-        if slippage > self.max_slippage:
-            await self.trigger_breaker(f"Slippage too high: {slippage} > {self.max_slippage}")
-            return False
-        return True
+            return None, (
+                f"Profit below minimum threshold: {Web3.from_wei(expected_profit, 'ether')} < "
+                f"{Web3.from_wei(self.profit_metrics.min_profit_threshold, 'ether')}"
+            )
+        
+        if 'expected_price' in tx and 'actual_price' in tx:
+            expected_price = tx['expected_price']
+            if expected_price <= 0:
+                logger.warning("Invalid expected price: %s", expected_price)
+                return None, None
+            deviation = abs(tx['actual_price'] - expected_price)
+            if deviation * self._max_slippage_den > expected_price * self._max_slippage_num:
+                slippage = Decimal(deviation) / Decimal(expected_price)
+                return None, f"Slippage too high: {slippage} > {self.max_slippage}"
+        
+        return (value, gas_cost), None
     
     async def record_profit_loss(self, amount: Decimal) -> None:
-        """Record profit/loss from a transaction."""
-        self.profit_metrics.current_daily_pnl += amount
+        """Record profit/loss in ether from a transaction."""
+        self.profit_metrics.current_daily_pnl += _to_wei(amount)
         
         if self.profit_metrics.current_daily_pnl <= -self.profit_metrics.max_daily_loss:
-            await self.trigger_breaker("Maximum daily loss exceeded")
+            self.trigger_breaker("Maximum daily loss exceeded")
     
-    async def trigger_breaker(self, reason: str) -> None:
+    def trigger_breaker(self, reason: str) -> None:
         """Trigger the circuit breaker."""
-        logger.warning(f"Circuit breaker triggered: {reason}")
+        logger.warning("Circuit breaker triggered: %s", reason)
         self.triggered = True
         self.trigger_reason = reason
     
@@ -196,12 +230,12 @@ class CircuitBreaker:
         self.triggered = False
         self.trigger_reason = None
         self.tx_timestamps.clear()
-        self.position_limit.current_size = Decimal('0')
-        self.gas_limit.current_daily_spend = Decimal('0')
-        self.profit_metrics.current_daily_pnl = Decimal('0')
+        self.position_limit.current_size = 0
+        self.gas_limit.current_daily_spend = 0
+        self.profit_metrics.current_daily_pnl = 0
         self.last_metrics_reset = time.time()
     
-    async def _check_system_health(self) -> None:
+    def _check_system_health(self) -> None:
         """Check system health and reset metrics if needed."""
         current_time = time.time()
         
@@ -209,9 +243,9 @@ class CircuitBreaker:
         if current_time - self.last_metrics_reset >= self.config.get('metrics_reset_interval', 86400):
             logger.info("Resetting daily metrics")
             # Reset metrics but preserve breaker state
-            self.position_limit.current_size = Decimal('0')
-            self.gas_limit.current_daily_spend = Decimal('0')
-            self.profit_metrics.current_daily_pnl = Decimal('0')
+            self.position_limit.current_size = 0
+            self.gas_limit.current_daily_spend = 0
+            self.profit_metrics.current_daily_pnl = 0
             self.tx_timestamps.clear()
             self.last_metrics_reset = current_time
             return
@@ -220,21 +254,21 @@ class CircuitBreaker:
         if current_time - self.last_health_check >= self.config.get('health_check_interval', 60):
             # Check position limits
             if self.position_limit.current_size > self.position_limit.max_size:
-                await self.trigger_breaker("Position limit exceeded")
+                self.trigger_breaker("Position limit exceeded")
             
             # Check daily loss
             if self.profit_metrics.current_daily_pnl <= -self.profit_metrics.max_daily_loss:
-                await self.trigger_breaker("Maximum daily loss exceeded")
+                self.trigger_breaker("Maximum daily loss exceeded")
             
             # Check gas spend
             if self.gas_limit.current_daily_spend > self.gas_limit.max_daily_spend:
-                await self.trigger_breaker("Daily gas spend limit exceeded")
+                self.trigger_breaker("Daily gas spend limit exceeded")
             
             self.last_health_check = current_time
     
     async def emergency_shutdown(self):
         """Trigger emergency shutdown."""
-        await self.trigger_breaker("Emergency shutdown activated")
+        self.trigger_breaker("Emergency shutdown activated")
 
     def is_triggered(self) -> bool:
         """Check if circuit breaker has been triggered."""
@@ -3,17 +3,17 @@ import os
 import time
 import asyncio
 import logging
-from typing import Dict, Optional, Set
+from typing import Dict, List, Optional, Set
 from dataclasses import dataclass
 from web3 import Web3
 
 from mevbot.core.security.key_manager import SecureKeyManager
-from mevbot.core.safety.circuit_breaker import CircuitBreaker
+from mevbot.core.safety.circuit_breaker import CircuitBreaker, WEI_PER_GWEI, _to_wei
 from mevbot.core.safety.emergency_manager import EmergencyManager, EmergencyLevel, EmergencyEvent
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class SafetyMetrics:
     """Safety system metrics."""
     total_transactions: int = 0
@@ -47,6 +47,14 @@ class SafetyCoordinator:
         self.circuit_breaker = CircuitBreaker(config.get('circuit_breaker', {}))
         self.emergency_manager = EmergencyManager(config.get('emergency_manager', {}), web3)
         
+        # Gas price cap in wei, so per-transaction checks are int compares
+        self._max_gas_price_wei = _to_wei(config.get('max_gas_price_gwei', 1000), WEI_PER_GWEI)
+        
+        # Whitelisted contracts, lowercased so checksummed addresses match
+        self._whitelist = frozenset(
+            address.lower() for address in config.get('contract_whitelist', [])
+        )
+        
         # Track active strategies
         self.active_strategies: Set[str] = set()
         
@@ -110,18 +118,18 @@ class SafetyCoordinator:
             bool: True if transaction is safe, False otherwise
         """
         try:
-            # Check circuit breaker first
-            if not await self.circuit_breaker.validate_transaction(tx):
-                self.metrics.circuit_breaks += 1
-                return False
-            
-            # Additional safety checks
+            # Stateless checks first, so the circuit breaker only records
+            # transactions that every other check accepts
             if not self._validate_gas_price(tx):
                 return False
             
             if not self._validate_contract_interaction(tx):
                 return False
             
+            if not await self.circuit_breaker.validate_transaction(tx):
+                self.metrics.circuit_breaks += 1
+                return False
+            
             self.metrics.total_transactions += 1
             return True
             
@@ -129,14 +137,55 @@ class SafetyCoordinator:
             logger.error(f"Error validating transaction: {str(e)}")
             return False
     
+    async def validate_batch(self, txs: List[Dict]) -> List[bool]:
+        """
+        Validate candidate transactions against all safety checks in one pass.
+        
+        Gas price and contract checks run first, so the circuit breaker only
+        records transactions that every check accepts.
+        
+        Args:
+            txs: Transaction dictionaries with details
+        
+        Returns:
+            List[bool]: Per-transaction result, in input order
+        """
+        results = [False] * len(txs)
+        try:
+            validate_gas_price = self._validate_gas_price
+            validate_contract = self._validate_contract_interaction
+            candidates = [
+                i for i, tx in enumerate(txs)
+                if validate_gas_price(tx) and validate_contract(tx)
+            ]
+            if not candidates:
+                return results
+            
+            accepted = await self.circuit_breaker.validate_batch([txs[i] for i in candidates])
+            for i, ok in zip(candidates, accepted):
+                results[i] = ok
+            
+            passed = sum(accepted)
+            self.metrics.circuit_breaks += len(candidates) - passed
+            self.metrics.total_transactions += passed
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error validating transaction batch: {str(e)}")
+            return [False] * len(txs)
+    
     def _validate_gas_price(self, tx: Dict) -> bool:
         """Validate gas price is within safe limits."""
         try:
-            gas_price = self.web3.from_wei(tx['gasPrice'], 'gwei')
-            max_gas = self.config.get('max_gas_price_gwei', 1000)
+            gas_price = tx['gasPrice']
             
-            if gas_price > max_gas:
-                logger.warning(f"Gas price {gas_price} gwei exceeds maximum {max_gas}")
+            if gas_price > self._max_gas_price_wei:
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning(
+                        "Gas price %s gwei exceeds maximum %s",
+                        self.web3.from_wei(gas_price, 'gwei'),
+                        self.web3.from_wei(self._max_gas_price_wei, 'gwei')
+                    )
                 return False
             
             return True
@@ -150,10 +199,9 @@ class SafetyCoordinator:
             # Check if contract is whitelisted
             if 'to' in tx and tx['to']:
                 contract_address = tx['to']
-                whitelist = self.config.get('contract_whitelist', [])
                 
-                if contract_address not in whitelist:
-                    logger.warning(f"Contract {contract_address} not in whitelist")
+                if contract_address.lower() not in self._whitelist:
+                    logger.warning("Contract %s not in whitelist", contract_address)
                     return False
             
             return True
@@ -161,6 +209,14 @@ class SafetyCoordinator:
             logger.error(f"Error validating contract interaction: {str(e)}")
             return False
     
+    async def check_network_conditions(self) -> bool:
+        """Check if network conditions allow strategy execution."""
+        return await self._check_network_conditions()
+    
+    async def check_system_resources(self) -> bool:
+        """Check if system resources allow strategy execution."""
+        return self._check_system_resources()
+    
     async def register_strategy(self, strategy_id: str) -> None:
         """Register an active trading strategy."""
         self.active_strategies.add(strategy_id)
@@ -300,13 +356,9 @@ class SafetyCoordinator:
         try:
             # Check gas price
             gas_price = self.web3.eth.gas_price
-            max_gas = self.web3.to_wei(
-                self.config.get('max_gas_price_gwei', 1000),
-                'gwei'
-            )
             
-            if gas_price > max_gas:
-                logger.warning(f"High gas price: {self.web3.from_wei(gas_price, 'gwei')} gwei")
+            if gas_price > self._max_gas_price_wei:
+                logger.warning("High gas price: %s gwei", self.web3.from_wei(gas_price, 'gwei'))
                 return False
             
             # Check block time
@@ -1,7 +1,7 @@
 """Base Strategy with Optimizations"""
 from abc import ABC, abstractmethod
 import numpy as np
-from typing import Optional, List, Dict, Tuple, Any
+from typing import Optional, List, Dict, Tuple, Any, Callable
 import logging
 import asyncio
 from web3 import Web3
@@ -13,6 +13,13 @@ logger = logging.getLogger(__name__)
 class BaseStrategy(ABC):
     """Base class for MEV strategies with optimizations"""
     
+    # Wakes the loop manager when the strategy has work, set by bind_wakeup
+    _wakeup: Optional[Callable[[], None]] = None
+    
+    # Flip this strategy's readiness bit in the loop manager, set by bind_readiness
+    _on_ready: Optional[Callable[[str], None]] = None
+    _on_not_ready: Optional[Callable[[str], None]] = None
+    
     def __init__(self, config: Dict, web3: Web3):
         """Initialize strategy with configuration."""
         self.config = config
@@ -33,6 +40,7 @@ class BaseStrategy(ABC):
             
         logger.info(f"Starting strategy {self.strategy_id}")
         self.running = True
+        self.mark_ready()
         
     async def stop(self) -> None:
         """Stop the strategy."""
@@ -41,6 +49,33 @@ class BaseStrategy(ABC):
             
         logger.info(f"Stopping strategy {self.strategy_id}")
         self.running = False
+        self.mark_not_ready()
+        
+    def bind_wakeup(self, wakeup: Callable[[], None]) -> None:
+        """Register the callback that wakes the execution loop."""
+        self._wakeup = wakeup
+        
+    def bind_readiness(self,
+                       on_ready: Callable[[str], None],
+                       on_not_ready: Callable[[str], None]) -> None:
+        """Register the callbacks that arm and disarm this strategy in the loop."""
+        self._on_ready = on_ready
+        self._on_not_ready = on_not_ready
+        
+    def mark_ready(self) -> None:
+        """Arm this strategy for execution."""
+        if self._on_ready:
+            self._on_ready(self.get_id())
+        
+    def mark_not_ready(self) -> None:
+        """Disarm this strategy until mark_ready is called."""
+        if self._on_not_ready:
+            self._on_not_ready(self.get_id())
+        
+    def signal_opportunity(self) -> None:
+        """Wake the execution loop because this strategy has work to do."""
+        if self._wakeup:
+            self._wakeup()
         
     def is_ready(self) -> bool:
         """Check if strategy is ready to execute."""
@@ -1,9 +1,40 @@
+import shutil
+import subprocess
+
 from setuptools import setup, find_packages
 
+
+def dpdk_extensions():
+    """Build the DPDK burst bindings when Cython and libdpdk are available"""
+    try:
+        from Cython.Build import cythonize
+        from setuptools import Extension
+    except ImportError:
+        return []
+    
+    if not shutil.which('pkg-config'):
+        return []
+    try:
+        cflags = subprocess.check_output(['pkg-config', '--cflags', 'libdpdk'], text=True).split()
+        libs = subprocess.check_output(['pkg-config', '--libs', 'libdpdk'], text=True).split()
+    except subprocess.CalledProcessError:
+        return []
+    
+    return cythonize([
+        Extension(
+            'mevbot.core._dpdk_ext',
+            ['mevbot/core/_dpdk_ext.pyx'],
+            extra_compile_args=cflags + ['-O3', '-march=native'],
+            extra_link_args=libs
+        )
+    ])
+
+
 setup(
     name="mevbot",
     version="0.1.0",
     packages=find_packages(),
+    ext_modules=dpdk_extensions(),
     install_requires=[
         "web3>=6.0.0",
         "numpy>=1.21.0",
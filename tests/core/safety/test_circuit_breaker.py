@@ -6,7 +6,7 @@ import asyncio
 from decimal import Decimal
 from web3 import Web3
 
-from mevbot.core.safety.circuit_breaker import CircuitBreaker
+from mevbot.core.safety.circuit_breaker import CircuitBreaker, WEI_PER_GWEI, _to_wei
 
 pytestmark = pytest.mark.asyncio
 
@@ -146,7 +146,7 @@ async def test_metrics_reset(circuit_breaker):
     await asyncio.sleep(1.1)
     
     # Force a health check to process the reset
-    await circuit_breaker._check_system_health()
+    circuit_breaker._check_system_health()
     
     # Verify metrics were reset
     assert circuit_breaker.position_limit.current_size == Decimal('0')
@@ -170,7 +170,7 @@ async def test_emergency_shutdown(circuit_breaker):
 async def test_breaker_reset(circuit_breaker):
     """Test circuit breaker reset functionality."""
     # Trigger the breaker
-    await circuit_breaker.trigger_breaker("Test trigger")
+    circuit_breaker.trigger_breaker("Test trigger")
     assert circuit_breaker.is_triggered()
     
     # Reset the breaker
@@ -184,3 +184,84 @@ async def test_breaker_reset(circuit_breaker):
         'expected_profit': Web3.to_wei(0.2, 'ether')
     }
     assert await circuit_breaker.validate_transaction(tx)
+
+async def test_limits_tracked_in_wei(circuit_breaker):
+    """Test limits and running totals are exact integer wei."""
+    assert circuit_breaker.position_limit.max_size == Web3.to_wei(100, 'ether')
+    assert circuit_breaker.gas_limit.max_price == Web3.to_wei(500, 'gwei')
+    
+    tx = {
+        'value': Web3.to_wei(1, 'ether') + 1,
+        'gasPrice': Web3.to_wei(400, 'gwei'),
+        'gas': 21000,
+        'expected_profit': Web3.to_wei(0.1, 'ether')  # Exactly at the threshold
+    }
+    assert await circuit_breaker.validate_transaction(tx)
+    assert circuit_breaker.position_limit.current_size == Web3.to_wei(1, 'ether') + 1
+    assert circuit_breaker.gas_limit.current_daily_spend == Web3.to_wei(400, 'gwei') * 21000
+    
+    await circuit_breaker.record_profit_loss(Decimal('-0.5'))
+    assert circuit_breaker.profit_metrics.current_daily_pnl == -Web3.to_wei(0.5, 'ether')
+
+async def test_rejected_transaction_not_recorded(circuit_breaker):
+    """Test a transaction failing a later check leaves no accounting behind."""
+    tx = {
+        'value': Web3.to_wei(1, 'ether'),
+        'gasPrice': Web3.to_wei(100, 'gwei'),
+        'gas': 21000,
+        'expected_profit': Web3.to_wei(0.05, 'ether')  # Below threshold
+    }
+    assert not await circuit_breaker.validate_transaction(tx)
+    
+    assert circuit_breaker.gas_limit.current_daily_spend == 0
+    assert circuit_breaker.position_limit.current_size == 0
+    assert len(circuit_breaker.tx_timestamps) == 0
+
+async def test_validate_batch(circuit_breaker):
+    """Test a batch is checked against running totals and committed once."""
+    profit = Web3.to_wei(0.2, 'ether')
+    txs = [
+        {'value': Web3.to_wei(60, 'ether'), 'expected_profit': profit},
+        {'value': Web3.to_wei(1, 'ether'), 'gasPrice': Web3.to_wei(10, 'gwei'), 'expected_profit': profit},
+        {'value': Web3.to_wei(1, 'ether'), 'expected_profit': profit},  # Over the rate limit
+    ]
+    assert await circuit_breaker.validate_batch(txs) == [True, True, False]
+    assert not circuit_breaker.is_triggered()
+    
+    assert circuit_breaker.position_limit.current_size == Web3.to_wei(61, 'ether')
+    assert circuit_breaker.gas_limit.current_daily_spend == Web3.to_wei(10, 'gwei') * 21000
+    assert len(circuit_breaker.tx_timestamps) == 2
+    
+    # Earlier acceptances in the batch count toward the position limit
+    await circuit_breaker.reset_breaker()
+    txs = [
+        {'value': Web3.to_wei(60, 'ether'), 'expected_profit': profit},
+        {'value': Web3.to_wei(50, 'ether'), 'expected_profit': profit},
+    ]
+    assert await circuit_breaker.validate_batch(txs) == [True, False]
+    assert circuit_breaker.is_triggered()
+    assert circuit_breaker.position_limit.current_size == Web3.to_wei(60, 'ether')
+
+async def test_validate_batch_malformed_transaction(circuit_breaker):
+    """Test a malformed transaction is rejected without failing the batch."""
+    profit = Web3.to_wei(0.2, 'ether')
+    txs = [
+        {'value': Web3.to_wei(10, 'ether'), 'expected_profit': profit},
+        {'expected_profit': profit},  # No value
+        {'value': Web3.to_wei(1, 'ether'), 'expected_profit': profit,
+         'expected_price': 0, 'actual_price': Web3.to_wei(1, 'ether')},
+        {'value': Web3.to_wei(5, 'ether'), 'expected_profit': profit},
+    ]
+    assert await circuit_breaker.validate_batch(txs) == [True, False, False, True]
+    assert not circuit_breaker.is_triggered()
+    
+    assert circuit_breaker.position_limit.current_size == Web3.to_wei(15, 'ether')
+    assert len(circuit_breaker.tx_timestamps) == 2
+
+async def test_to_wei_conversion(circuit_breaker):
+    """Test amounts of every configured type convert to exact wei."""
+    assert _to_wei(3) == Web3.to_wei(3, 'ether')
+    assert _to_wei(500, WEI_PER_GWEI) == Web3.to_wei(500, 'gwei')
+    assert _to_wei('0.1') == Web3.to_wei(Decimal('0.1'), 'ether')
+    assert _to_wei(0.1) == Web3.to_wei(Decimal('0.1'), 'ether')
+    assert _to_wei(Decimal('-2.5')) == -Web3.to_wei(Decimal('2.5'), 'ether')
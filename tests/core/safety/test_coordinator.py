@@ -1,6 +1,7 @@
 """Tests for the SafetyCoordinator system."""
 import os
 import pytest
+import pytest_asyncio
 import asyncio
 from unittest.mock import Mock, patch, AsyncMock
 from web3 import Web3
@@ -30,7 +31,9 @@ def test_config():
         'circuit_breaker': {
             'max_position_size': 10.0,
             'max_gas_price_gwei': 100,
-            'max_daily_gas_spend': 1.0
+            'max_daily_gas_spend': 1.0,
+            'min_profit_threshold': 0,
+            'max_daily_loss': 5.0
         },
         'emergency_manager': {
             'notifications': {'enabled': True},
@@ -44,8 +47,8 @@ def test_config():
         'average_transaction_value': 0.1
     }
 
-@pytest.fixture
-def safety_coordinator(test_config, web3_mock):
+@pytest_asyncio.fixture
+async def safety_coordinator(test_config, web3_mock):
     """Create SafetyCoordinator instance for testing."""
     return SafetyCoordinator(test_config, web3_mock)
 
@@ -78,6 +81,37 @@ async def test_validate_transaction(safety_coordinator):
     # Non-whitelisted contract
     tx['to'] = '0x' + 'f' * 40
     assert not await safety_coordinator.validate_transaction(tx)
+    
+    # Rejected transactions never reach the circuit breaker's accounting
+    assert safety_coordinator.circuit_breaker.position_limit.current_size == Web3.to_wei(1, 'ether')
+    assert len(safety_coordinator.circuit_breaker.tx_timestamps) == 1
+
+def test_gas_price_compared_in_wei(safety_coordinator):
+    """Test the gas price cap is held in wei and inclusive."""
+    assert safety_coordinator._max_gas_price_wei == Web3.to_wei(100, 'gwei')
+    assert safety_coordinator._validate_gas_price({'gasPrice': Web3.to_wei(100, 'gwei')})
+    assert not safety_coordinator._validate_gas_price({'gasPrice': Web3.to_wei(100, 'gwei') + 1})
+
+def test_contract_whitelist_case_insensitive(safety_coordinator):
+    """Test whitelist matching ignores address case."""
+    assert safety_coordinator._validate_contract_interaction({'to': '0x' + 'A' * 40})
+    assert safety_coordinator._validate_contract_interaction({'to': '0x' + 'b' * 40})
+    assert not safety_coordinator._validate_contract_interaction({'to': '0x' + 'F' * 40})
+
+@pytest.mark.asyncio
+async def test_validate_batch(safety_coordinator):
+    """Test batch validation runs every check and keeps input order."""
+    whitelisted = safety_coordinator.config['contract_whitelist'][0]
+    txs = [
+        {'to': whitelisted, 'value': Web3.to_wei(1, 'ether'), 'gasPrice': Web3.to_wei(50, 'gwei')},
+        {'to': whitelisted, 'value': Web3.to_wei(1, 'ether'), 'gasPrice': Web3.to_wei(150, 'gwei')},
+        {'to': '0x' + 'f' * 40, 'value': Web3.to_wei(1, 'ether'), 'gasPrice': Web3.to_wei(50, 'gwei')},
+    ]
+    assert await safety_coordinator.validate_batch(txs) == [True, False, False]
+    assert safety_coordinator.metrics.total_transactions == 1
+    
+    # Only the accepted transaction reaches the circuit breaker's accounting
+    assert safety_coordinator.circuit_breaker.position_limit.current_size == Web3.to_wei(1, 'ether')
 
 @pytest.mark.asyncio
 async def test_strategy_registration(safety_coordinator):
@@ -1,6 +1,6 @@
 """Tests for Flash Loan Manager"""
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from web3 import Web3
 from eth_account import Account
 import asyncio
@@ -12,7 +12,8 @@ from mevbot.core.flash_loan import (
     AAVE_V3,
     DYDX,
     BALANCER,
-    UNISWAP_V3
+    UNISWAP_V3,
+    AAVE_FLASH_LOAN_SELECTOR
 )
 
 @pytest.fixture
@@ -25,7 +26,7 @@ def web3_mock():
     mock.eth.get_block = MagicMock(return_value={'baseFeePerGas': 30_000_000_000})
     mock.eth.max_priority_fee = 2_000_000_000
     mock.eth.send_transaction = MagicMock(return_value='0x123...')
-    mock.eth.wait_for_transaction_receipt = MagicMock(return_value={'status': 1})
+    mock.eth.get_transaction_receipt = AsyncMock(return_value={'status': 1})
     return mock
 
 @pytest.fixture
@@ -37,6 +38,10 @@ def flash_loan_manager(web3_mock):
         'dydx_solo': '0x1E0447b19BB6EcFdAe1e4AE1694b0C3659614e4e',
         'balancer_vault': '0xBA12222222228d8Ba445958a75a0704d566BF2C8',
         'uniswap_factory': '0x1F98431c8aD98523631AE4a59f267346ea31F984',
+        'aave_abi': [],
+        'dydx_abi': [],
+        'balancer_abi': [],
+        'uniswap_abi': [],
     }
     return FlashLoanManager(web3_mock, config)
 
@@ -48,7 +53,7 @@ async def test_get_optimal_provider(flash_loan_manager):
     
     # Mock provider responses
     flash_loan_manager._get_provider_fee = Mock(return_value=0.001)  # 0.1% fee
-    flash_loan_manager._get_provider_liquidity = Mock(return_value=Web3.to_wei(10000, 'ether'))
+    flash_loan_manager._get_provider_liquidity = AsyncMock(return_value=Web3.to_wei(10000, 'ether'))
     
     # Test
     provider = await flash_loan_manager.get_optimal_provider(token, amount)
@@ -61,12 +66,71 @@ async def test_get_optimal_provider_insufficient_liquidity(flash_loan_manager):
     amount = Web3.to_wei(100000, 'ether')  # Very large amount
     
     # Mock low liquidity
-    flash_loan_manager._get_provider_liquidity = Mock(return_value=Web3.to_wei(1000, 'ether'))
+    flash_loan_manager._get_provider_liquidity = AsyncMock(return_value=Web3.to_wei(1000, 'ether'))
     
     # Test
     provider = await flash_loan_manager.get_optimal_provider(token, amount)
     assert provider is None
 
+@pytest.mark.asyncio
+async def test_get_optimal_provider_skips_failed_probes(flash_loan_manager):
+    token = '0x6B175474E89094C44Da98b954EedeAC495271d0F'
+    amount = Web3.to_wei(1000, 'ether')
+    
+    # Cheapest provider (dYdX) fails its liquidity probe
+    async def liquidity(provider, token):
+        if provider == DYDX:
+            raise Exception("RPC error")
+        return Web3.to_wei(10000, 'ether')
+    
+    flash_loan_manager._get_provider_liquidity = liquidity
+    
+    # Test
+    provider = await flash_loan_manager.get_optimal_provider(token, amount)
+    assert provider == BALANCER
+
+@pytest.mark.asyncio
+async def test_liquidity_multicall_batching(flash_loan_manager):
+    token = '0x6B175474E89094C44Da98b954EedeAC495271d0F'
+    providers = [AAVE_V3, DYDX, BALANCER, UNISWAP_V3]
+    
+    # One aggregate call returns every provider's result; dYdX call reverts
+    call = AsyncMock(return_value=(
+        100,
+        b'',
+        [(True, b'a'), (False, b''), (True, b'b'), (True, b'c')]
+    ))
+    flash_loan_manager.multicall.functions.tryBlockAndAggregate.return_value.call = call
+    flash_loan_manager._decode_liquidity = Mock(return_value=Web3.to_wei(500, 'ether'))
+    
+    liquidities = await flash_loan_manager._get_liquidities(token, providers)
+    assert liquidities[AAVE_V3] == Web3.to_wei(500, 'ether')
+    assert liquidities[DYDX] is None
+    assert call.await_count == 1
+    
+    # Repeat lookup within the TTL is served from cache
+    await flash_loan_manager._get_liquidities(token, providers)
+    assert call.await_count == 1
+    
+    # A different provider set is read separately
+    await flash_loan_manager._get_liquidities(token, providers[:2])
+    assert call.await_count == 2
+    assert len(flash_loan_manager._liquidity_cache) == 2
+    
+    # A new block drops liquidity read at earlier blocks
+    flash_loan_manager.on_new_block(101)
+    assert flash_loan_manager._liquidity_cache == {}
+    call.return_value = (101, b'', [(True, b'a'), (False, b'')])
+    await flash_loan_manager._get_liquidities(token, providers[:2])
+    assert call.await_count == 3
+    
+    # Expired entries are pruned on the next store
+    block, _, cached = flash_loan_manager._liquidity_cache[(token, tuple(providers[:2]))]
+    flash_loan_manager._liquidity_cache[(token, tuple(providers[:2]))] = (block, 0, cached)
+    call.return_value = (101, b'', [(True, b'b')])
+    await flash_loan_manager._get_liquidities(token, providers[2:3])
+    assert list(flash_loan_manager._liquidity_cache) == [(token, (BALANCER,))]
+
 @pytest.mark.asyncio
 async def test_execute_flash_loan_aave(flash_loan_manager):
     # Mock successful Aave flash loan
@@ -80,7 +144,7 @@ async def test_execute_flash_loan_aave(flash_loan_manager):
     
     # Mock transaction success
     flash_loan_manager.w3.eth.send_transaction = Mock(return_value='0x123...')
-    flash_loan_manager.w3.eth.wait_for_transaction_receipt = Mock(
+    flash_loan_manager.w3.eth.get_transaction_receipt = AsyncMock(
         return_value={'status': 1}
     )
     
@@ -114,10 +178,10 @@ async def test_provider_fees(flash_loan_manager):
     amount = Web3.to_wei(1000, 'ether')
     
     # Test each provider's fee
-    aave_fee = await flash_loan_manager._get_provider_fee(AAVE_V3, token, amount)
-    dydx_fee = await flash_loan_manager._get_provider_fee(DYDX, token, amount)
-    balancer_fee = await flash_loan_manager._get_provider_fee(BALANCER, token, amount)
-    uniswap_fee = await flash_loan_manager._get_provider_fee(UNISWAP_V3, token, amount)
+    aave_fee = flash_loan_manager._get_provider_fee(AAVE_V3, token, amount)
+    dydx_fee = flash_loan_manager._get_provider_fee(DYDX, token, amount)
+    balancer_fee = flash_loan_manager._get_provider_fee(BALANCER, token, amount)
+    uniswap_fee = flash_loan_manager._get_provider_fee(UNISWAP_V3, token, amount)
     
     assert aave_fee == amount * 0.0009  # 0.09%
     assert dydx_fee == 0  # No fee
@@ -135,9 +199,9 @@ async def test_build_flash_loan_tx(flash_loan_manager):
     )
     
     # Mock nonce and gas prices
-    flash_loan_manager.w3.eth.get_transaction_count = Mock(return_value=0)
-    flash_loan_manager._get_max_fee = Mock(return_value=50_000_000_000)
-    flash_loan_manager._get_priority_fee = Mock(return_value=2_000_000_000)
+    flash_loan_manager.w3.eth.get_transaction_count = AsyncMock(return_value=0)
+    flash_loan_manager._get_max_fee = AsyncMock(return_value=50_000_000_000)
+    flash_loan_manager._get_priority_fee = AsyncMock(return_value=2_000_000_000)
     
     # Test
     tx = await flash_loan_manager._build_flash_loan_tx(params)
@@ -148,6 +212,9 @@ async def test_build_flash_loan_tx(flash_loan_manager):
     assert tx['gas'] == 500000
     assert tx['maxFeePerGas'] == 50_000_000_000
     assert tx['maxPriorityFeePerGas'] == 2_000_000_000
+    
+    # Calldata starts with the flashLoan selector
+    assert tx['data'].startswith('0x' + AAVE_FLASH_LOAN_SELECTOR.hex())
 
 @pytest.mark.asyncio
 async def test_gas_price_management(flash_loan_manager):
@@ -164,3 +231,94 @@ async def test_gas_price_management(flash_loan_manager):
     # Test priority fee
     priority_fee = await flash_loan_manager._get_priority_fee()
     assert priority_fee == 2_000_000_000
+
+@pytest.mark.asyncio
+async def test_block_scoped_cache(flash_loan_manager):
+    get_block = AsyncMock(return_value={'baseFeePerGas': 30_000_000_000})
+    get_transaction_count = AsyncMock(return_value=7)
+    flash_loan_manager.w3.eth.get_block = get_block
+    flash_loan_manager.w3.eth.get_transaction_count = get_transaction_count
+    flash_loan_manager.on_new_block(100)
+    
+    # Repeated reads within a block hit the RPC once
+    assert await flash_loan_manager._get_max_fee() == 60_000_000_000
+    assert await flash_loan_manager._get_max_fee() == 60_000_000_000
+    assert get_block.await_count == 1
+    
+    # Nonces increment locally within the block
+    assert await flash_loan_manager._get_nonce() == 7
+    assert await flash_loan_manager._get_nonce() == 8
+    assert get_transaction_count.await_count == 1
+    get_transaction_count.assert_awaited_with(flash_loan_manager.config['address'], 'pending')
+    
+    # New block invalidates the cache and resyncs the nonce once both are sent
+    flash_loan_manager._release_nonce(7, sent=True)
+    flash_loan_manager._release_nonce(8, sent=True)
+    flash_loan_manager.on_new_block(101)
+    await flash_loan_manager._get_max_fee()
+    assert get_block.await_count == 2
+    assert await flash_loan_manager._get_nonce() == 7
+
+@pytest.mark.asyncio
+async def test_nonce_leases(flash_loan_manager):
+    release = asyncio.Event()
+    
+    async def slow_count(address, block_identifier):
+        await release.wait()
+        return 7
+    
+    flash_loan_manager.w3.eth.get_transaction_count = AsyncMock(side_effect=slow_count)
+    flash_loan_manager.on_new_block(100)
+    
+    # Concurrent builds share one fetch and get distinct nonces
+    first = asyncio.create_task(flash_loan_manager._get_nonce())
+    second = asyncio.create_task(flash_loan_manager._get_nonce())
+    await asyncio.sleep(0)
+    release.set()
+    assert sorted(await asyncio.gather(first, second)) == [7, 8]
+    assert flash_loan_manager.w3.eth.get_transaction_count.await_count == 1
+    
+    # An unsent nonce is handed back to the next build
+    flash_loan_manager._release_nonce(8, sent=False)
+    assert await flash_loan_manager._get_nonce() == 8
+    
+    # Nonces still leased survive a resync that has not seen them
+    flash_loan_manager.on_new_block(101)
+    assert await flash_loan_manager._get_nonce() == 9
+
+@pytest.mark.asyncio
+async def test_receipt_wait_per_block(flash_loan_manager):
+    from web3.exceptions import TransactionNotFound
+    
+    flash_loan_manager.on_new_block(100)
+    flash_loan_manager.w3.eth.get_transaction_receipt = AsyncMock(
+        side_effect=[TransactionNotFound('pending'), {'status': 1}]
+    )
+    
+    waiter = asyncio.create_task(flash_loan_manager._wait_for_receipt('0x123'))
+    await asyncio.sleep(0.05)
+    
+    # No re-poll until the next block arrives
+    assert flash_loan_manager.w3.eth.get_transaction_receipt.await_count == 1
+    assert not waiter.done()
+    
+    flash_loan_manager.on_new_block(101)
+    receipt = await waiter
+    
+    assert receipt == {'status': 1}
+    assert flash_loan_manager.w3.eth.get_transaction_receipt.await_count == 2
+
+@pytest.mark.asyncio
+async def test_receipt_wait_block_feed_stalled(flash_loan_manager):
+    from web3.exceptions import TransactionNotFound
+    
+    flash_loan_manager.on_new_block(100)
+    flash_loan_manager.receipt_block_timeout = 0.01
+    flash_loan_manager.w3.eth.get_transaction_receipt = AsyncMock(
+        side_effect=[TransactionNotFound('pending'), {'status': 1}]
+    )
+    
+    # No block arrives, so the waiter re-polls after the block timeout
+    receipt = await flash_loan_manager._wait_for_receipt('0x123')
+    assert receipt == {'status': 1}
+    assert flash_loan_manager.w3.eth.get_transaction_receipt.await_count == 2
@@ -1,5 +1,7 @@
 """Tests for the LoopManager."""
 import pytest
+import pytest_asyncio
+import time
 import asyncio
 from unittest.mock import Mock, patch, AsyncMock
 from web3 import Web3
@@ -43,15 +45,21 @@ def test_config():
     return {
         'safety': {
             'key_manager': {'keystore_path': '/tmp/test_keystore'},
-            'circuit_breaker': {'max_position_size': 10.0},
+            'circuit_breaker': {
+                'max_position_size': 10.0,
+                'max_gas_price_gwei': 100,
+                'max_daily_gas_spend': 1.0,
+                'min_profit_threshold': 0,
+                'max_daily_loss': 5.0
+            },
             'emergency_manager': {'notifications': {'enabled': True}}
         },
         'key_id': 'test_key',
         'key_password': 'test_password'
     }
 
-@pytest.fixture
-def loop_manager(test_config, web3_mock):
+@pytest_asyncio.fixture
+async def loop_manager(test_config, web3_mock):
     """Create LoopManager instance for testing."""
     return LoopManager(test_config, web3_mock)
 
@@ -65,9 +73,9 @@ async def test_start_stop(loop_manager):
     assert loop_manager.running
     assert loop_manager.start_time is not None
     
-    # Stop loop manager
+    # Stop loop manager, monitors are cancelled rather than waited out
     await loop_manager.stop()
-    await start_task
+    await asyncio.wait_for(start_task, 1)
     
     assert not loop_manager.running
     assert all(strategy.stopped for strategy in loop_manager.strategies.values())
@@ -109,6 +117,9 @@ async def test_strategy_execution(loop_manager):
     
     assert loop_manager.total_executions == 1
     assert loop_manager.successful_executions == 1
+    
+    # Validated once, not again on submission
+    loop_manager.safety.validate_transaction.assert_awaited_once()
 
 @pytest.mark.asyncio
 async def test_transaction_submission(loop_manager, web3_mock):
@@ -119,25 +130,235 @@ async def test_transaction_submission(loop_manager, web3_mock):
     loop_manager.safety.validate_transaction = AsyncMock(return_value=True)
     
     # Mock key manager
-    loop_manager.safety.key_manager.get_private_key = AsyncMock(
+    loop_manager.safety.key_manager.get_private_key = Mock(
         return_value="test_private_key"
     )
     
     # Mock transaction signing
     signed_tx = Mock()
     signed_tx.rawTransaction = b'signed_tx_data'
-    web3_mock.eth.account.sign_transaction.return_value = signed_tx
+    web3_mock.eth.account.from_key.return_value.key = b'\x11' * 32
+    web3_mock.eth.account.from_key.return_value.sign_transaction.return_value = signed_tx
     
     # Mock transaction sending
     tx_hash = '0x' + '1' * 64
-    web3_mock.eth.send_raw_transaction.return_value = tx_hash
+    web3_mock.manager.coro_request = AsyncMock(return_value=tx_hash)
     
     # Submit transaction
     result = await loop_manager._submit_transaction(tx)
     
     assert result == tx_hash
+    web3_mock.manager.coro_request.assert_awaited_once_with(
+        'eth_sendRawTransaction', ['0x' + b'signed_tx_data'.hex()]
+    )
     assert tx_hash in loop_manager.pending_transactions
 
+@pytest.mark.asyncio
+async def test_pending_transaction_receipts(loop_manager, web3_mock):
+    """Test pending receipts are fetched together and resolved."""
+    from web3.exceptions import TransactionNotFound
+    
+    mined, failed, pending = ('0x' + c * 64 for c in '123')
+    receipts = {
+        mined: {'status': 1},
+        failed: {'status': 0},
+    }
+    
+    async def get_receipt(tx_hash):
+        if tx_hash not in receipts:
+            raise TransactionNotFound(tx_hash)
+        return receipts[tx_hash]
+    
+    # Provider without batch support falls back to concurrent lookups
+    del web3_mock.batch_requests
+    web3_mock.eth.get_transaction_receipt = AsyncMock(side_effect=get_receipt)
+    now = time.monotonic()
+    loop_manager.pending_transactions = dict.fromkeys([mined, failed, pending], now)
+    
+    await loop_manager._check_pending_transactions()
+    
+    assert web3_mock.eth.get_transaction_receipt.await_count == 3
+    assert list(loop_manager.pending_transactions) == [pending]
+    assert loop_manager.tx_receipts == receipts
+    
+    # Transactions still unmined after receipt_timeout are dropped
+    loop_manager.pending_transactions[pending] = now - loop_manager.receipt_timeout - 1
+    await loop_manager._check_pending_transactions()
+    
+    assert web3_mock.eth.get_transaction_receipt.await_count == 4
+    assert not loop_manager.pending_transactions
+
+@pytest.mark.asyncio
+async def test_receipts_checked_per_head(loop_manager):
+    """Test receipts are checked on each newHeads message, not on a timer."""
+    async def heads():
+        for number in (1, 2):
+            yield {'result': {'number': number}}
+        loop_manager.running = False
+    
+    ws_web3 = Mock()
+    ws_web3.eth.subscribe = AsyncMock(return_value='0xsub')
+    ws_web3.ws.process_subscriptions = heads
+    
+    connection = AsyncMock()
+    connection.__aenter__.return_value = ws_web3
+    
+    loop_manager.config['ws_url'] = 'ws://localhost:8546'
+    loop_manager.running = True
+    loop_manager._check_pending_transactions = AsyncMock()
+    
+    with patch('mevbot.core.loop_manager.AsyncWeb3') as async_web3, \
+         patch('mevbot.core.loop_manager.WebsocketProviderV2'):
+        async_web3.persistent_websocket.return_value = connection
+        await loop_manager._monitor_transactions()
+    
+    ws_web3.eth.subscribe.assert_awaited_once_with('newHeads')
+    assert loop_manager._check_pending_transactions.await_count == 2
+
+@pytest.mark.asyncio
+async def test_signing_key_cached(loop_manager, web3_mock):
+    """Test the private key is unwrapped once and reused for signing."""
+    loop_manager.safety.key_manager.get_private_key = Mock(
+        return_value="test_private_key"
+    )
+    account = web3_mock.eth.account.from_key.return_value
+    account.key = b'\x11' * 32
+    
+    for _ in range(3):
+        await loop_manager._sign_transaction({'value': 1})
+    
+    loop_manager.safety.key_manager.get_private_key.assert_called_once_with(
+        'test_key', 'test_password'
+    )
+    web3_mock.eth.account.from_key.assert_called_once_with("test_private_key")
+    assert account.sign_transaction.call_count == 3
+
+@pytest.mark.asyncio
+async def test_send_raw_transaction_sync(loop_manager, web3_mock):
+    """Test sync submission records the receipt without polling for it."""
+    tx_hash = '0x' + '2' * 64
+    loop_manager.config['use_send_raw_sync'] = True
+    loop_manager.safety.validate_transaction = AsyncMock(return_value=True)
+    loop_manager._sign_transaction = AsyncMock(
+        return_value=Mock(rawTransaction=b'signed_tx_data')
+    )
+    web3_mock.manager.coro_request = AsyncMock(return_value={
+        'transactionHash': tx_hash,
+        'blockNumber': '0x10',
+        'status': '0x1'
+    })
+    
+    assert await loop_manager._submit_transaction({'value': 1}) == tx_hash
+    
+    web3_mock.eth.send_raw_transaction.assert_not_awaited()
+    assert loop_manager.tx_receipts[tx_hash]['status'] == 1
+    assert tx_hash not in loop_manager.pending_transactions
+    
+    # Providers without the method fall back to the regular send
+    web3_mock.manager.coro_request = AsyncMock(side_effect=[
+        ValueError({'code': -32601, 'message': 'method not found'}),
+        '0x' + '3' * 64
+    ])
+    
+    assert await loop_manager._submit_transaction({'value': 1}) == '0x' + '3' * 64
+    assert web3_mock.manager.coro_request.await_args.args[0] == 'eth_sendRawTransaction'
+    assert '0x' + '3' * 64 in loop_manager.pending_transactions
+    assert not loop_manager._send_raw_sync_supported
+    assert loop_manager.config['use_send_raw_sync']
+
+@pytest.mark.asyncio
+async def test_send_failure_after_broadcast_tracked(loop_manager, web3_mock):
+    """Test a send that may have reached the node is tracked by its local hash."""
+    from eth_utils import keccak
+    
+    raw = b'signed_tx_data'
+    local_hash = '0x' + keccak(raw).hex()
+    loop_manager.config['use_send_raw_sync'] = True
+    loop_manager._sign_transaction = AsyncMock(return_value=Mock(rawTransaction=raw))
+    
+    # EIP-7966 "not included within timeout", the node did broadcast it
+    web3_mock.manager.coro_request = AsyncMock(
+        side_effect=ValueError({'code': 4, 'message': 'not included within timeout'})
+    )
+    assert await loop_manager._submit_transaction({'value': 1}, validated=True) == local_hash
+    assert local_hash in loop_manager.pending_transactions
+    assert web3_mock.manager.coro_request.await_count == 1
+    
+    # Timeouts on the regular send are tracked too
+    loop_manager.pending_transactions.clear()
+    loop_manager.config['use_send_raw_sync'] = False
+    web3_mock.manager.coro_request = AsyncMock(side_effect=asyncio.TimeoutError())
+    assert await loop_manager._submit_transaction({'value': 1}, validated=True) == local_hash
+    assert local_hash in loop_manager.pending_transactions
+    
+    # An RPC error response means the node rejected it
+    loop_manager.pending_transactions.clear()
+    web3_mock.manager.coro_request = AsyncMock(
+        side_effect=ValueError({'code': -32000, 'message': 'nonce too low'})
+    )
+    assert await loop_manager._submit_transaction({'value': 1}, validated=True) is None
+    assert not loop_manager.pending_transactions
+
+@pytest.mark.asyncio
+async def test_loop_waits_for_wakeup(loop_manager):
+    """Test the main loop idles until a strategy signals an opportunity."""
+    strategy = MockStrategy("test_strategy")
+    await loop_manager.add_strategy(strategy)
+    
+    loop_manager.max_idle_interval = 60
+    loop_manager._gates = AsyncMock(return_value=(True, True))
+    loop_manager._should_execute_strategy = Mock(return_value=False)
+    loop_manager.running = True
+    loop_task = asyncio.create_task(loop_manager._run_loop())
+    
+    await asyncio.sleep(0.05)
+    assert loop_manager._should_execute_strategy.call_count == 1
+    
+    strategy.signal_opportunity()
+    await asyncio.sleep(0.05)
+    assert loop_manager._should_execute_strategy.call_count == 2
+    
+    await loop_manager.stop()
+    await asyncio.wait_for(loop_task, 1)
+
+@pytest.mark.asyncio
+async def test_loop_idle_cadence(loop_manager):
+    """Test the main loop still re-checks strategies every 100ms without wakeups."""
+    await loop_manager.add_strategy(MockStrategy("test_strategy"))
+    
+    assert loop_manager.max_idle_interval == 0.1
+    loop_manager._gates = AsyncMock(return_value=(True, True))
+    loop_manager._should_execute_strategy = Mock(return_value=False)
+    loop_manager.running = True
+    loop_task = asyncio.create_task(loop_manager._run_loop())
+    
+    await asyncio.sleep(0.25)
+    assert loop_manager._should_execute_strategy.call_count == 3
+    
+    await loop_manager.stop()
+    await asyncio.wait_for(loop_task, 1)
+
+@pytest.mark.asyncio
+async def test_gate_cache(loop_manager):
+    """Test safety gates are shared across strategies within the TTL."""
+    loop_manager.safety._check_network_conditions = AsyncMock(return_value=True)
+    loop_manager.safety._check_system_resources = Mock(return_value=True)
+    
+    assert await loop_manager._gates() == (True, True)
+    assert await loop_manager._gates() == (True, True)
+    assert loop_manager.safety._check_network_conditions.await_count == 1
+    assert loop_manager.safety._check_system_resources.call_count == 1
+    
+    # Stale entries are refreshed
+    loop_manager.gate_cache_ttl = 0
+    loop_manager.safety._check_system_resources = Mock(return_value=False)
+    assert await loop_manager._gates() == (True, False)
+    
+    # Strategies read the cached gates without querying the safety coordinator
+    strategy = MockStrategy("test_strategy")
+    assert not loop_manager._should_execute_strategy(strategy)
+    assert loop_manager.safety._check_system_resources.call_count == 1
+
 @pytest.mark.asyncio
 async def test_safety_integration(loop_manager):
     """Test safety system integration."""
@@ -213,21 +434,135 @@ async def test_error_handling(loop_manager):
 async def test_strategy_execution_conditions(loop_manager):
     """Test conditions for strategy execution."""
     strategy = MockStrategy("test_strategy")
+    loop_manager.gate_cache_ttl = 0
     
     # Test when strategy is not ready
     strategy.ready = False
-    assert not await loop_manager._should_execute_strategy(strategy)
+    assert not loop_manager._should_execute_strategy(strategy)
     
     # Test when network conditions are bad
     strategy.ready = True
     loop_manager.safety._check_network_conditions = AsyncMock(return_value=False)
-    assert not await loop_manager._should_execute_strategy(strategy)
+    await loop_manager._gates()
+    assert not loop_manager._should_execute_strategy(strategy)
     
     # Test when system resources are low
     loop_manager.safety._check_network_conditions = AsyncMock(return_value=True)
     loop_manager.safety._check_system_resources = Mock(return_value=False)
-    assert not await loop_manager._should_execute_strategy(strategy)
+    await loop_manager._gates()
+    assert not loop_manager._should_execute_strategy(strategy)
     
     # Test when all conditions are good
     loop_manager.safety._check_system_resources = Mock(return_value=True)
-    assert await loop_manager._should_execute_strategy(strategy)
+    await loop_manager._gates()
+    assert loop_manager._should_execute_strategy(strategy)
+
+@pytest.mark.asyncio
+async def test_system_health_cached(loop_manager):
+    """Test psutil is sampled off the loop at most once per TTL."""
+    with patch('psutil.cpu_percent', return_value=50.0) as cpu_percent, \
+         patch('psutil.virtual_memory', return_value=Mock(percent=60.0)):
+        first = await loop_manager.check_system_health()
+        second = await loop_manager.check_system_health()
+        
+        assert first == second == {'cpu_usage': 50.0, 'memory_usage': 60.0, 'healthy': True}
+        assert cpu_percent.call_count == 1
+        
+        # Expired cache resamples
+        loop_manager.health_cache_ttl = 0
+        await loop_manager.check_system_health()
+        assert cpu_percent.call_count == 2
+
+@pytest.mark.asyncio
+async def test_readiness_bitmap(loop_manager):
+    """Test only armed strategies are considered by the main loop."""
+    first, second, third = (MockStrategy(f"strategy_{i}") for i in range(3))
+    for strategy in (first, second, third):
+        await loop_manager.add_strategy(strategy)
+    
+    assert loop_manager._ready_strategies() == [first, second, third]
+    
+    second.mark_not_ready()
+    assert loop_manager._ready_strategies() == [first, third]
+    
+    # Removal moves the last strategy into the freed bit
+    await loop_manager.remove_strategy("strategy_0")
+    assert loop_manager._strategy_index == {"strategy_2": 0, "strategy_1": 1}
+    assert loop_manager._strategy_ids == ["strategy_2", "strategy_1"]
+    assert loop_manager._ready_strategies() == [third]
+    
+    second.mark_ready()
+    assert loop_manager._ready_strategies() == [third, second]
+
+@pytest.mark.asyncio
+async def test_strategy_concurrency_bounded(test_config, web3_mock):
+    """Test no more than max_parallel_strategies execute at once."""
+    loop_manager = LoopManager({**test_config, 'max_parallel_strategies': 2}, web3_mock)
+    active = 0
+    peak = 0
+    
+    async def execute(strategy):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+    
+    loop_manager._execute_strategy_safely = execute
+    await asyncio.gather(*(
+        loop_manager._execute_strategy_bounded(MockStrategy(f"strategy_{i}"))
+        for i in range(5)
+    ))
+    
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_receipt_polling_backoff(loop_manager, web3_mock):
+    """Test receipt polling backs off on misses and resets on hits."""
+    web3_mock.eth.wait_for_transaction_receipt = AsyncMock(return_value={'status': 1})
+    await loop_manager.monitor_transaction('0x' + '1' * 64)
+    web3_mock.eth.wait_for_transaction_receipt.assert_awaited_once_with(
+        '0x' + '1' * 64, timeout=120, poll_latency=6.0
+    )
+    
+    loop_manager.pending_transactions = {'0x' + '2' * 64: 0.0}
+    loop_manager._check_pending_transactions = AsyncMock(side_effect=[0, 0, 0, 1])
+    loop_manager.receipt_poll_max_latency = 30.0
+    
+    delays = [await loop_manager._poll_receipts_once() for _ in range(4)]
+    assert delays == [12.0, 24.0, 30.0, 6.0]
+    
+    # No polling while newHeads drives the receipt checks
+    loop_manager._heads_active = True
+    assert await loop_manager._poll_receipts_once() == 6.0
+    assert loop_manager._check_pending_transactions.await_count == 4
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_monitors_in_due_order(loop_manager):
+    """Test the periodic monitors share one scheduler ordered by due time."""
+    runs = []
+    
+    def job(name, interval):
+        async def run():
+            runs.append(name)
+            if len(runs) == 5:
+                loop_manager.running = False
+            return interval
+        return run
+    
+    loop_manager.health_check_interval = 2.0
+    loop_manager._poll_receipts_once = job('txmon', 1.5)
+    loop_manager._health_check_once = job('health', 2.0)
+    loop_manager.running = True
+    
+    # Sleeping advances a fake clock instead of waiting
+    clock = [0.0]
+    
+    async def sleep(delay):
+        clock[0] += delay
+    
+    with patch('mevbot.core.loop_manager.asyncio.sleep', sleep), \
+            patch('mevbot.core.loop_manager.time.monotonic', lambda: clock[0]):
+        await loop_manager._run_scheduler()
+    
+    assert runs == ['txmon', 'txmon', 'health', 'txmon', 'health']
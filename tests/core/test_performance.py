@@ -6,7 +6,7 @@ from datetime import datetime
 from unittest.mock import Mock, patch, AsyncMock
 import time
 
-from mevbot.core.performance import PerformanceMonitor, LatencyMetrics, SystemMetrics
+from mevbot.core.performance import PerformanceMonitor, LatencyMetrics, SystemMetrics, RingBuffer
 
 @pytest.fixture
 def config():
@@ -151,3 +151,67 @@ async def test_resource_usage_warning(monitor, caplog):
               for record in caplog.records)
     assert any("High memory usage" in record.message 
               for record in caplog.records)
+
+def test_ring_buffer():
+    """Test ring buffer keeps the last N values and their running sum"""
+    buffer = RingBuffer(3)
+    assert len(buffer) == 0
+    assert buffer.mean() == 0.0
+    
+    for value in (1.0, 2.0, 3.0, 4.0):
+        buffer.append(value)
+        
+    assert list(buffer) == [2.0, 3.0, 4.0]
+    assert buffer.total == pytest.approx(9.0)
+    assert buffer.mean() == pytest.approx(3.0)
+
+def test_proc_sampling(monitor, tmp_path):
+    """Test system metrics are parsed from one read of each /proc file"""
+    files = {
+        'stat': b'cpu  100 0 100 700 100 0 0 0 0 0\ncpu0 100 0 100 700 100 0 0 0 0 0\n',
+        'meminfo': b'MemTotal:       1000 kB\nMemFree:         100 kB\nMemAvailable:    250 kB\n',
+        'net': (b'Inter-|   Receive\n face |bytes\n'
+                b'    lo: 10 1 0 0 0 0 0 0 10 1 0 0 0 0 0 0\n'
+                b'  eth0: 200 2 1 0 0 0 0 0 300 3 0 1 0 0 0 0\n'),
+        'disk': (b'   8       0 sda 4 0 8 5 6 0 16 7 0 0 0\n'
+                 b'   8       1 sda1 4 0 8 5 6 0 16 7 0 0 0\n'),
+    }
+    paths = {}
+    for name, content in files.items():
+        paths[name] = tmp_path / name
+        paths[name].write_bytes(content)
+    (tmp_path / 'block' / 'sda').mkdir(parents=True)
+    
+    with patch('mevbot.core.performance.PROC_FILES', {k: str(v) for k, v in paths.items()}), \
+         patch('mevbot.core.performance.SYS_BLOCK', str(tmp_path / 'block')):
+        cpu, memory, net_io, disk_io = monitor._sample_system()
+        
+        assert cpu == 0.0  # No previous sample yet
+        assert memory == pytest.approx(0.75)
+        assert net_io['bytes_recv'] == 210
+        assert net_io['bytes_sent'] == 310
+        assert net_io['dropout'] == 1
+        assert disk_io['read_count'] == 4  # Partition not double counted
+        assert disk_io['write_bytes'] == 16 * 512
+        
+        # Same handles are re-read: 200 more jiffies, half of them idle
+        paths['stat'].write_bytes(b'cpu  150 0 150 800 100 0 0 0 0 0\n')
+        cpu, *_ = monitor._sample_system()
+        assert cpu == pytest.approx(0.5)
+
+@pytest.mark.asyncio
+async def test_report_timer(config, caplog):
+    """Test reports are emitted on a timer and cancelled with the loop"""
+    monitor = PerformanceMonitor({**config, 'report_interval': 0.05})
+    monitor.collect_system_metrics = AsyncMock()
+    
+    with caplog.at_level('INFO', logger='mevbot.core.performance'):
+        task = asyncio.create_task(monitor.monitor_loop())
+        await asyncio.sleep(0.18)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    reports = [r for r in caplog.records if r.message.startswith('Performance Report')]
+    assert 2 <= len(reports) <= 4
+    assert monitor._report_handle is None
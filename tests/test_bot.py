@@ -0,0 +1,99 @@
+"""Tests for the MEV bot's subscription dispatch"""
+import pytest
+import pytest_asyncio
+import asyncio
+import yaml
+from unittest.mock import Mock, AsyncMock
+from web3.exceptions import TransactionNotFound
+from mevbot.bot import MEVBot
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump({
+        'test_mode': True,  # Enable test mode
+        'private_key': '0x' + '1' * 64,
+        'address': '0x' + '2' * 40,
+        'rpc_url': 'http://localhost:8545',
+        'ws_url': 'ws://localhost:8546',
+        'flashbots_relay_url': 'https://relay.flashbots.net',
+        'min_profit': 0
+    }))
+    return str(path)
+
+@pytest_asyncio.fixture
+async def bot(config_path):
+    bot = MEVBot(config_path)
+    bot.is_running = True
+    bot._heads_subscription = '0xheads'
+    bot._pending_subscription = '0xpending'
+    yield bot
+
+def head(number):
+    return {
+        'number': number,
+        'baseFeePerGas': 10000000000,
+        'gasUsed': 15000000,
+        'gasLimit': 30000000,
+        'timestamp': 1700000000 + number * 12
+    }
+
+def ws_feed(*messages):
+    """Websocket stand-in that delivers the given subscription messages"""
+    async def process_subscriptions():
+        for message in messages:
+            yield message
+    
+    ws_w3 = Mock()
+    ws_w3.ws.process_subscriptions = process_subscriptions
+    return ws_w3
+
+@pytest.mark.asyncio
+async def test_heads_feed_strategy_flash_loan(bot):
+    """Test newHeads messages reach the strategy flash loan manager"""
+    manager = bot.strategy_flash_loan
+    assert manager.on_new_block in bot._block_listeners
+    
+    manager.on_new_block(99)
+    manager._block_cache['max_fee'] = 1
+    
+    await bot._dispatch_subscriptions(ws_feed(
+        {'subscription': '0xheads', 'result': head(100)}
+    ))
+    
+    assert bot.current_block == 100
+    assert manager.current_block == 100
+    assert manager._block_cache == {}
+
+@pytest.mark.asyncio
+async def test_heads_drive_receipts_and_nonces(bot):
+    """Test receipt waits and nonce resyncs follow heads from the websocket"""
+    manager = bot.strategy_flash_loan
+    manager.w3 = Mock()
+    manager.w3.eth.get_transaction_count = AsyncMock(side_effect=[7, 9])
+    manager.w3.eth.get_transaction_receipt = AsyncMock(
+        side_effect=[TransactionNotFound('pending'), {'status': 1}]
+    )
+    
+    await bot._dispatch_subscriptions(ws_feed(
+        {'subscription': '0xheads', 'result': head(100)}
+    ))
+    assert await manager._get_nonce() == 7
+    assert await manager._get_nonce() == 8
+    manager._release_nonce(7, sent=True)
+    manager._release_nonce(8, sent=True)
+    
+    # The waiter polls once, then sleeps until the next head
+    waiter = asyncio.create_task(manager._wait_for_receipt('0x123'))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+    
+    await bot._dispatch_subscriptions(ws_feed(
+        {'subscription': '0xheads', 'result': head(101)}
+    ))
+    assert await asyncio.wait_for(waiter, 1) == {'status': 1}
+    assert manager.w3.eth.get_transaction_receipt.await_count == 2
+    
+    # The new head also resyncs the nonce from the pending count
+    assert await manager._get_nonce() == 9
+    assert manager.w3.eth.get_transaction_count.await_count == 2
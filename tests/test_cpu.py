@@ -54,11 +54,11 @@ def test_cpu_manager_initialization(mock_cpu_count, config):
     mock_cpu_count.return_value = 8
     
     with patch('ctypes.CDLL') as mock_cdll, \
-         patch('ctypes.util.find_library') as mock_find_library:
-        mock_pthread = MagicMock()
+         patch('ctypes.util.find_library') as mock_find_library, \
+         patch('os.sched_setaffinity') as mock_setaffinity:
         mock_numa = MagicMock()
-        mock_cdll.side_effect = [mock_pthread, mock_numa]
-        mock_find_library.side_effect = ['pthread', 'numa']
+        mock_cdll.return_value = mock_numa
+        mock_find_library.return_value = 'numa'
         
         manager = CPUManager(config)
         assert manager.initialized is False
@@ -67,8 +67,8 @@ def test_cpu_manager_initialization(mock_cpu_count, config):
         assert success is True
         assert manager.initialized is True
         
-        # Verify pthread was used for main thread pinning
-        mock_pthread.pthread_setaffinity_np.assert_called()
+        # Verify main thread was pinned via sched_setaffinity
+        mock_setaffinity.assert_called_with(0, {config['main_core']})
 
 @patch('psutil.cpu_count')
 @patch('psutil.cpu_percent')
@@ -91,6 +91,41 @@ def test_optimal_core_selection(mock_cpu_percent, mock_cpu_count, config):
     core = manager.get_optimal_core('invalid')
     assert core is None
 
+@patch('psutil.cpu_count')
+def test_pin_thread_to_core(mock_cpu_count, config):
+    """Test thread pinning uses the native thread ID"""
+    mock_cpu_count.return_value = 8
+    manager = CPUManager(config)
+    
+    with patch('os.sched_setaffinity') as mock_setaffinity:
+        tid = manager.get_thread_id()
+        assert manager.pin_thread_to_core(tid, 2) is True
+        mock_setaffinity.assert_called_once_with(tid, {2})
+        
+        # Failures are reported, not raised
+        mock_setaffinity.side_effect = OSError("Invalid argument")
+        assert manager.pin_thread_to_core(tid, 2) is False
+
+@patch('psutil.cpu_count')
+@patch('psutil.cpu_percent')
+def test_cpu_sample_reuse(mock_cpu_percent, mock_cpu_count, config):
+    """Test per-core utilization is sampled once per TTL window"""
+    mock_cpu_count.return_value = 8
+    mock_cpu_percent.return_value = [10, 20, 30, 40, 50, 60, 70, 80]
+    
+    manager = CPUManager({**config, 'cpu_sample_ttl': 60})
+    
+    # Burst of core requests shares a single sample
+    for _ in range(5):
+        manager.get_optimal_core('worker')
+    assert mock_cpu_percent.call_count == 1
+    
+    # Expired sample is refreshed
+    manager.cpu_sample_ttl = 0
+    manager._cpu_sample_time = 0.0
+    manager.get_optimal_core('worker')
+    assert mock_cpu_percent.call_count == 2
+
 @patch('psutil.cpu_count')
 @patch('psutil.cpu_percent')
 @patch('psutil.cpu_freq')
@@ -139,12 +174,12 @@ def test_numa_configuration(mock_cpu_count, config):
     mock_cpu_count.return_value = 8
     
     with patch('ctypes.CDLL') as mock_cdll, \
-         patch('ctypes.util.find_library') as mock_find_library:
-        mock_pthread = MagicMock()
+         patch('ctypes.util.find_library') as mock_find_library, \
+         patch('os.sched_setaffinity'):
         mock_numa = MagicMock()
         mock_numa.numa_num_configured_nodes.return_value = 2
-        mock_cdll.side_effect = [mock_pthread, mock_numa]
-        mock_find_library.side_effect = ['pthread', 'numa']
+        mock_cdll.return_value = mock_numa
+        mock_find_library.return_value = 'numa'
         
         manager = CPUManager(config)
         manager.initialize()
@@ -159,7 +194,8 @@ def test_cpu_governor_setting(mock_cpu_count, config):
     mock_cpu_count.return_value = 8
     
     with patch('os.path.exists') as mock_exists, \
-         patch('builtins.open', create=True) as mock_open:
+         patch('builtins.open', create=True) as mock_open, \
+         patch('os.sched_setaffinity'):
         mock_exists.return_value = True
         mock_file = MagicMock()
         mock_open.return_value.__enter__.return_value = mock_file
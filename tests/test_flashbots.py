@@ -1,16 +1,20 @@
 """Tests for Flashbots integration"""
 import pytest
 import pytest_asyncio
-from mevbot.core.flashbots import FlashbotsManager
+from mevbot.core.flashbots import BundleArrays, FlashbotsManager, FlashbotsManagerTest
 from web3 import Web3
 from eth_account import Account
-from unittest.mock import Mock, AsyncMock
+from unittest.mock import Mock, AsyncMock, patch
 
 @pytest.fixture
 def w3():
     mock_w3 = Mock(spec=Web3)
     mock_w3.eth = Mock()
-    mock_w3.eth.get_block = AsyncMock(return_value={'base_fee_per_gas': 10000000000})
+    mock_w3.eth.get_block = AsyncMock(return_value={
+        'baseFeePerGas': 10000000000,
+        'gasUsed': 15000000,
+        'gasLimit': 30000000
+    })
     return mock_w3
 
 @pytest.fixture
@@ -31,6 +35,12 @@ async def flashbots_manager(w3, private_key, config):
     manager = FlashbotsManager(w3, private_key, config)
     yield manager
 
+@pytest.mark.asyncio
+async def test_test_mode_specialization(flashbots_manager):
+    """Test test mode constructs the specialized manager"""
+    assert isinstance(flashbots_manager, FlashbotsManagerTest)
+    assert flashbots_manager.flashbot is None
+
 @pytest.mark.asyncio
 async def test_bundle_optimization(flashbots_manager):
     """Test bundle optimization"""
@@ -70,6 +80,119 @@ async def test_bid_calculation(flashbots_manager):
     # Verify calculation
     assert profit_per_gas > 0
 
+def test_bundle_arrays():
+    """Test bundle fields are parsed into columns once"""
+    transactions = [
+        {'value': int(1e20), 'gas': 50000, 'maxFeePerGas': 3, 'maxPriorityFeePerGas': 1},
+        {'gasPrice': 2}
+    ]
+    bundle = BundleArrays.from_transactions(transactions)
+    
+    assert len(bundle) == 2
+    assert bundle.values.tolist() == [1e20, 0]
+    assert bundle.gases.tolist() == [50000, 21000]
+    assert bundle.max_fees.tolist() == [3, 2]
+    assert bundle.prio_fees.tolist() == [1, 0]
+    assert bundle.raw == transactions
+
+@pytest.mark.asyncio
+async def test_transaction_ranking(flashbots_manager):
+    """Test transactions are ranked by profit per gas"""
+    low = {'value': int(1e16), 'gas': 21000, 'maxFeePerGas': 1000000000}
+    high = {'value': int(1e18), 'gas': 21000, 'maxFeePerGas': 1000000000}
+    tied = dict(low)
+    transactions = [low, high, tied]
+    
+    ranked = flashbots_manager._rank_transactions(
+        BundleArrays.from_transactions(transactions)
+    )
+    
+    # Highest first, ties keep their original order
+    assert ranked[0] is high
+    assert ranked[1] is low
+    assert ranked[2] is tied
+
+@pytest.mark.asyncio
+async def test_generate_bundle_candidates(flashbots_manager):
+    """Test candidates grow from the most profitable transaction"""
+    low = {'value': int(1e16), 'gas': 21000, 'maxFeePerGas': 1000000000}
+    high = {'value': int(1e18), 'gas': 21000, 'maxFeePerGas': 1000000000}
+    
+    candidates = flashbots_manager._generate_bundle_candidates([low, high])
+    
+    assert candidates == [[high], [high, low]]
+    assert flashbots_manager._generate_bundle_candidates([]) == []
+
+@pytest.mark.asyncio
+async def test_base_fee_cache(flashbots_manager):
+    """Test base fee comes from pushed heads when available"""
+    flashbots_manager.w3.eth.get_block = AsyncMock(return_value={
+        'number': 99,
+        'baseFeePerGas': 10000000000,
+        'gasUsed': 3000000,
+        'gasLimit': 30000000
+    })
+    
+    # No head pushed yet, falls back to RPC
+    assert await flashbots_manager._get_base_fee() == 10000000000
+    assert flashbots_manager.w3.eth.get_block.await_count == 1
+    
+    flashbots_manager.on_new_head({
+        'number': 100,
+        'baseFeePerGas': 12000000000,
+        'gasUsed': 15000000,
+        'gasLimit': 30000000
+    })
+    assert await flashbots_manager._get_base_fee() == 12000000000
+    assert flashbots_manager.w3.eth.get_block.await_count == 1
+    
+    # Heads stopped arriving, the cached fee is stale
+    flashbots_manager._head_time -= flashbots_manager.head_cache_ttl
+    assert await flashbots_manager._get_base_fee() == 10000000000
+    assert await flashbots_manager._get_network_congestion() == 0.1
+    assert flashbots_manager.w3.eth.get_block.await_count == 3
+
+@pytest.mark.asyncio
+async def test_gather_bid_features(flashbots_manager):
+    """Test bid features are gathered from the cached head"""
+    flashbots_manager.on_new_head({
+        'number': 100,
+        'baseFeePerGas': 12000000000,
+        'gasUsed': 15000000,
+        'gasLimit': 30000000
+    })
+    bundle = [{'value': int(1e18), 'gas': 21000}]
+    
+    features = await flashbots_manager._gather_bid_features(bundle, 101)
+    
+    assert features == {
+        'base_fee': 12000000000,
+        'congestion': 0.5,
+        'bundle_value': 1e18,
+        'historical_success': 0.5,
+        'builder_reputation': 0.5
+    }
+
+@pytest.mark.asyncio
+async def test_optimal_bid_features(flashbots_manager):
+    """Test bid features are written into the reused model input row"""
+    flashbots_manager.bid_model = Mock()
+    flashbots_manager.bid_model.predict = Mock(return_value=[3000000000])
+    simulation = Mock(total_gas_used=21000)
+    features = {
+        'base_fee': 12000000000,
+        'congestion': 0.5,
+        'bundle_value': 1e18,
+        'historical_success': 0.5,
+        'builder_reputation': 0.8
+    }
+    
+    assert flashbots_manager._calculate_optimal_bid(simulation, features) == 3000000000
+    
+    model_input = flashbots_manager.bid_model.predict.call_args[0][0]
+    assert model_input is flashbots_manager._feat_buffer
+    assert model_input.tolist() == [[21000, 12000000000, 0.5, 1e18, 0.5, 0.8]]
+
 @pytest.mark.asyncio
 async def test_builder_reputation(flashbots_manager):
     """Test builder reputation tracking"""
@@ -84,3 +207,234 @@ async def test_builder_reputation(flashbots_manager):
     # Verify stats
     assert builder_id in flashbots_manager.builder_stats
     assert flashbots_manager.builder_stats[builder_id]['successful_bundles'] == 95
+
+@pytest.mark.asyncio
+async def test_builder_reputation_score(flashbots_manager):
+    """Test weighted builder reputation"""
+    assert flashbots_manager._get_builder_reputation_score() == 0.5
+    
+    flashbots_manager.update_builder_stats('a', {'blocks_built': 30, 'success_rate': 0.9})
+    flashbots_manager.update_builder_stats('b', {'blocks_built': 10, 'success_rate': 0.5})
+    assert flashbots_manager._get_builder_reputation_score() == pytest.approx(0.8)
+    
+    # Updating an existing builder replaces its entry
+    flashbots_manager.update_builder_stats('b', {'blocks_built': 30, 'success_rate': 0.5})
+    assert flashbots_manager._get_builder_reputation_score() == pytest.approx(0.7)
+    assert flashbots_manager.builder_stats['b']['blocks_built'] == 30
+    
+    # Direct writes to builder_stats are picked up too
+    flashbots_manager.builder_stats['c'] = {'blocks_built': 40, 'success_rate': 1.0}
+    assert flashbots_manager._get_builder_reputation_score() == pytest.approx(0.82)
+    del flashbots_manager.builder_stats['c']
+    assert flashbots_manager._get_builder_reputation_score() == pytest.approx(0.7)
+    
+    flashbots_manager.builder_stats = {'d': {'blocks_built': 1, 'success_rate': 0.2}}
+    assert flashbots_manager._get_builder_reputation_score() == pytest.approx(0.2)
+
+@pytest.mark.asyncio
+async def test_prepare_bundle_signing(flashbots_manager):
+    """Test bundles are signed with the bid applied"""
+    test_tx = {
+        'to': '0x742d35Cc6634C0532925a3b844Bc454e4438f44e',
+        'value': int(1e18),
+        'gas': 21000,
+        'maxFeePerGas': 2000000000,
+        'maxPriorityFeePerGas': 1000000000,
+        'nonce': 0,
+        'chainId': 1,
+        'data': '0x'
+    }
+    
+    signed_bundle = await flashbots_manager._prepare_bundle([test_tx], 3000000000, 100)
+    
+    # Signed payload matches signing in-process with the bid applied
+    expected_tx = dict(test_tx, maxFeePerGas=3000000000, maxPriorityFeePerGas=3000000000)
+    expected = Account.sign_transaction(expected_tx, flashbots_manager._private_key)
+    assert signed_bundle == [{'signed_transaction': expected.rawTransaction}]
+
+@pytest.mark.asyncio
+async def test_worker_pools(w3, private_key, config):
+    """Test worker pools start on first use and sign with the key loaded per worker"""
+    config = dict(config, test_mode=False, rpc_url='http://localhost:8545', signing_workers=1)
+    manager = FlashbotsManager(w3, private_key, config)
+    assert manager._signing_executor is None
+    assert manager._sim_pool is None
+    
+    test_tx = {
+        'to': '0x742d35Cc6634C0532925a3b844Bc454e4438f44e',
+        'value': int(1e18),
+        'gas': 21000,
+        'maxFeePerGas': 2000000000,
+        'maxPriorityFeePerGas': 1000000000,
+        'nonce': 0,
+        'chainId': 1,
+        'data': '0x'
+    }
+    signed = await manager._sign_transactions([test_tx])
+    assert signed == [Account.sign_transaction(test_tx, private_key).rawTransaction]
+    assert manager._sim_pool is None
+    
+    await manager.aclose()
+    with pytest.raises(RuntimeError):
+        manager.signing_executor.submit(print)
+
+@pytest.mark.asyncio
+async def test_relay_session(w3, private_key, config):
+    """Test relay requests share one pooled session until closed"""
+    manager = FlashbotsManager(w3, private_key, dict(config, relay_pool_size=8))
+    adapter = manager._relay_session.get_adapter(config['flashbots_relay_url'])
+    assert adapter._pool_maxsize == 8
+    
+    manager._relay_session.close = Mock()
+    await manager.aclose()
+    
+    manager._relay_session.close.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_relay_session_without_orjson(w3, private_key, config):
+    """Test the plain relay provider also uses the pooled session"""
+    config = dict(config, test_mode=False, rpc_url='http://localhost:8545')
+    with patch('mevbot.core.flashbots.orjson', None), \
+            patch('mevbot.core.flashbots.FlashbotProvider') as provider:
+        manager = FlashbotsManager(w3, private_key, config)
+    
+    provider.assert_called_once_with(
+        manager.account,
+        config['flashbots_relay_url'],
+        session=manager._relay_session
+    )
+    
+    await manager.aclose()
+
+@pytest.mark.asyncio
+async def test_relay_uses_sync_web3(w3, private_key, config):
+    """Test the sync relay middleware stays off the async chain Web3"""
+    config = dict(config, test_mode=False, rpc_url='http://localhost:8545')
+    manager = FlashbotsManager(w3, private_key, config)
+    
+    assert isinstance(manager.flashbot.w3, Web3)
+    assert manager.flashbot.w3 is not w3
+    w3.middleware_onion.add.assert_not_called()
+    
+    await manager.aclose()
+
+@pytest.mark.asyncio
+async def test_parallel_bundle_optimization(flashbots_manager):
+    """Test candidate evaluation is bounded and tolerates failures"""
+    import asyncio
+    from mevbot.core.flashbots import BundleMetrics
+    
+    transactions = [{'value': i, 'gas': 21000} for i in range(8)]
+    flashbots_manager.max_parallel_sims = 2
+    
+    running = 0
+    peak = 0
+    
+    async def evaluate(candidate, state):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        
+        if len(candidate) == 3:
+            raise RuntimeError("simulation failed")
+        return candidate, BundleMetrics(
+            profit=sum(tx['value'] for tx in candidate) - 4 * len(candidate),
+            gas_cost=0,
+            success_probability=1,
+            builder_reputation=0.5,
+            historical_success=0.5
+        )
+    
+    flashbots_manager._evaluate_bundle_candidate = evaluate
+    
+    best = await flashbots_manager._parallel_bundle_optimization(transactions, 101)
+    
+    # Prefixes of the ranked bundle; the failed three-transaction candidate is skipped
+    assert best == [transactions[7], transactions[6], transactions[5], transactions[4]]
+    assert peak <= 2
+
+@pytest.mark.asyncio
+async def test_evaluate_bundle_candidate(flashbots_manager):
+    """Test candidates are scored from a state snapshot"""
+    candidate = [{'value': int(1e18), 'gas': 21000, 'maxFeePerGas': 12000000000}]
+    state = {
+        'base_fee': 10000000000,
+        'congestion': 0.5,
+        'bundle_value': 1e18,
+        'historical_success': 0.5,
+        'builder_reputation': 0.8
+    }
+    
+    bundle, metrics = await flashbots_manager._evaluate_bundle_candidate(candidate, state)
+    
+    assert bundle == candidate
+    assert metrics.gas_cost == 21000 * 12000000000
+    assert metrics.profit == pytest.approx(1e18 - 21000 * 12000000000)
+    assert metrics.success_probability == 0.5
+    assert metrics.builder_reputation == 0.8
+    
+    await flashbots_manager.aclose()
+
+@pytest.mark.asyncio
+async def test_historical_success_rate(flashbots_manager):
+    """Test success rate tracking across block buckets and eviction"""
+    def track(target_block, success):
+        result = Mock(bundle_hash='0x1', simulation_success=success, simulation_error=None)
+        flashbots_manager._track_bundle_submission(result, [], target_block)
+    
+    assert flashbots_manager._get_historical_success_rate(1000) == 0.5
+    
+    track(1000, True)
+    track(1050, False)
+    track(1150, True)
+    track(5000, False)
+    
+    # Buckets 9, 10 and 11 cover blocks 900-1199
+    assert flashbots_manager._get_historical_success_rate(1000) == 2 / 3
+    assert flashbots_manager._get_historical_success_rate(5000) == 0
+    
+    # Fill the history so the early submissions are evicted
+    for _ in range(flashbots_manager.history_size):
+        track(5000, True)
+    
+    assert flashbots_manager._get_historical_success_rate(1000) == 0.5
+    assert flashbots_manager._hist_len == 1000
+    assert flashbots_manager._hist_head == 4
+    assert flashbots_manager._hist_target_block.tolist() == [5000] * 1000
+    assert flashbots_manager._hist_success.all()
+    assert list(flashbots_manager._bucket_total) == [50]
+
+@pytest.mark.asyncio
+async def test_simulation_cache(flashbots_manager):
+    """Test repeated bundles for the same target block are simulated once"""
+    bundle = [{'hash': '0x1', 'value': int(1e18), 'gas': 21000}]
+    simulation = Mock(success=True)
+    flashbots_manager._simulate_bundle = AsyncMock(return_value=simulation)
+    
+    first = await flashbots_manager._optimize_and_simulate(bundle, 101)
+    second = await flashbots_manager._optimize_and_simulate(bundle, 101)
+    
+    assert first == second == (bundle, simulation)
+    assert flashbots_manager._simulate_bundle.await_count == 1
+    
+    # A new target block is simulated again
+    await flashbots_manager._optimize_and_simulate(bundle, 102)
+    assert flashbots_manager._simulate_bundle.await_count == 2
+    
+    # Entries for blocks that have passed are dropped
+    flashbots_manager.on_new_head({
+        'number': 101,
+        'baseFeePerGas': 12000000000,
+        'gasUsed': 15000000,
+        'gasLimit': 30000000
+    })
+    assert list(flashbots_manager._simulation_cache) == [(102, ('0x1',))]
+    
+    # Failed simulations are not cached
+    flashbots_manager._simulate_bundle = AsyncMock(return_value=None)
+    assert await flashbots_manager._optimize_and_simulate(bundle, 103) == (bundle, None)
+    await flashbots_manager._optimize_and_simulate(bundle, 103)
+    assert flashbots_manager._simulate_bundle.await_count == 2
+    assert (103, ('0x1',)) not in flashbots_manager._simulation_cache
@@ -1,10 +1,10 @@
 """Tests for flash loan functionality"""
 import pytest
 import pytest_asyncio
-from mevbot.core.flashloan import FlashLoanManager, FlashLoanParams
+from mevbot.core.flashloan import FlashLoanManager, FlashLoanManagerTest, FlashLoanParams
 from web3 import Web3
 from eth_typing import Address
-from unittest.mock import Mock, AsyncMock
+from unittest.mock import Mock, AsyncMock, patch
 import numpy as np
 
 @pytest.fixture
@@ -26,6 +26,13 @@ async def flash_loan_manager(w3, config):
     manager = FlashLoanManager(w3, config)
     yield manager
 
+@pytest.mark.asyncio
+async def test_test_mode_specialization(flash_loan_manager):
+    """Test test mode constructs the specialized manager"""
+    assert isinstance(flash_loan_manager, FlashLoanManagerTest)
+    assert isinstance(flash_loan_manager, FlashLoanManager)
+    assert flash_loan_manager.multicall is None
+
 @pytest.mark.asyncio
 async def test_optimize_flash_loan(flash_loan_manager):
     """Test flash loan optimization"""
@@ -136,3 +143,130 @@ async def test_prepare_loan(flash_loan_manager):
     assert params.provider is not None
     assert params.expected_profit >= 0
     assert len(params.route) > 0
+
+@pytest.mark.asyncio
+async def test_multicall_provider_status(w3):
+    """Test provider status is read in one multicall round-trip"""
+    config = {
+        'aave_lending_pool': Address('0x' + '2' * 40),
+        'balancer_vault': Address('0x' + '1' * 40),
+        'aave_pool_abi': [],
+        'balancer_vault_abi': [],
+        'balancer_pool_id': b'\x00' * 32,
+        'weth_address': Address('0x' + '4' * 40)
+    }
+    w3.eth.contract = Mock()
+    w3.codec = Mock()
+    w3.codec.decode = Mock(side_effect=[
+        ((100, 2),),             # Aave reserve data struct
+        (['token'], [30, 70], 5)  # Balancer pool tokens
+    ])
+    
+    manager = FlashLoanManager(w3, config)
+    aggregate = manager.multicall.functions.tryBlockAndAggregate.return_value
+    aggregate.call = AsyncMock(return_value=(1, b'', [(True, b'aave'), (True, b'balancer')]))
+    
+    with patch('mevbot.core.flashloan.get_abi_output_types', return_value=[]):
+        await manager._multicall_provider_status()
+    
+    aggregate.call.assert_awaited_once()
+    assert manager.providers['aave'].current_liquidity == 100
+    assert manager.providers['balancer'].current_liquidity == 100
+
+@pytest.mark.asyncio
+async def test_optimize_flash_loan_provider_selection(flash_loan_manager):
+    """Test the cheapest provider with enough liquidity is chosen"""
+    test_token = Address('0x' + '1' * 40)
+    test_route = [Address('0x' + '2' * 40), Address('0x' + '3' * 40)]
+    
+    params = await flash_loan_manager.optimize_flash_loan(
+        test_token, int(1e18), int(1e19), test_route
+    )
+    assert params.provider.name == 'Balancer'
+    assert params.amount == int(1e19)
+    assert type(params.amount) is int
+    
+    # A status update leaves Balancer unable to cover the minimum
+    flash_loan_manager._apply_status(
+        flash_loan_manager.providers['balancer'], (['token'], [int(1e17)], 0)
+    )
+    
+    params = await flash_loan_manager.optimize_flash_loan(
+        test_token, int(1e18), int(1e19), test_route
+    )
+    assert params.provider.name == 'Aave'
+    
+    # Assigning new providers rebuilds the arrays too
+    flash_loan_manager.providers = {'balancer': flash_loan_manager.providers['balancer']}
+    params = await flash_loan_manager.optimize_flash_loan(
+        test_token, int(1e17), int(1e19), test_route
+    )
+    assert params.provider.name == 'Balancer'
+    assert params.amount == int(1e17)
+
+@pytest.mark.asyncio
+async def test_multicall_address(w3):
+    """Test a configured Multicall3 address overrides the default"""
+    config = {
+        'aave_lending_pool': Address('0x' + '2' * 40),
+        'balancer_vault': Address('0x' + '1' * 40),
+        'multicall_address': '0x' + '5' * 40
+    }
+    w3.eth.contract = Mock()
+    
+    FlashLoanManager(w3, config)
+    
+    assert w3.eth.contract.call_args.kwargs['address'] == '0x' + '5' * 40
+
+@pytest.mark.asyncio
+async def test_update_provider_status_dispatch(w3):
+    """Test provider updates are dispatched by provider name"""
+    config = {
+        'aave_lending_pool': Address('0x' + '2' * 40),
+        'balancer_vault': Address('0x' + '1' * 40),
+        'aave_pool_abi': [],
+        'balancer_vault_abi': [],
+        'balancer_pool_id': b'\x00' * 32,
+        'weth_address': Address('0x' + '4' * 40)
+    }
+    w3.eth.contract = Mock()
+    contract = w3.eth.contract.return_value
+    contract.functions.getReserveData.return_value.call = AsyncMock(return_value=(400, 2))
+    
+    manager = FlashLoanManager(w3, config)
+    contracts_built = w3.eth.contract.call_count
+    await manager._update_provider_status(manager.providers['aave'])
+    
+    contract.functions.getReserveData.assert_called_once_with(config['weth_address'])
+    assert manager.providers['aave'].current_liquidity == 400
+    assert manager.providers['aave'].max_loan_amount == 300
+    
+    # Cached contracts are reused, not rebuilt per poll
+    assert w3.eth.contract.call_count == contracts_built
+    
+    # Providers without a handler are skipped
+    manager.providers['aave'].name = 'Unknown'
+    await manager._update_provider_status(manager.providers['aave'])
+    assert contract.functions.getReserveData.call_count == 1
+
+@pytest.mark.asyncio
+async def test_missing_provider_abi_skipped(w3):
+    """Test providers without a configured ABI are skipped, not fatal"""
+    config = {
+        'aave_lending_pool': Address('0x' + '2' * 40),
+        'balancer_vault': Address('0x' + '1' * 40),
+        'aave_pool_abi': [],
+        'weth_address': Address('0x' + '4' * 40)
+    }
+    w3.eth.contract = Mock()
+    contract = w3.eth.contract.return_value
+    contract.functions.getReserveData.return_value.call = AsyncMock(return_value=(400, 2))
+    
+    manager = FlashLoanManager(w3, config)
+    assert 'balancer' not in manager._contracts
+    assert manager._status_call(manager.providers['balancer']) is None
+    
+    await manager._update_provider_status(manager.providers['balancer'])
+    await manager._update_provider_status(manager.providers['aave'])
+    assert manager.providers['balancer'].current_liquidity == 0
+    assert manager.providers['aave'].current_liquidity == 400
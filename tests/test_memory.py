@@ -14,6 +14,10 @@ def memory_config():
         'min_free_huge_pages': 64
     }
 
+def mock_meminfo(content: str):
+    """Patch the /proc/meminfo read to return the given content"""
+    return patch('mevbot.core.memory.os.read', return_value=content.encode())
+
 @pytest.fixture
 def memory_manager(memory_config):
     """Memory manager fixture"""
@@ -38,10 +42,10 @@ def test_huge_pages_config():
     with pytest.raises(ValueError):
         HugePagesConfig(2048, 1024, '/dev/hugepages', 1025)
 
-@patch('subprocess.run')
+@patch('mevbot.core.memory.ctypes.CDLL')
 @patch('pathlib.Path.mkdir')
 @patch('builtins.open', new_callable=mock_open)
-def test_memory_manager_initialization(mock_file, mock_mkdir, mock_run, memory_manager):
+def test_memory_manager_initialization(mock_file, mock_mkdir, mock_cdll, memory_manager):
     """Test memory manager initialization"""
     # Mock /proc/mounts content
     mock_file.return_value.__enter__.return_value.readlines.return_value = [
@@ -56,13 +60,20 @@ def test_memory_manager_initialization(mock_file, mock_mkdir, mock_run, memory_m
         'HugePages_Surp: 0\n'
     )
     mock_file.return_value.__enter__.return_value.read.return_value = mock_meminfo
+    mock_cdll.return_value.mount.return_value = 0
     
     assert memory_manager.initialize() is True
     assert memory_manager.initialized is True
     
-    # Verify sysctl calls
-    mock_run.assert_any_call(['sysctl', '-w', 'vm.nr_hugepages=1024'], check=True)
-    mock_run.assert_any_call(['sysctl', '-w', 'vm.nr_overcommit_hugepages=64'], check=True)
+    # Verify sysctl parameters are written through /proc/sys
+    mock_file.assert_any_call('/proc/sys/vm/nr_hugepages', 'w')
+    mock_file.assert_any_call('/proc/sys/vm/nr_overcommit_hugepages', 'w')
+    mock_file.return_value.__enter__.return_value.write.assert_any_call('1024')
+    
+    # Verify hugetlbfs is mounted with mount(2)
+    mock_cdll.return_value.mount.assert_called_once_with(
+        b'none', b'/dev/hugepages', b'hugetlbfs', 0, b'pagesize=2048k'
+    )
 
 @patch('mevbot.core.memory.mmap')
 @patch('builtins.open', new_callable=mock_open)
@@ -76,25 +87,15 @@ def test_memory_region_allocation(mock_file, mock_mmap, memory_manager):
     mock_mmap.MAP_HUGETLB = 0x40000  # Linux value
     
     # Mock available pages with proper format
-    mock_meminfo_lines = [
-        'HugePages_Total:    1024\n',
-        'HugePages_Free:     1024\n',
-        'HugePages_Rsvd:     0\n',
-        'HugePages_Surp:     0\n',
+    meminfo_content = (
+        'HugePages_Total:    1024\n'
+        'HugePages_Free:     1024\n'
+        'HugePages_Rsvd:     0\n'
+        'HugePages_Surp:     0\n'
         'Hugepagesize:       2048 kB\n'
-    ]
+    )
     
-    # Create a class to handle file iteration
-    class MockFileIterator:
-        def __init__(self, lines):
-            self.lines = lines
-            
-        def __iter__(self):
-            return iter(self.lines)
-            
     mock_file_handle = mock_file.return_value.__enter__.return_value
-    mock_file_iterator = MockFileIterator(mock_meminfo_lines)
-    mock_file_handle.__iter__ = lambda self: iter(mock_meminfo_lines)
     
     # Mock mmap
     mock_mmap_obj = MagicMock()
@@ -104,7 +105,8 @@ def test_memory_region_allocation(mock_file, mock_mmap, memory_manager):
     mock_file_handle.fileno.return_value = 42
     
     # Allocate region
-    region = memory_manager.allocate_region('test_region', 128)  # 128MB
+    with mock_meminfo(meminfo_content):
+        region = memory_manager.allocate_region('test_region', 128)  # 128MB
     assert region is not None
     assert 'test_region' in memory_manager._mapped_regions
     
@@ -130,7 +132,7 @@ def test_memory_stats(memory_manager):
         'HugePages_Surp: 0\n'
     )
     
-    with patch('builtins.open', mock_open(read_data=meminfo_content)):
+    with mock_meminfo(meminfo_content):
         stats = memory_manager.get_stats()
         
         assert stats['total_pages'] == 1024
@@ -169,6 +171,103 @@ def test_memory_region_allocation_insufficient_pages(memory_manager):
         'HugePages_Surp: 0\n'
     )
     
-    with patch('builtins.open', mock_open(read_data=meminfo_content)):
+    with mock_meminfo(meminfo_content):
         region = memory_manager.allocate_region('test_region', 1024)  # Try to allocate 1GB
         assert region is None  # Allocation should fail
+
+def test_read_hugepages(memory_manager):
+    """Test HugePages counters are parsed from a single meminfo read"""
+    meminfo_content = (
+        'MemTotal:       32768000 kB\n'
+        'AnonHugePages:         0 kB\n'
+        'HugePages_Total:    1024\n'
+        'HugePages_Free:      960\n'
+        'HugePages_Rsvd:       16\n'
+        'HugePages_Surp:        0\n'
+        'Hugepagesize:       2048 kB\n'
+    )
+    
+    with mock_meminfo(meminfo_content):
+        assert memory_manager._read_hugepages() == {
+            b'Total': 1024,
+            b'Free': 960,
+            b'Rsvd': 16,
+            b'Surp': 0
+        }
+
+@patch('mevbot.core.memory.mmap')
+@patch('builtins.open', new_callable=mock_open)
+def test_free_pages_counter(mock_file, mock_mmap, memory_manager):
+    """Test free pages are tracked in-process between meminfo reconciles"""
+    memory_manager.initialized = True
+    memory_manager.reconcile_interval = 3
+    meminfo_content = 'HugePages_Total: 1024\nHugePages_Free: 1024\n'
+    
+    with mock_meminfo(meminfo_content) as mock_read:
+        assert memory_manager.allocate_region('a', 128) is not None
+        assert memory_manager.allocate_region('b', 128) is not None
+        assert mock_read.call_count == 1
+        assert memory_manager._free_pages == 1024 - 128
+        
+        # Freed pages go back to the counter
+        assert memory_manager.free_region('a')
+        assert memory_manager._free_pages == 1024 - 64
+        
+        # Every reconcile_interval calls the counter is re-read
+        memory_manager.allocate_region('c', 128)
+        memory_manager.allocate_region('d', 128)
+        assert mock_read.call_count == 2
+        assert memory_manager._free_pages == 1024 - 64
+
+@patch('mevbot.core.memory.mmap')
+@patch('builtins.open', new_callable=mock_open)
+def test_anonymous_region_allocation(mock_file, mock_mmap, memory_manager):
+    """Test regions are mapped anonymously, falling back to hugetlbfs"""
+    memory_manager.initialized = True
+    mock_mmap.MAP_PRIVATE = 0x02
+    mock_mmap.MAP_SHARED = 0x01
+    mock_mmap.MAP_ANONYMOUS = 0x20
+    mock_mmap.MAP_HUGETLB = 0x40000
+    mock_mmap.MAP_POPULATE = 0x8000
+    memory_manager.prefault = False
+    meminfo_content = 'HugePages_Total: 1024\nHugePages_Free: 1024\n'
+    
+    with mock_meminfo(meminfo_content):
+        assert memory_manager.allocate_region('anon', 128) is not None
+        
+    # 2MB pages are selected with 21 << MAP_HUGE_SHIFT, no file is opened
+    args, kwargs = mock_mmap.mmap.call_args
+    assert args == (-1, 64 * 2048 * 1024)
+    assert kwargs['flags'] == 0x02 | 0x20 | 0x40000 | (21 << 26)
+    mock_file.assert_not_called()
+    assert 'anon' in memory_manager._anonymous_regions
+    
+    # Kernels without anonymous huge pages fall back to hugetlbfs
+    mock_mmap.mmap.side_effect = [OSError("EINVAL"), MagicMock()]
+    assert memory_manager.allocate_region('file', 128) is not None
+    assert mock_mmap.mmap.call_args[1]['flags'] == 0x01 | 0x40000
+    assert 'file' not in memory_manager._anonymous_regions
+    
+    with patch('pathlib.Path.unlink') as mock_unlink:
+        assert memory_manager.free_region('anon')
+        mock_unlink.assert_not_called()
+
+@patch('mevbot.core.memory.mmap')
+def test_region_advice_and_prefault(mock_mmap, memory_manager):
+    """Test regions are prefaulted and excluded from forked children"""
+    memory_manager.initialized = True
+    mock_mmap.MAP_PRIVATE = 0x02
+    mock_mmap.MAP_ANONYMOUS = 0x20
+    mock_mmap.MAP_HUGETLB = 0x40000
+    mock_mmap.MAP_POPULATE = 0x8000
+    mock_mmap.MADV_DONTFORK = 10
+    mock_mmap.MADV_HUGEPAGE = 14
+    region = MagicMock()
+    region.madvise.side_effect = [None, OSError("EINVAL")]
+    mock_mmap.mmap.return_value = region
+    
+    with mock_meminfo('HugePages_Total: 1024\nHugePages_Free: 1024\n'):
+        assert memory_manager.allocate_region('hot', 2) is region
+        
+    assert mock_mmap.mmap.call_args[1]['flags'] & 0x8000
+    assert [c.args for c in region.madvise.call_args_list] == [(10,), (14,)]
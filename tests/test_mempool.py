@@ -1,12 +1,14 @@
 """Tests for mempool monitoring"""
 import pytest
 import pytest_asyncio
-from mevbot.core.mempool import MempoolMonitor, Transaction
+from mevbot.core.mempool import (
+    MempoolMonitor, MempoolManager, Transaction, GCS_HASH_BLAKE2B, GCS_HASH_XXH3
+)
 from eth_typing import Address, HexStr
-import time
+from hexbytes import HexBytes
 import asyncio
 from web3 import Web3
-from unittest.mock import Mock, AsyncMock
+from unittest.mock import Mock, AsyncMock, patch
 
 @pytest.fixture
 def w3():
@@ -40,23 +42,23 @@ async def test_transaction_tracking(mempool_monitor):
     # Add test transaction
     tx_hash = HexStr('0x' + '1' * 64)
     tx = Transaction(
-        hash=tx_hash,
-        from_address=Address('0x' + '2' * 40),
-        to_address=Address('0x' + '3' * 40),
+        hash=bytes.fromhex('1' * 64),
+        from_address=bytes.fromhex('2' * 40),
+        to_address=bytes.fromhex('3' * 40),
         value=1000000000000000000,  # 1 ETH
         gas_price=20000000000,  # 20 GWEI
         gas_limit=21000,
         nonce=0,
         data=b'',
-        timestamp=time.time()
+        timestamp=0.0
     )
     
-    mempool_monitor.transactions[tx_hash] = tx
+    mempool_monitor.transactions[tx.hash] = tx
     
-    # Test retrieval
+    # Test retrieval by hex hash
     result = await mempool_monitor.get_transaction(tx_hash)
     assert result is not None
-    assert result.hash == tx_hash
+    assert result.hash == bytes.fromhex('1' * 64)
     assert result.value == 1000000000000000000
 
 @pytest.mark.asyncio
@@ -66,26 +68,26 @@ async def test_watch_address(mempool_monitor):
     
     # Add address to watch
     mempool_monitor.add_watch_address(test_address)
-    assert test_address in mempool_monitor.watched_addresses
+    assert bytes.fromhex('1' * 40) in mempool_monitor.watched_addresses
     
     # Remove address
     mempool_monitor.remove_watch_address(test_address)
-    assert test_address not in mempool_monitor.watched_addresses
+    assert bytes.fromhex('1' * 40) not in mempool_monitor.watched_addresses
 
 @pytest.mark.asyncio
 async def test_cleanup(mempool_monitor):
     """Test old transaction cleanup"""
     # Add old transaction
     old_tx = Transaction(
-        hash=HexStr('0x' + '1' * 64),
-        from_address=Address('0x' + '2' * 40),
-        to_address=Address('0x' + '3' * 40),
+        hash=bytes.fromhex('1' * 64),
+        from_address=bytes.fromhex('2' * 40),
+        to_address=bytes.fromhex('3' * 40),
         value=1000000000000000000,
         gas_price=20000000000,
         gas_limit=21000,
         nonce=0,
         data=b'',
-        timestamp=time.time() - 600  # 10 minutes old
+        timestamp=mempool_monitor._clock() - 600  # 10 minutes old
     )
     mempool_monitor.transactions[old_tx.hash] = old_tx
     
@@ -94,3 +96,266 @@ async def test_cleanup(mempool_monitor):
     
     # Verify cleanup
     assert old_tx.hash not in mempool_monitor.transactions
+
+@pytest.mark.asyncio
+async def test_pending_transaction_queue(mempool_monitor):
+    """Test pushed transactions are queued once"""
+    tx = {
+        'hash': '0x' + '4' * 64,
+        'from': Address('0x' + '2' * 40),
+        'to': Address('0x' + '3' * 40),
+        'value': 1000000000000000000,
+        'gasPrice': 20000000000,
+        'gas': 21000,
+        'nonce': 0,
+        'input': b''
+    }
+    
+    first = mempool_monitor.add_pending_transaction(tx)
+    duplicate = mempool_monitor.add_pending_transaction(tx)
+    
+    assert first is not None
+    assert duplicate is None
+    assert mempool_monitor.tx_queue.qsize() == 1
+    
+    queued = await anext(mempool_monitor.stream())
+    assert queued is first
+    assert queued.hash == bytes.fromhex('4' * 64)
+
+@pytest.mark.asyncio
+async def test_seen_transactions_skip_rpc(w3, config):
+    """Test already seen hashes are not fetched again"""
+    manager = MempoolManager(w3, {**config, 'seen_tx_capacity': 2})
+    hashes = ['0x' + digit * 64 for digit in '567']
+    
+    await asyncio.gather(*(
+        manager._process_transaction(tx_hash)
+        for tx_hash in [hashes[0], hashes[0], hashes[1]]
+    ))
+    assert w3.eth.get_transaction.await_count == 2
+    
+    # A full generation rotates out but is still remembered
+    await manager._process_transaction(hashes[2])
+    await manager._process_transaction(hashes[0])
+    assert w3.eth.get_transaction.await_count == 3
+    assert manager._seen == {bytes.fromhex('7' * 64)}
+
+@pytest.mark.asyncio
+async def test_pending_hashes_fetched_in_batches(config):
+    """Test subscribed hashes are fetched together and recorded once"""
+    def pending_tx(tx_hash):
+        return {
+            'hash': tx_hash,
+            'from': Address('0x' + '2' * 40),
+            'to': Address('0x' + '3' * 40),
+            'value': 1,
+            'gasPrice': 1,
+            'gas': 21000,
+            'nonce': 0,
+            'input': b''
+        }
+    
+    # Provider without batch support falls back to concurrent lookups
+    w3 = Mock()
+    del w3.batch_requests
+    w3.eth.get_transaction = AsyncMock(side_effect=pending_tx)
+    monitor = MempoolMonitor(w3, {**config, 'tx_fetch_batch_size': 2})
+    
+    hashes = asyncio.Queue()
+    for digit in '899':
+        hashes.put_nowait('0x' + digit * 64)
+    
+    fetcher = asyncio.create_task(monitor._fetch_pending_batches(hashes))
+    await asyncio.sleep(0.1)
+    fetcher.cancel()
+    
+    assert set(monitor.transactions) == {bytes.fromhex('8' * 64), bytes.fromhex('9' * 64)}
+    assert monitor.tx_queue.qsize() == 2
+    
+    # The duplicate in the second batch was already held, so never fetched
+    assert w3.eth.get_transaction.await_count == 2
+
+@pytest.mark.asyncio
+async def test_pending_store_struct_of_arrays(w3, config):
+    """Test pending transactions are stored, filtered and evicted by row"""
+    manager = MempoolManager(w3, {**config, 'max_pending_tx': 2})
+    
+    def pending_tx(tx_hash):
+        digit = int(tx_hash[2])
+        return {
+            'from': Address('0x' + '2' * 40),
+            'to': Address('0x' + '3' * 40),
+            'value': digit * 10**18,
+            'gasPrice': 10**9,
+            'gas': 21000 * digit,
+            'nonce': 0,
+            'input': b''
+        }
+    
+    w3.eth.get_transaction = AsyncMock(side_effect=pending_tx)
+    hashes = [bytes.fromhex(digit * 64) for digit in '123']
+    for tx_hash in hashes:
+        await manager._process_transaction('0x' + tx_hash.hex())
+    
+    # Rows grow past the initial capacity
+    assert len(manager._row_live) == 4
+    assert list(manager.pending_txs) == hashes
+    assert manager.filter_pending(min_value=2 * 10**18, max_gas=50000) == [hashes[1]]
+    
+    # Values that round to the threshold are compared exactly
+    assert manager.filter_pending(min_value=2 * 10**18 + 1) == [hashes[2]]
+    
+    # Stale rows are evicted and reused
+    manager._row_timestamp[manager._tx_rows[hashes[0]]] = manager._clock() - 600
+    manager._cleanup_old_transactions()
+    assert list(manager.pending_txs) == hashes[1:]
+    assert list(manager._arrivals) == hashes[1:]
+    assert manager.filter_pending() == hashes[1:]
+    assert manager._free_rows[-1] == 0
+
+def test_identify_protocol(w3, config):
+    """Test protocols are identified from the calldata selector"""
+    manager = MempoolManager(w3, config)
+    
+    assert manager._identify_protocol(bytes.fromhex('38ed1739') + b'\x00' * 32) == 'uniswap_v2'
+    assert manager._identify_protocol('0x414bf389' + '00' * 32) == 'uniswap_v3'
+    assert manager._identify_protocol(bytes.fromhex('52bbbe29')) == 'balancer'
+    assert manager._identify_protocol(b'\xde\xad\xbe\xef') is None
+    assert manager._identify_protocol(b'') is None
+
+@pytest.mark.asyncio
+async def test_evicted_transactions_untouched(w3, config):
+    """Test references to evicted transactions keep their contents"""
+    manager = MempoolManager(w3, config)
+    w3.eth.get_transaction = AsyncMock(return_value={
+        'from': Address('0x' + '2' * 40),
+        'value': 1,
+        'input': b'\x01'
+    })
+    
+    first, second = HexStr('0x' + 'a' * 64), HexStr('0x' + 'b' * 64)
+    await manager._process_transaction(first)
+    evicted = manager.pending_txs[bytes.fromhex('a' * 64)]
+    manager._remove_transaction(bytes.fromhex('a' * 64))
+    
+    await manager._process_transaction(second)
+    assert manager.pending_txs[bytes.fromhex('b' * 64)] is not evicted
+    assert evicted.hash == bytes.fromhex('a' * 64)
+    assert evicted.data == b'\x01'
+
+@pytest.mark.asyncio
+async def test_transaction_lookups_bounded(w3, config):
+    """Test no more than max_inflight_rpc lookups run at once"""
+    manager = MempoolManager(w3, {**config, 'max_inflight_rpc': 2})
+    active = 0
+    peak = 0
+    
+    async def get_transaction(tx_hash):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return None
+    
+    w3.eth.get_transaction = AsyncMock(side_effect=get_transaction)
+    await asyncio.gather(*(
+        manager._process_transaction(HexStr('0x' + digit * 64))
+        for digit in 'cdef'
+    ))
+    
+    assert w3.eth.get_transaction.await_count == 4
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_filter_transactions(w3, config):
+    """Test value and gas filters, including values past uint64"""
+    manager = MempoolManager(w3, config)
+    txs = [
+        {'value': 10**18, 'gas': 21000},
+        {'value': 2**64 + 1, 'gas': 100000},
+        {'value': 2**64 + 1, 'gas': 21000},
+        {'value': 2**64, 'gas': 21000},
+    ]
+    
+    assert await manager.filter_transactions(txs) == txs
+    assert await manager.filter_transactions(txs, min_value=2**64 + 1) == txs[1:3]
+    assert await manager.filter_transactions(txs, max_gas=50000) == [txs[0], txs[2], txs[3]]
+    assert await manager.filter_transactions(txs, min_value=2**64 + 1, max_gas=50000) == [txs[2]]
+    assert await manager.filter_transactions([], min_value=1, max_gas=1) == []
+
+@pytest.mark.asyncio
+async def test_index_query(w3, config):
+    """Test indexes track row ids and intersect across protocol and token"""
+    manager = MempoolManager(w3, config)
+    swap = bytes.fromhex('38ed1739') + b'\x00' * 32
+    w3.eth.get_transaction = AsyncMock(side_effect=lambda tx_hash: {
+        'from': Address('0x' + '2' * 40),
+        'to': Address('0x' + tx_hash[2] * 40),
+        'input': swap if tx_hash[2] != '3' else b''
+    })
+    manager._identify_token = lambda address: 'WETH' if address[0] in (0x11, 0x33) else None
+    
+    hashes = [bytes.fromhex(digit * 64) for digit in '123']
+    for tx_hash in hashes:
+        await manager._process_transaction('0x' + tx_hash.hex())
+    
+    assert sorted(manager.query_indexes(protocol='uniswap_v2')) == hashes[:2]
+    assert sorted(manager.query_indexes(token='WETH')) == [hashes[0], hashes[2]]
+    assert manager.query_indexes(protocol='uniswap_v2', token='WETH') == [hashes[0]]
+    assert manager.query_indexes(protocol='curve') == []
+    assert manager.query_indexes() == []
+    
+    manager._remove_transaction(hashes[0])
+    assert manager.query_indexes(protocol='uniswap_v2', token='WETH') == []
+    assert manager.query_indexes(protocol='uniswap_v2') == [hashes[1]]
+
+def test_seen_filter_export(w3, config):
+    """Test exported Golomb-Rice filters match seen hashes and little else"""
+    manager = MempoolManager(w3, config)
+    assert not manager.probe_filter(manager.export_filter(), HexStr('0x' + '1' * 64))
+    
+    seen = [i.to_bytes(32, 'big') for i in range(1, 2001)]
+    for tx_hash in seen:
+        manager._mark_seen(tx_hash)
+    
+    blob = manager.export_filter()
+    assert len(blob) < len(seen) * 4  # ~21 bits per hash instead of 32 bytes
+    assert all(manager.probe_filter(blob, '0x' + tx_hash.hex()) for tx_hash in seen[::50])
+    
+    unseen = ['0x' + i.to_bytes(32, 'big').hex() for i in range(10**6, 10**6 + 200)]
+    assert sum(manager.probe_filter(blob, tx_hash) for tx_hash in unseen) <= 1
+    assert manager.probe_filter_any(blob, unseen[:50] + ['0x' + seen[7].hex()])
+
+
+def test_seen_filter_hash_fallback(w3, config):
+    """Test filters record their hash function and blake2b works without xxhash"""
+    manager = MempoolManager(w3, config)
+    manager._mark_seen(bytes.fromhex('1' * 64))
+    
+    with patch('mevbot.core.mempool.xxhash', None):
+        blob = manager.export_filter()
+        assert blob[4] == GCS_HASH_BLAKE2B
+        assert manager.probe_filter(blob, '0x' + '1' * 64)
+        
+        # An xxh3 filter can't be probed without xxhash
+        with pytest.raises(RuntimeError):
+            manager.probe_filter(blob[:4] + bytes([GCS_HASH_XXH3]) + blob[5:], '0x' + '1' * 64)
+
+def test_pending_hash_forms(w3, config):
+    """Test hex and HexBytes hashes key the same raw-bytes entry"""
+    monitor = MempoolMonitor(w3, config)
+    tx = {
+        'hash': HexBytes('0x' + '5' * 64),
+        'from': Address('0x' + '2' * 40),
+        'value': 1,
+        'gasPrice': 1,
+        'gas': 21000,
+        'nonce': 0
+    }
+    
+    recorded = monitor.add_pending_transaction(tx)
+    assert type(recorded.hash) is bytes
+    assert recorded.to_address is None
+    assert monitor.add_pending_transaction({**tx, 'hash': '0x' + '5' * 64}) is None
+    assert list(monitor.transactions) == [bytes.fromhex('5' * 64)]
@@ -19,7 +19,7 @@ def test_strategy_metrics():
     metrics.failures = 25
     metrics.total_profit = 10.0
     metrics.total_gas = 1000000
-    metrics.execution_times = [10.0, 20.0, 30.0]
+    metrics.total_execution_time = 2000.0
     
     # Test calculations
     assert metrics.success_rate == 0.75
@@ -57,6 +57,7 @@ def test_performance_tracker():
     assert metrics.total_profit == 1.0
     assert metrics.total_gas == 150000
     assert len(metrics.execution_times) == 2
+    assert metrics.average_execution_time == 12.5
 
 def test_timer():
     """Test timer context manager"""
@@ -118,3 +119,13 @@ def test_print_summary(caplog):
     assert "Average Profit: 1.0000 ETH" in caplog.text
     assert "Average Gas: 100000" in caplog.text
     assert "Average Execution Time: 15.00ms" in caplog.text
+
+def test_execution_times_bounded():
+    """Test execution time history is capped while the average covers everything"""
+    tracker = PerformanceTracker()
+    for i in range(2000):
+        tracker.track_execution("arbitrage", True, 0.0, 0, float(i % 2))
+    
+    metrics = tracker.get_metrics("arbitrage")
+    assert len(metrics.execution_times) == 1024
+    assert metrics.average_execution_time == 0.5
@@ -137,3 +137,24 @@ def test_dpdk_error_handling_mock(config):
         assert result is False
         assert not manager.initialized
         mock_dpdk.rte_pktmbuf_pool_create.assert_not_called()  # Should not proceed to mempool creation
+
+def test_burst_io_mock(config):
+    """Test burst RX/TX go through the extension, not ctypes"""
+    with patch('ctypes.CDLL') as mock_cdll:
+        manager = DPDKManager(config)
+        
+        with patch('mevbot.core.network._dpdk_ext') as mock_ext:
+            mock_ext.rx_burst.return_value = 3
+            mock_ext.tx_burst.return_value = 2
+            buffer = bytearray(32 * 8)
+            
+            assert manager.rx_burst(0, 1, buffer, 32) == 3
+            assert manager.tx_burst(0, 1, buffer, 2) == 2
+            mock_ext.rx_burst.assert_called_once_with(0, 1, buffer, 32)
+            mock_ext.tx_burst.assert_called_once_with(0, 1, buffer, 2)
+        
+        with patch('mevbot.core.network._dpdk_ext', None):
+            with pytest.raises(RuntimeError):
+                manager.rx_burst(0, 0, bytearray(8), 1)
+        
+        assert not mock_cdll.return_value.rte_eth_rx_burst.called